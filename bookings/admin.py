@@ -1,20 +1,71 @@
+from django import forms
 from django.contrib import admin
-from .models import RoomBooking
+from .availability import RoomUnavailable, reserve_change
+from .models import (
+    ArchivedRoomBooking, BookingRoom, LengthOfStayDiscount, OutboundEmail, RoomBooking, RoomType, SeasonalRate,
+)
+
+STAY_FIELDS = ('check_in', 'check_out', 'selected_rooms', 'status')
+
+
+class RoomBookingAdminForm(forms.ModelForm):
+    """
+    Takes rooms through the same reservation path as the status endpoint, so
+    an admin edit cannot overbook. The admin saves inside one transaction,
+    so the room-nights stay locked until the booking is written.
+    """
+
+    class Meta:
+        model = RoomBooking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        new = tuple(cleaned_data.get(field, getattr(self.instance, field)) for field in STAY_FIELDS)
+        old = (None,) * len(STAY_FIELDS)
+        if self.instance.pk:
+            locked = RoomBooking.objects.select_for_update().get(pk=self.instance.pk)
+            old = tuple(getattr(locked, field) for field in STAY_FIELDS)
+        try:
+            reserve_change(old, new)
+        except RoomUnavailable as e:
+            details = '; '.join(
+                f"room type {item['room_id']}: {item['requested']} requested, {item['available']} free"
+                for item in e.shortfalls
+            )
+            raise forms.ValidationError(f'{e} ({details})')
+        return cleaned_data
+
+
+class BookingRoomInline(admin.TabularInline):
+    # Derived from selected_rooms and total_price when the booking is saved
+    model = BookingRoom
+    fields = ['room_type', 'quantity', 'nightly_rate', 'line_total']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(RoomBooking)
 class RoomBookingAdmin(admin.ModelAdmin):
+    form = RoomBookingAdminForm
     list_display = [
         'booking_reference', 'full_name', 'email', 'check_in', 
-        'check_out', 'nights', 'total_price', 'booking_date'
+        'check_out', 'nights', 'total_price', 'status', 'booking_date'
     ]
-    list_filter = ['check_in', 'check_out', 'booking_date', 'adults']
+    list_filter = ['status', 'check_in', 'check_out', 'booking_date', 'adults']
     search_fields = ['booking_reference', 'full_name', 'email', 'phone']
     readonly_fields = ['booking_reference', 'booking_date']
+    inlines = [BookingRoomInline]
     
     fieldsets = (
         ('Booking Information', {
-            'fields': ('booking_reference', 'booking_date')
+            'fields': ('booking_reference', 'booking_date', 'status')
         }),
         ('Guest Information', {
             'fields': ('full_name', 'email', 'phone', 'special_requests')
@@ -34,3 +85,44 @@ class RoomBookingAdmin(admin.ModelAdmin):
         if obj:  # Editing existing booking
             return self.readonly_fields + ['selected_rooms', 'total_price']
         return self.readonly_fields
+
+
+@admin.register(ArchivedRoomBooking)
+class ArchivedRoomBookingAdmin(admin.ModelAdmin):
+    list_display = ['booking_reference', 'full_name', 'email', 'check_in', 'check_out', 'status', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['booking_reference', 'full_name', 'email']
+    
+    # The archive is history: read-only, filled by the archive_bookings command
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status']
+    search_fields = ['subject']
+    readonly_fields = ['booking', 'created_at', 'sent_at', 'last_error']
+
+
+
+class SeasonalRateInline(admin.TabularInline):
+    model = SeasonalRate
+    extra = 0
+
+
+@admin.register(RoomType)
+class RoomTypeAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'price_per_night', 'weekend_price', 'total_rooms', 'is_active', 'updated_at']
+    list_editable = ['price_per_night', 'weekend_price', 'total_rooms', 'is_active']
+    inlines = [SeasonalRateInline]
+
+
+@admin.register(LengthOfStayDiscount)
+class LengthOfStayDiscountAdmin(admin.ModelAdmin):
+    list_display = ['min_nights', 'percent']
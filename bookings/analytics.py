@@ -0,0 +1,122 @@
+"""
+Occupancy and revenue time series.
+
+Rooms sold per night come straight from RoomNightOccupancy, one range scan
+over its (date, room_type) index. Room revenue per night is built with a
+difference array: bookings are grouped in SQL by ``(check_in, check_out)``,
+each group adds its nightly share at check-in and takes it back at check-out,
+and a running sum over the window's days yields the revenue of every night.
+The work grows with the number of days and distinct stays, never with nights
+times bookings, and archived bookings are included so the series covers the
+full history.
+
+Capacity is today's inventory of active room types; the catalog keeps no
+history of room counts.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from .availability import OCCUPYING_STATUSES, room_inventory
+from .models import ArchivedRoomBooking, RoomBooking, RoomNightOccupancy
+from .pricing import CENT
+
+GROUPINGS = ('night', 'week', 'month')
+
+# Longest window one request may ask for
+MAX_WINDOW_DAYS = 10 * 366
+
+
+def rooms_sold(start, end):
+    """``{date: rooms taken}`` for the nights in ``[start, end]``."""
+    return dict(
+        RoomNightOccupancy.objects.filter(date__gte=start, date__lte=end)
+        .values('date').annotate(booked=Sum('booked')).values_list('date', 'booked')
+    )
+
+
+def nightly_revenue(start, end):
+    """Room revenue of each night in ``[start, end]`` as a list of Decimals."""
+    days = (end - start).days + 1
+    diff = [Decimal('0')] * (days + 1)
+    for model in (RoomBooking, ArchivedRoomBooking):
+        stays = (
+            model.objects.filter(status__in=OCCUPYING_STATUSES, check_in__lte=end, check_out__gt=start)
+            .values('check_in', 'check_out').annotate(revenue=Sum('total_price')).order_by()
+        )
+        for check_in, check_out, revenue in stays.values_list('check_in', 'check_out', 'revenue'):
+            nights = (check_out - check_in).days
+            if nights <= 0 or not revenue:
+                continue
+            share = Decimal(revenue) / nights
+            diff[max((check_in - start).days, 0)] += share
+            diff[min((check_out - start).days, days)] -= share
+
+    revenue = []
+    running = Decimal('0')
+    for change in diff[:days]:
+        running += change
+        revenue.append(running)
+    return revenue
+
+
+def period_start(night, group):
+    if group == 'week':
+        return night - timedelta(days=night.weekday())
+    if group == 'month':
+        return night.replace(day=1)
+    return night
+
+
+def _figures(nights, capacity, sold, revenue):
+    available = capacity * nights
+    revenue = revenue.quantize(CENT)
+    return {
+        'nights': nights,
+        'rooms_available': available,
+        'rooms_sold': sold,
+        'occupancy_rate': round(sold / available * 100, 1) if available else 0.0,
+        'revenue': str(revenue),
+        'adr': str((revenue / sold).quantize(CENT)) if sold else None,
+        'revpar': str((revenue / available).quantize(CENT)) if available else None,
+    }
+
+
+def occupancy_series(start, end, group='night'):
+    """
+    Occupancy, ADR and RevPAR for ``[start, end]``, one entry per night,
+    week or month (partial first and last periods only count their nights
+    inside the window), plus totals for the whole window.
+    """
+    capacity = sum(room_inventory().values())
+    sold = rooms_sold(start, end)
+    revenue = nightly_revenue(start, end)
+
+    periods = {}
+    for offset, night_revenue in enumerate(revenue):
+        night = start + timedelta(days=offset)
+        period = periods.setdefault(period_start(night, group), [0, 0, Decimal('0')])
+        period[0] += 1
+        period[1] += sold.get(night, 0)
+        period[2] += night_revenue
+
+    return {
+        'start': start,
+        'end': end,
+        'group': group,
+        'capacity': capacity,
+        'periods': [
+            {'period_start': key, **_figures(nights, capacity, rooms, amount)}
+            for key, (nights, rooms, amount) in periods.items()
+        ],
+        'totals': _figures(len(revenue), capacity, sum(sold.values()), sum(revenue, Decimal('0'))),
+    }
+
+
+def occupancy_rate_on(night):
+    """Share of today's inventory taken on ``night``, in percent."""
+    capacity = sum(room_inventory().values())
+    if not capacity:
+        return 0.0
+    return round(rooms_sold(night, night).get(night, 0) / capacity * 100, 1)
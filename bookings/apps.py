@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    # SQLite table rebuilds during migrations drop the FTS sync triggers.
+    from django.db import connections
+    from .search import FTS_TABLE, install_search_index
+
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
 
 
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(restore_search_triggers, sender=self)
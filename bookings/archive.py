@@ -0,0 +1,68 @@
+"""
+Archive tier for finished bookings.
+
+Completed and cancelled bookings whose stay ended long ago are moved from
+RoomBooking to ArchivedRoomBooking in primary-key ordered chunks, one
+transaction per chunk, so the hot table (and every list, search and
+aggregate over it) only carries recent history. Queries read the archive
+only when asked to (``?archive=true``).
+
+Room-night occupancy is deliberately not touched: an archived stay still
+happened.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.versioning import bump_version
+
+from .models import ArchivedRoomBooking, RoomBooking
+from .signals import suspend_booking_signals
+
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Every column the two tiers share, archived_at excepted
+ARCHIVE_FIELDS = [
+    field.attname for field in ArchivedRoomBooking._meta.concrete_fields if field.name != 'archived_at'
+]
+
+
+def default_cutoff():
+    return timezone.now().date() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+
+
+def archivable(cutoff):
+    """Bookings that ended before ``cutoff`` and will not change again."""
+    return RoomBooking.objects.filter(status__in=ARCHIVABLE_STATUSES, check_out__lt=cutoff)
+
+
+def archive_chunk(cutoff, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Move up to ``chunk_size`` archivable bookings; returns how many moved."""
+    with transaction.atomic():
+        ids = list(
+            archivable(cutoff).select_for_update().order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0
+        ArchivedRoomBooking.objects.bulk_create([
+            ArchivedRoomBooking(**row)
+            for row in RoomBooking.objects.filter(id__in=ids).values(*ARCHIVE_FIELDS)
+        ])
+        with suspend_booking_signals():
+            RoomBooking.objects.filter(id__in=ids).delete()
+        transaction.on_commit(lambda: bump_version('bookings'))
+    return len(ids)
+
+
+def archive_bookings(cutoff=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Archive everything older than ``cutoff``; yields the size of each chunk moved."""
+    cutoff = cutoff or default_cutoff()
+    while True:
+        moved = archive_chunk(cutoff, chunk_size)
+        if not moved:
+            return
+        yield moved
@@ -0,0 +1,260 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Max
+
+from .catalog import active_rooms
+from .models import RoomNightOccupancy
+
+# Statuses that hold on to rooms; cancelled bookings free their nights.
+OCCUPYING_STATUSES = ('pending', 'confirmed', 'completed')
+
+INVALID_ROOMS_MESSAGE = 'Room selections must map room ids to positive quantities.'
+
+# Keep IN (...) lists and bulk inserts well below backend parameter limits.
+BATCH_SIZE = 500
+
+
+class RoomUnavailable(Exception):
+    """Raised inside a booking transaction when the stay no longer fits."""
+
+    def __init__(self, shortfalls):
+        super().__init__('Some of the selected rooms are not available for these dates.')
+        self.shortfalls = shortfalls
+
+
+def room_inventory():
+    """Return the number of rooms available for each room type id."""
+    return {room_id: room.total_rooms for room_id, room in active_rooms().items()}
+
+
+def stay_nights(check_in, check_out):
+    """Return every night of a stay, check-out day excluded."""
+    return [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days)]
+
+
+def normalize_rooms(selected_rooms, strict=False):
+    """
+    Turn a ``selected_rooms`` JSON mapping into ``{room_id: quantity}``.
+
+    Stored rows are read leniently, skipping entries that are not a room id
+    with a positive quantity. ``strict`` is for client input: anything but a
+    mapping of room ids to positive whole numbers raises ValidationError.
+    """
+    if strict and not isinstance(selected_rooms, dict):
+        raise ValidationError(INVALID_ROOMS_MESSAGE)
+    rooms = {}
+    for room_id, quantity in (selected_rooms or {}).items():
+        if strict and (isinstance(quantity, bool) or not isinstance(quantity, int)):
+            raise ValidationError(INVALID_ROOMS_MESSAGE)
+        try:
+            room_id, quantity = int(room_id), int(quantity)
+        except (TypeError, ValueError):
+            if strict:
+                raise ValidationError(INVALID_ROOMS_MESSAGE)
+            continue
+        if quantity > 0:
+            rooms[room_id] = rooms.get(room_id, 0) + quantity
+        elif strict:
+            raise ValidationError(INVALID_ROOMS_MESSAGE)
+    return rooms
+
+
+def footprint(check_in, check_out, selected_rooms, status):
+    """Return the ``{(room_id, night): quantity}`` a booking occupies."""
+    if status not in OCCUPYING_STATUSES or not check_in or not check_out:
+        return {}
+    rooms = normalize_rooms(selected_rooms)
+    return {
+        (room_id, night): quantity
+        for night in stay_nights(check_in, check_out)
+        for room_id, quantity in rooms.items()
+    }
+
+
+def footprint_delta(new, old):
+    """Return the per room-night change needed to go from ``old`` to ``new``."""
+    delta = dict(new)
+    for key, quantity in old.items():
+        delta[key] = delta.get(key, 0) - quantity
+    return {key: quantity for key, quantity in delta.items() if quantity}
+
+
+def apply_night_deltas(deltas):
+    """
+    Add ``{(room_id, night): change}`` to the occupancy table.
+
+    Missing rows are inserted first, then nights sharing the same room type and
+    change are bumped together with a single ``UPDATE ... SET booked = booked + n``.
+    """
+    if not deltas:
+        return
+
+    RoomNightOccupancy.objects.bulk_create(
+        [RoomNightOccupancy(room_type=room_id, date=night) for room_id, night in deltas],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    groups = defaultdict(list)
+    for (room_id, night), change in deltas.items():
+        groups[(room_id, change)].append(night)
+
+    for (room_id, change), nights in sorted(groups.items()):
+        for start in range(0, len(nights), BATCH_SIZE):
+            RoomNightOccupancy.objects.filter(
+                room_type=room_id, date__in=nights[start:start + BATCH_SIZE]
+            ).update(booked=F('booked') + change)
+
+
+def get_availability(check_in, check_out):
+    """
+    Return ``{room_id: free_rooms}`` for every night in ``[check_in, check_out)``.
+
+    A room type is only as free as its busiest night, so this is one range
+    scan over the occupancy index grouped by room type.
+    """
+    peaks = dict(
+        RoomNightOccupancy.objects.filter(date__gte=check_in, date__lt=check_out)
+        .values_list('room_type')
+        .annotate(peak=Max('booked'))
+        .order_by()
+    )
+    return {
+        room_id: max(total - peaks.get(room_id, 0), 0)
+        for room_id, total in room_inventory().items()
+    }
+
+
+def find_shortfalls(check_in, check_out, selected_rooms):
+    """Return the requested room types that cannot be satisfied for the stay."""
+    free = get_availability(check_in, check_out)
+    shortfalls = []
+    for room_id, quantity in sorted(normalize_rooms(selected_rooms).items()):
+        available = free.get(room_id, 0)
+        if quantity > available:
+            shortfalls.append({
+                'room_id': room_id,
+                'requested': quantity,
+                'available': available,
+            })
+    return shortfalls
+
+
+def lock_room_nights(check_in, check_out, selected_rooms):
+    """
+    Row-lock the occupancy rows a stay touches until the transaction ends.
+
+    Missing rows are created first so there is something to lock. Locks are
+    taken in (room type, night) order, so two overlapping bookings queue up
+    instead of deadlocking, while bookings that share no room-night take
+    disjoint locks and never wait for each other.
+    """
+    rooms = sorted(normalize_rooms(selected_rooms))
+    nights = stay_nights(check_in, check_out)
+    if not rooms or not nights:
+        return
+    RoomNightOccupancy.objects.bulk_create(
+        [RoomNightOccupancy(room_type=room_id, date=night) for room_id in rooms for night in nights],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    list(
+        RoomNightOccupancy.objects.select_for_update()
+        .filter(room_type__in=rooms, date__gte=check_in, date__lt=check_out)
+        .order_by('room_type', 'date')
+        .values_list('pk', flat=True)
+    )
+
+
+def reserve_rooms(check_in, check_out, selected_rooms):
+    """
+    Lock a new stay's room-nights and make sure it still fits.
+
+    Call inside ``transaction.atomic()`` right before saving the booking;
+    raises RoomUnavailable (rolling the transaction back) if a concurrent
+    booking took the last rooms first.
+    """
+    lock_room_nights(check_in, check_out, selected_rooms)
+    shortfalls = find_shortfalls(check_in, check_out, selected_rooms)
+    if shortfalls:
+        raise RoomUnavailable(shortfalls)
+
+
+def reserve_change(old, new):
+    """
+    Lock and check the room-nights an edit adds to a booking.
+
+    ``old`` and ``new`` are ``(check_in, check_out, selected_rooms, status)``
+    before and after the edit (all None before for a new booking). Nights the booking already holds are not
+    counted against it, so moving a stay by a day only needs the new night
+    free. Call inside ``transaction.atomic()`` with the booking row locked;
+    raises RoomUnavailable like ``reserve_rooms``.
+    """
+    added = {
+        key: quantity for key, quantity in footprint_delta(footprint(*new), footprint(*old)).items()
+        if quantity > 0
+    }
+    if not added:
+        return
+    rooms = {room_id: 1 for room_id, _ in added}
+    first, last = min(night for _, night in added), max(night for _, night in added)
+    lock_room_nights(first, last + timedelta(days=1), rooms)
+
+    inventory = room_inventory()
+    booked = {
+        (room_id, night): count
+        for room_id, night, count in RoomNightOccupancy.objects.filter(
+            room_type__in=list(rooms), date__gte=first, date__lte=last,
+        ).values_list('room_type', 'date', 'booked')
+    }
+    shortfalls = {}
+    for (room_id, night), quantity in sorted(added.items()):
+        available = max(inventory.get(room_id, 0) - booked.get((room_id, night), 0), 0)
+        if quantity > available and available < shortfalls.get(room_id, {}).get('available', quantity):
+            shortfalls[room_id] = {'room_id': room_id, 'requested': quantity, 'available': available}
+    if shortfalls:
+        raise RoomUnavailable([shortfalls[room_id] for room_id in sorted(shortfalls)])
+
+
+def admit_stays(stays):
+    """
+    Lock the room-nights of several stays at once and decide which still fit.
+
+    ``stays`` is ``[(key, check_in, check_out, selected_rooms)]``; they are
+    admitted in order, each counting against the ones admitted before it.
+    Returns ``{key: shortfalls}`` for the stays that do not fit. Call inside
+    ``transaction.atomic()`` before taking the rooms of the admitted ones.
+    """
+    stays = [stay for stay in stays if stay[1] and stay[2] and stay[2] > stay[1]]
+    if not stays:
+        return {}
+    # One lock over the union of the stays, still in (room type, night) order
+    rooms = {room_id: 1 for stay in stays for room_id in normalize_rooms(stay[3])}
+    start, end = min(stay[1] for stay in stays), max(stay[2] for stay in stays)
+    lock_room_nights(start, end, rooms)
+
+    inventory = room_inventory()
+    booked = defaultdict(int, {
+        (room_id, night): count
+        for room_id, night, count in RoomNightOccupancy.objects.filter(
+            room_type__in=list(rooms), date__gte=start, date__lt=end,
+        ).values_list('room_type', 'date', 'booked')
+    })
+    rejected = {}
+    for key, check_in, check_out, selected_rooms in stays:
+        wanted = normalize_rooms(selected_rooms)
+        nights = stay_nights(check_in, check_out)
+        shortfalls = []
+        for room_id, quantity in sorted(wanted.items()):
+            available = min(inventory.get(room_id, 0) - booked[room_id, night] for night in nights)
+            if quantity > available:
+                shortfalls.append({'room_id': room_id, 'requested': quantity, 'available': max(available, 0)})
+        if shortfalls:
+            rejected[key] = shortfalls
+            continue
+        for room_id, quantity in wanted.items():
+            for night in nights:
+                booked[room_id, night] += quantity
+    return rejected
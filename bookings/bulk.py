@@ -0,0 +1,102 @@
+"""
+Batch status changes and deletes for the admin dashboard.
+
+The affected rows are locked and read once, written with a single
+``queryset.update()`` / ``queryset.delete()`` and the derived state
+(occupancy, cache versions, events) is brought up to date once per batch
+instead of once per row.
+"""
+from django.db import transaction
+
+from .availability import OCCUPYING_STATUSES, admit_stays
+from .models import RoomBooking
+from .signals import TRACKED_FIELDS, suspend_booking_signals, sync_bulk_deleted, sync_bulk_status_changed
+
+MAX_BULK_IDS = 500
+
+# Enough to diff occupancy and the rollup and build the event payload
+_FIELDS = ('id', 'booking_reference', 'full_name', 'total_price', *TRACKED_FIELDS)
+
+VALID_STATUSES = [choice for choice, _ in RoomBooking.STATUS_CHOICES]
+
+
+def parse_ids(value):
+    """Return the list of booking ids in ``value`` or raise ValueError."""
+    if not isinstance(value, list) or not value:
+        raise ValueError('ids must be a non-empty list of booking ids.')
+    if len(value) > MAX_BULK_IDS:
+        raise ValueError(f'At most {MAX_BULK_IDS} ids can be sent at once.')
+    try:
+        ids = [int(booking_id) for booking_id in value]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be a non-empty list of booking ids.')
+    # Keep the caller's order, drop repeats
+    return list(dict.fromkeys(ids))
+
+
+def _locked(ids):
+    # Lock in primary key order so overlapping batches cannot deadlock
+    return {
+        booking.pk: booking
+        for booking in RoomBooking.objects.select_for_update().filter(pk__in=ids).only(*_FIELDS).order_by('pk')
+    }
+
+
+def bulk_update_status(ids, new_status):
+    """
+    Move every booking in ``ids`` to ``new_status``.
+
+    Returns ``[{'id', 'result', 'previous_status'?, 'unavailable'?}]`` in
+    the order given, with result ``updated``, ``unchanged``, ``not_found`` or
+    ``unavailable`` (a cancelled booking whose rooms have been taken since;
+    ``unavailable`` lists the shortfalls and the booking is left as it was).
+    """
+    with transaction.atomic():
+        bookings = _locked(ids)
+        changed = [booking for booking in bookings.values() if booking.status != new_status]
+        rejected = {}
+        if new_status in OCCUPYING_STATUSES:
+            # Bookings that take their rooms back must still fit, in id order
+            rejected = admit_stays([
+                (booking.pk, booking.check_in, booking.check_out, booking.selected_rooms)
+                for booking in changed if booking.status not in OCCUPYING_STATUSES
+            ])
+            changed = [booking for booking in changed if booking.pk not in rejected]
+        previous = {booking.pk: booking.status for booking in changed}
+        if changed:
+            RoomBooking.objects.filter(pk__in=previous).update(status=new_status)
+            for booking in changed:
+                booking.status = new_status
+            sync_bulk_status_changed(changed, previous)
+
+    results = []
+    for booking_id in ids:
+        if booking_id not in bookings:
+            results.append({'id': booking_id, 'result': 'not_found'})
+        elif booking_id in rejected:
+            results.append({'id': booking_id, 'result': 'unavailable', 'unavailable': rejected[booking_id]})
+        elif booking_id in previous:
+            results.append({'id': booking_id, 'result': 'updated', 'previous_status': previous[booking_id]})
+        else:
+            results.append({'id': booking_id, 'result': 'unchanged'})
+    return results
+
+
+def bulk_delete(ids):
+    """
+    Delete every booking in ``ids``.
+
+    Returns ``[{'id', 'result'}]`` in the order given, with result
+    ``deleted`` or ``not_found``.
+    """
+    with transaction.atomic():
+        bookings = _locked(ids)
+        if bookings:
+            with suspend_booking_signals():
+                RoomBooking.objects.filter(pk__in=bookings).delete()
+            sync_bulk_deleted(bookings.values())
+
+    return [
+        {'id': booking_id, 'result': 'deleted' if booking_id in bookings else 'not_found'}
+        for booking_id in ids
+    ]
@@ -0,0 +1,69 @@
+"""
+Front-desk calendar: a room type x night grid of live bookings.
+
+Bookings overlapping the window are read with one range query
+(``check_out > start AND check_in < end``; the ``check_out`` index bounds
+it to stays that have not ended yet, which is what a forward-looking
+calendar asks for) and returned column-oriented: each booking field is one
+list, and every room type carries a rooms-taken count and the booking ids
+staying in it for each night. A 90 night grid is a few KB where the
+booking list would be the full dump.
+"""
+from datetime import timedelta
+
+from .availability import OCCUPYING_STATUSES, normalize_rooms
+from .catalog import get_catalog
+from .models import RoomBooking
+
+DEFAULT_CALENDAR_DAYS = 30
+MAX_CALENDAR_DAYS = 90
+
+# Column order of the ``bookings`` block
+BOOKING_COLUMNS = ('id', 'booking_reference', 'full_name', 'status', 'check_in', 'check_out')
+
+
+def overlapping_bookings(start, end):
+    """Live, room-holding bookings with at least one night in ``[start, end)``."""
+    return (
+        RoomBooking.objects.filter(check_out__gt=start, check_in__lt=end, status__in=OCCUPYING_STATUSES)
+        .order_by('check_in', 'id')
+    )
+
+
+def _empty_row(days):
+    return {'booked': [0] * days, 'cells': [[] for _ in range(days)]}
+
+
+def booking_calendar(start, days):
+    """The grid for the ``days`` nights starting at ``start``."""
+    end = start + timedelta(days=days)
+    rows = list(overlapping_bookings(start, end).values_list(*BOOKING_COLUMNS, 'selected_rooms'))
+
+    catalog = get_catalog()
+    # Every active room type gets a row, booked or not
+    room_types = {room_id: _empty_row(days) for room_id, room in catalog.items() if room.is_active}
+    for row in rows:
+        booking_id, check_in, check_out = row[0], row[4], row[5]
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        for room_id, quantity in normalize_rooms(row[-1]).items():
+            grid = room_types.setdefault(room_id, _empty_row(days))
+            for offset in range(first, last):
+                grid['booked'][offset] += quantity
+                grid['cells'][offset].append(booking_id)
+
+    return {
+        'start': start,
+        'end': end,
+        'days': days,
+        'bookings': {column: [row[number] for row in rows] for number, column in enumerate(BOOKING_COLUMNS)},
+        'room_types': [
+            {
+                'id': room_id,
+                'name': catalog[room_id].name if room_id in catalog else None,
+                'total_rooms': catalog[room_id].total_rooms if room_id in catalog else 0,
+                **room_types[room_id],
+            }
+            for room_id in sorted(room_types)
+        ],
+    }
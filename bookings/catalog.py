@@ -0,0 +1,57 @@
+"""
+Process-local cache of the room catalog.
+
+Room types are read on every booking, quote and availability request but
+change rarely, so each worker keeps them in memory and reloads only when the
+``room_types`` version moves. Versions live in the store every process
+shares (see ``core.versioning``), so an edit made by any worker or command
+reaches this copy within ``VERSION_CHECK_INTERVAL`` seconds; most lookups
+cost no query at all.
+"""
+import threading
+from collections import namedtuple
+
+from core.versioning import get_version
+
+from .models import RoomType
+
+CatalogRoom = namedtuple('CatalogRoom', 'id name price_per_night total_rooms is_active')
+
+_lock = threading.Lock()
+_catalog = (None, {})
+
+
+def load_catalog():
+    return {
+        room.id: CatalogRoom(room.id, room.name, room.price_per_night, room.total_rooms, room.is_active)
+        for room in RoomType.objects.all()
+    }
+
+
+def get_catalog(fresh=False):
+    """
+    Return ``{room_type_id: CatalogRoom}`` for every room type.
+
+    Pass ``fresh`` when the answer is written into a booking, so an edit
+    made by another process a moment ago is never missed.
+    """
+    global _catalog
+    version = get_version('room_types', fresh=fresh)
+    loaded_version, rooms = _catalog
+    if loaded_version != version:
+        with _lock:
+            loaded_version, rooms = _catalog
+            if loaded_version != version:
+                rooms = load_catalog()
+                _catalog = (version, rooms)
+    return rooms
+
+
+def active_rooms():
+    return {room_id: room for room_id, room in get_catalog().items() if room.is_active}
+
+
+def invalidate_catalog():
+    """Drop this process's copy; other workers follow the version counter."""
+    global _catalog
+    _catalog = (None, {})
@@ -0,0 +1,204 @@
+"""
+Pub/sub hub for admin notifications, shared across processes.
+
+Booking signal handlers publish after commit by inserting a BookingEvent
+row, so events written by any web worker, management command or the email
+worker reach every stream. Each process runs one poller per event loop that
+reads rows past the last one it delivered and fans them out to the
+Server-Sent Events views in ``bookings.views``; a publish in the same
+process wakes its pollers at once. ``since`` reads the table, so a
+reconnecting client resumes from its ``Last-Event-ID`` on any worker.
+
+Ids come from the table and are not committed in order: a poller keeps
+re-reading ids it passed for ``EVENT_GAP_GRACE`` seconds so a slow commit
+is not skipped, and de-duplicates what it re-reads.
+"""
+import asyncio
+import hashlib
+import json
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import BookingEvent, EventStreamTicket
+
+# Seconds a poller keeps re-reading ids it has passed
+EVENT_GAP_GRACE = 10
+
+# Expired events are deleted on every PRUNE_EVERY-th publish
+PRUNE_EVERY = 100
+
+
+def _as_event(row):
+    return {
+        'id': row.id,
+        'type': row.type,
+        'timestamp': row.created_at.timestamp(),
+        'data': row.data,
+    }
+
+
+class EventHub:
+    def __init__(self, history=500, queue_size=100):
+        self._lock = threading.Lock()
+        self._history = history
+        self._subscribers = {}
+        # Event loop -> (poller task, asyncio.Event that wakes it)
+        self._pollers = {}
+        self._queue_size = queue_size
+
+    def publish(self, event_type, data):
+        """Store an event for every process and wake this process's pollers."""
+        row = BookingEvent.objects.create(type=event_type, data=data)
+        if row.id % PRUNE_EVERY == 0:
+            cutoff = timezone.now() - timedelta(seconds=settings.BOOKING_EVENT_TTL)
+            BookingEvent.objects.filter(created_at__lt=cutoff).delete()
+
+        with self._lock:
+            pollers = list(self._pollers.items())
+        for loop, (_, wake) in pollers:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                # The poller's event loop has shut down
+                with self._lock:
+                    self._pollers.pop(loop, None)
+        return _as_event(row)
+
+    def since(self, last_id=None):
+        """Return the latest stored events newer than ``last_id`` (all of them if None)."""
+        rows = BookingEvent.objects.order_by('-id')
+        if last_id is not None:
+            rows = rows.filter(id__gt=last_id)
+        return [_as_event(row) for row in reversed(rows[:self._history])]
+
+    @property
+    def last_id(self):
+        return BookingEvent.objects.aggregate(last=Max('id'))['last'] or 0
+
+    async def subscribe(self):
+        """Return an asyncio queue fed with events published from now on."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers[queue] = loop
+            running = loop in self._pollers
+        if not running:
+            floor = await sync_to_async(lambda: self.last_id)()
+            with self._lock:
+                if loop not in self._pollers:
+                    wake = asyncio.Event()
+                    self._pollers[loop] = (loop.create_task(self._poll(loop, wake, floor)), wake)
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    async def _poll(self, loop, wake, floor):
+        """Deliver new rows to the subscribers on ``loop`` until none are left."""
+        delivered = set()
+        # (time read, highest id seen) per read within the grace window
+        reads = []
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), settings.BOOKING_EVENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+            with self._lock:
+                queues = [queue for queue, owner in self._subscribers.items() if owner is loop]
+                if not queues:
+                    self._pollers.pop(loop, None)
+                    return
+
+            events = await sync_to_async(self._read_after)(floor)
+            now = time.monotonic()
+            for event in events:
+                if event['id'] in delivered:
+                    continue
+                delivered.add(event['id'])
+                for queue in queues:
+                    if not queue.full():
+                        queue.put_nowait(event)
+
+            if events:
+                reads.append((now, events[-1]['id']))
+            # Every id below what was read EVENT_GAP_GRACE ago has committed
+            while reads and now - reads[0][0] >= EVENT_GAP_GRACE:
+                floor = max(floor, reads.pop(0)[1])
+            delivered = {event_id for event_id in delivered if event_id > floor}
+
+    def _read_after(self, floor):
+        return [_as_event(row) for row in BookingEvent.objects.filter(id__gt=floor).order_by('id')]
+
+
+hub = EventHub()
+
+
+def _ticket_hash(raw):
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def issue_stream_ticket(user):
+    """
+    Return a new single-use ticket for opening the event stream as ``user``.
+
+    Only its hash is stored; expired tickets are cleared on the way.
+    """
+    now = timezone.now()
+    EventStreamTicket.objects.filter(expires_at__lt=now).delete()
+    raw = secrets.token_urlsafe(32)
+    EventStreamTicket.objects.create(
+        key=_ticket_hash(raw), user=user,
+        expires_at=now + timedelta(seconds=settings.EVENT_STREAM_TICKET_TTL),
+    )
+    return raw
+
+
+def redeem_stream_ticket(raw):
+    """Consume ``raw`` and return its user, or None if unknown, used or expired."""
+    ticket = (
+        EventStreamTicket.objects.select_related('user')
+        .filter(key=_ticket_hash(raw), expires_at__gte=timezone.now()).first()
+    )
+    # Whoever deletes the row redeems it; a replay finds nothing to delete
+    if ticket is None or EventStreamTicket.objects.filter(id=ticket.id).delete()[0] != 1:
+        return None
+    return ticket.user if ticket.user.is_active else None
+
+
+def parse_event_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_sse(event):
+    """Encode an event in the text/event-stream wire format."""
+    payload = json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+def booking_event_data(booking, previous_status=None):
+    data = {
+        'booking_id': booking.id,
+        'booking_reference': booking.booking_reference,
+        'full_name': booking.full_name,
+        'check_in': booking.check_in,
+        'check_out': booking.check_out,
+        'status': booking.status,
+        'total_price': str(booking.total_price),
+    }
+    if previous_status is not None:
+        data['previous_status'] = previous_status
+    return data
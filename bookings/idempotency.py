@@ -0,0 +1,150 @@
+"""
+``Idempotency-Key`` support for public POST endpoints.
+
+The first request with a key inserts a ``processing`` row; the unique
+constraint on (scope, key) makes concurrent duplicates lose that race and get
+a 409 instead of running the view a second time. The view then runs in the
+same transaction that stores its response, so a committed booking always
+comes with the response a retry will replay.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    # The scope already names the endpoint; the path is left out so aliases
+    # such as /room-bookings/create/ share keys
+    return hashlib.sha256(f'{request.method}|{body}'.encode()).hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Try to become the request that runs the view for ``key``.
+
+    Returns ``(record, None)`` when claimed, or ``(None, existing)`` when
+    another request owns the key.
+    """
+    now = timezone.now()
+    claim = {
+        'fingerprint': fingerprint,
+        'status': 'processing',
+        'status_code': None,
+        'response_body': None,
+        'locked_until': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE),
+        'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+    }
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(scope=scope, key=key, **claim), None
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if existing is None:
+        # Purged in between; start over
+        return _claim(scope, key, fingerprint)
+
+    expired = existing.expires_at <= now
+    abandoned = existing.status == 'processing' and existing.locked_until and existing.locked_until <= now
+    if expired or abandoned:
+        # Take over with a compare-and-set so only one retry wins
+        taken = IdempotencyKey.objects.filter(
+            pk=existing.pk, status=existing.status, expires_at=existing.expires_at
+        ).update(**claim)
+        if taken:
+            existing.refresh_from_db()
+            return existing, None
+        existing.refresh_from_db()
+    return None, existing
+
+
+def _replay(existing, fingerprint):
+    if existing.fingerprint != fingerprint:
+        return Response({
+            'success': False,
+            'message': f'This {HEADER} was already used for a different request.'
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if existing.status != 'completed':
+        response = Response({
+            'success': False,
+            'message': f'A request with this {HEADER} is still being processed.'
+        }, status=status.HTTP_409_CONFLICT)
+        response['Retry-After'] = '1'
+        return response
+    response = Response(existing.response_body, status=existing.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Make POSTs carrying an ``Idempotency-Key`` header safe to retry.
+
+    Responses below 500 are stored and replayed for ``IDEMPOTENCY_KEY_TTL``
+    seconds; server errors release the key so the client can try again.
+    Requests without the header are handled as before. Apply it inside
+    ``@api_view`` so ``request.data`` is parsed.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER, '').strip()
+            if request.method != 'POST' or not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({
+                    'success': False,
+                    'message': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            fingerprint = request_fingerprint(request)
+            record, existing = _claim(scope, key, fingerprint)
+            if record is None:
+                return _replay(existing, fingerprint)
+
+            try:
+                with transaction.atomic():
+                    response = view(request, *args, **kwargs)
+                    if response.status_code < 500:
+                        IdempotencyKey.objects.filter(pk=record.pk).update(
+                            status='completed',
+                            status_code=response.status_code,
+                            response_body=response.data,
+                            locked_until=None,
+                        )
+            except Exception:
+                record.delete()
+                raise
+            if response.status_code >= 500:
+                record.delete()
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired keys in batches; returns how many were removed."""
+    purged = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return purged
+        purged += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
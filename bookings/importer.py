@@ -0,0 +1,123 @@
+"""
+Bulk import of bookings (OTA feeds, legacy PMS migrations).
+
+Each batch is validated with one ``many=True`` serializer pass, references are
+allocated for the whole batch up front and rows are written with
+``bulk_create``. No notification emails are queued and no availability check
+is made: imported bookings are historical facts, not new requests.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedRoomBooking, RoomBooking, generate_booking_reference
+from .serializers import RoomBookingImportSerializer
+from .signals import sync_bulk_created
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def taken_references(references):
+    """Return the subset of ``references`` already used by a live or archived booking."""
+    return {
+        reference
+        for model in (RoomBooking, ArchivedRoomBooking)
+        for reference in model.objects.filter(booking_reference__in=references)
+        .values_list('booking_reference', flat=True)
+    }
+
+
+def allocate_references(count, exclude=()):
+    """Return ``count`` fresh references unused in the database and ``exclude``."""
+    references = set()
+    exclude = set(exclude)
+    while len(references) < count:
+        candidates = {generate_booking_reference() for _ in range(count - len(references))}
+        candidates -= exclude
+        candidates -= taken_references(candidates)
+        references |= candidates
+    return list(references)
+
+
+def _validate_batch(records):
+    """Return ``(valid_rows, errors)`` where valid_rows is ``[(index, data)]``."""
+    serializer = RoomBookingImportSerializer(data=records, many=True)
+    if serializer.is_valid():
+        return list(enumerate(serializer.validated_data)), []
+
+    errors = [
+        {'row': index, 'errors': row_errors}
+        for index, row_errors in enumerate(serializer.errors) if row_errors
+    ]
+    valid_indexes = [index for index, row_errors in enumerate(serializer.errors) if not row_errors]
+    if not valid_indexes:
+        return [], errors
+
+    # A many=True serializer exposes no validated data once any row fails;
+    # re-run it over the rows that passed.
+    serializer = RoomBookingImportSerializer(data=[records[i] for i in valid_indexes], many=True)
+    serializer.is_valid(raise_exception=True)
+    return list(zip(valid_indexes, serializer.validated_data)), errors
+
+
+def _import_batch(records, offset, dry_run, seen):
+    valid_rows, errors = _validate_batch(records)
+    for error in errors:
+        error['row'] += offset
+
+    # Check supplied references against the database and every batch so far
+    # at once; a dry run inserts nothing, so earlier batches are only in ``seen``
+    supplied = [data['booking_reference'] for _, data in valid_rows if data.get('booking_reference')]
+    taken = taken_references(supplied)
+    bookings = []
+    for index, data in valid_rows:
+        reference = data.get('booking_reference')
+        if reference and (reference in taken or reference in seen):
+            errors.append({'row': offset + index, 'errors': {
+                'booking_reference': ['A booking with this reference already exists.']
+            }})
+            continue
+        if reference:
+            seen.add(reference)
+        data.setdefault('booking_date', timezone.now())
+        bookings.append(RoomBooking(**data))
+
+    missing = [booking for booking in bookings if not booking.booking_reference]
+    for booking, reference in zip(missing, allocate_references(len(missing), exclude=seen)):
+        booking.booking_reference = reference
+
+    if bookings and not dry_run:
+        with transaction.atomic():
+            created = RoomBooking.objects.bulk_create(bookings)
+            sync_bulk_created(created)
+
+    errors.sort(key=lambda error: error['row'])
+    return len(bookings), errors
+
+
+def import_bookings(records, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Import an iterable of booking dicts in batches.
+
+    Valid rows are inserted one transaction per batch; invalid rows are
+    skipped and reported as ``{'row': index, 'errors': {...}}``.
+    """
+    # References used by this import, across batches
+    seen = set()
+    created = 0
+    errors = []
+    batch = []
+    offset = 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            batch_created, batch_errors = _import_batch(batch, offset, dry_run, seen)
+            created += batch_created
+            errors.extend(batch_errors)
+            offset += len(batch)
+            batch = []
+    if batch:
+        batch_created, batch_errors = _import_batch(batch, offset, dry_run, seen)
+        created += batch_created
+        errors.extend(batch_errors)
+
+    return {'created': created, 'errors': errors}
@@ -0,0 +1,107 @@
+"""
+BookingRoom line items.
+
+``selected_rooms`` is a JSON mapping, so nothing per room type can be
+aggregated in SQL. Every live booking also gets one BookingRoom row per room
+type with its quantity, average nightly rate and share of ``total_price``;
+revenue or nights sold per room type are then a GROUP BY over an index.
+
+The booking's total is split over its lines in proportion to what each room
+type costs for that stay on the rate calendar (falling back to the catalog
+price outside the calendar window), with the rounding remainder on the last
+line, so historical and discounted bookings still add up exactly.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+
+from .availability import BATCH_SIZE, normalize_rooms
+from .catalog import get_catalog
+from .models import BookingRoom
+from .pricing import CENT, PricingError, get_rate_calendar
+
+
+def _stay_prices(booking, rooms, nights, catalog, calendar):
+    """``{room_id: price of one room for the whole stay}``."""
+    try:
+        quote = calendar.quote(booking.check_in, booking.check_out, rooms, include_inactive=True)
+        return {line['room_id']: line['stay_price'] for line in quote['rooms']}
+    except PricingError:
+        return {
+            room_id: catalog[room_id].price_per_night * nights if room_id in catalog else Decimal('0')
+            for room_id in rooms
+        }
+
+
+def build_lines(booking, catalog, calendar):
+    """Return the unsaved BookingRoom rows for ``booking``."""
+    rooms = normalize_rooms(booking.selected_rooms)
+    if not rooms:
+        return []
+    nights = booking.nights
+    if booking.check_in and booking.check_out and booking.check_out > booking.check_in:
+        nights = (booking.check_out - booking.check_in).days
+    nights = max(nights or 0, 1)
+
+    prices = _stay_prices(booking, rooms, nights, catalog, calendar)
+    weights = {room_id: prices[room_id] * quantity for room_id, quantity in rooms.items()}
+    if not any(weights.values()):
+        weights = {room_id: Decimal(quantity) for room_id, quantity in rooms.items()}
+    total_weight = sum(weights.values())
+    total = Decimal(booking.total_price or 0)
+
+    lines = []
+    allocated = Decimal('0')
+    ordered = sorted(rooms.items())
+    for number, (room_id, quantity) in enumerate(ordered):
+        if number == len(ordered) - 1:
+            line_total = total - allocated
+        else:
+            line_total = (total * weights[room_id] / total_weight).quantize(CENT)
+        allocated += line_total
+        lines.append(BookingRoom(
+            booking_id=booking.pk,
+            room_type_id=room_id,
+            quantity=quantity,
+            nightly_rate=(line_total / (quantity * nights)).quantize(CENT),
+            line_total=line_total,
+        ))
+    return lines
+
+
+def write_lines(bookings, replace=True):
+    """
+    (Re)write the line items of saved ``bookings`` with one delete and one
+    insert per batch. Pass ``replace=False`` for bookings that have none yet.
+    """
+    bookings = list(bookings)
+    if not bookings:
+        return
+    catalog = get_catalog()
+    calendar = get_rate_calendar()
+    for start in range(0, len(bookings), BATCH_SIZE):
+        batch = bookings[start:start + BATCH_SIZE]
+        if replace:
+            BookingRoom.objects.filter(booking_id__in=[booking.pk for booking in batch]).delete()
+        BookingRoom.objects.bulk_create(
+            [line for booking in batch for line in build_lines(booking, catalog, calendar)],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def room_type_totals(bookings):
+    """
+    Per room type figures for ``bookings`` (a RoomBooking queryset), as one
+    GROUP BY over the line items.
+    """
+    return (
+        BookingRoom.objects.filter(booking__in=bookings)
+        .values('room_type')
+        .annotate(
+            bookings=Count('id'),
+            rooms_sold=Sum('quantity'),
+            nights_sold=Sum(F('quantity') * F('booking__nights')),
+            revenue=Sum('line_total'),
+        )
+        .order_by('room_type')
+    )
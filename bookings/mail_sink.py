@@ -0,0 +1,66 @@
+"""
+A tiny SMTP server that accepts and discards mail.
+
+Good enough for Django's SMTP backend (no TLS, no auth), so the outbox worker
+can be exercised and benchmarked without talking to Gmail.
+"""
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 localhost SMTP sink ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+
+            if command.startswith('EHLO'):
+                self.wfile.write(b'250-localhost\r\n250 8BITMIME\r\n')
+            elif command.startswith('DATA'):
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    size += len(data_line)
+                self.server.record_message(size)
+                self.reply('250 OK: queued')
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            else:
+                # HELO, MAIL FROM, RCPT TO, RSET, NOOP
+                self.reply('250 OK')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server that counts the messages it receives."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=1025):
+        super().__init__((host, port), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record_message(self, size):
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+
+    def start(self):
+        """Serve from a background thread; returns the thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
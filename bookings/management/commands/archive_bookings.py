@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.archive import DEFAULT_CHUNK_SIZE, archivable, archive_bookings
+
+
+class Command(BaseCommand):
+    help = 'Move old completed and cancelled bookings to the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+                            help='Archive bookings whose check-out is at least this many days ago')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Bookings moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now().date() - timedelta(days=options['older_than_days'])
+
+        if options['dry_run']:
+            count = archivable(cutoff).count()
+            self.stdout.write(f'{count} bookings with check-out before {cutoff} would be archived')
+            return
+
+        total = 0
+        for moved in archive_bookings(cutoff, options['chunk_size']):
+            total += moved
+            self.stdout.write(f'Archived {moved} bookings ({total} so far)')
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} bookings with check-out before {cutoff}'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bookings.line_items import write_lines
+from bookings.models import RoomBooking
+
+
+class Command(BaseCommand):
+    help = 'Fill the BookingRoom line items from selected_rooms for existing bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Bookings written per transaction')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rewrite every booking, not just the ones without line items')
+
+    def handle(self, *args, **options):
+        bookings = RoomBooking.objects.only('id', 'check_in', 'check_out', 'selected_rooms', 'total_price', 'nights')
+        if not options['rebuild']:
+            bookings = bookings.filter(rooms__isnull=True)
+
+        # Walk the primary key so each chunk is an index range, and a stopped
+        # run picks up where it left off
+        last_id = 0
+        total = 0
+        while True:
+            chunk = list(bookings.filter(id__gt=last_id).order_by('id')[:options['chunk_size']])
+            if not chunk:
+                break
+            with transaction.atomic():
+                write_lines(chunk, replace=options['rebuild'])
+            last_id = chunk[-1].id
+            total += len(chunk)
+            self.stdout.write(f'Wrote line items for {total} bookings')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {total} bookings'))
@@ -0,0 +1,155 @@
+import json
+import logging
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from bookings.availability import OCCUPYING_STATUSES, footprint
+from bookings.catalog import invalidate_catalog
+from bookings.models import RoomBooking, RoomNightOccupancy, RoomType
+from bookings.pricing import invalidate_rate_calendar
+from core.benchmarking import percentile, scratch_database
+
+ROOM_TYPE = 1
+STAY_NIGHTS = 3
+
+
+class Command(BaseCommand):
+    help = 'Hammer booking creation from several threads and check nothing is overbooked'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--rooms', type=int, default=5, help='Rooms of the contended type')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        old_test_name = test_settings.get('NAME')
+        scratch_file = None
+        if connection.vendor == 'sqlite' and not old_test_name:
+            # An in-memory test database cannot be written from several threads
+            scratch_file = tempfile.NamedTemporaryFile(suffix='.sqlite3')
+            test_settings['NAME'] = scratch_file.name
+
+        # Every lost race is logged as a 409 warning otherwise
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        results = []
+        try:
+            with scratch_database(), override_settings(ALLOWED_HOSTS=['*']):
+                RoomType.objects.filter(pk=ROOM_TYPE).update(total_rooms=options['rooms'])
+                for scenario in ('contended', 'disjoint'):
+                    results.append(self.run(scenario, options['threads'], options['requests']))
+        finally:
+            test_settings['NAME'] = old_test_name
+            if scratch_file:
+                scratch_file.close()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['scenario']:<10} {result['requests']} requests on {result['threads']} threads "
+                f"in {result['seconds']:.2f}s  ->  {result['requests_per_second']:.0f} req/s  "
+                f"(p50 {result['p50_ms']:.1f}ms, p95 {result['p95_ms']:.1f}ms)  "
+                f"created={result['created']} conflicts={result['conflicts']} errors={result['errors']}  "
+                f"overbooked_nights={result['overbooked_nights']} drift={result['occupancy_drift']}"
+            )
+
+    def run(self, scenario, threads, requests):
+        RoomBooking.objects.all().delete()
+        RoomNightOccupancy.objects.all().delete()
+        cache.clear()
+        invalidate_catalog()
+        invalidate_rate_calendar()
+
+        first_night = timezone.now().date() + timedelta(days=7)
+        local = threading.local()
+        lock = threading.Lock()
+        statuses = Counter()
+        latencies = []
+
+        def book(number):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            # Contended: everyone wants the same nights. Disjoint: nobody overlaps.
+            offset = 0 if scenario == 'contended' else number * STAY_NIGHTS
+            check_in = first_night + timedelta(days=offset)
+            payload = {
+                'full_name': f'Bench Guest {number}',
+                'email': f'guest{number}@example.com',
+                'phone': '9876500000',
+                'check_in': check_in.isoformat(),
+                'check_out': (check_in + timedelta(days=STAY_NIGHTS)).isoformat(),
+                'selected_rooms': {str(ROOM_TYPE): 1},
+                'nights': STAY_NIGHTS,
+            }
+            started = time.perf_counter()
+            response = local.client.post('/api/room-bookings/', payload, content_type='application/json')
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] += 1
+                latencies.append(elapsed)
+
+        def worker(numbers):
+            try:
+                for number in numbers:
+                    book(number)
+            finally:
+                connections.close_all()
+
+        if scenario == 'disjoint':
+            # Keep every stay inside the pricing window
+            requests = min(requests, 300 // STAY_NIGHTS)
+        chunks = [range(start, requests, threads) for start in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, chunks))
+        seconds = time.perf_counter() - started
+
+        return {
+            'scenario': scenario,
+            'threads': threads,
+            'requests': requests,
+            'seconds': round(seconds, 4),
+            'requests_per_second': round(requests / seconds, 1) if seconds else None,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'created': statuses[201],
+            'conflicts': statuses[409],
+            'errors': sum(count for code, count in statuses.items() if code not in (201, 409)),
+            'overbooked_nights': self.overbooked_nights(),
+            'occupancy_drift': self.occupancy_drift(),
+        }
+
+    def overbooked_nights(self):
+        """Room-nights holding more bookings than the room type has rooms."""
+        inventory = dict(RoomType.objects.values_list('id', 'total_rooms'))
+        held = Counter()
+        for booking in RoomBooking.objects.filter(status__in=OCCUPYING_STATUSES):
+            held.update(footprint(booking.check_in, booking.check_out, booking.selected_rooms, booking.status))
+        return sum(1 for (room_id, night), booked in held.items() if booked > inventory.get(room_id, 0))
+
+    def occupancy_drift(self):
+        """Room-nights where the occupancy table disagrees with the bookings."""
+        held = Counter()
+        for booking in RoomBooking.objects.all():
+            held.update(footprint(booking.check_in, booking.check_out, booking.selected_rooms, booking.status))
+        stored = {
+            (room_id, night): booked
+            for room_id, night, booked in RoomNightOccupancy.objects.values_list('room_type', 'date', 'booked')
+        }
+        keys = set(held) | {key for key, booked in stored.items() if booked}
+        return sum(1 for key in keys if held.get(key, 0) != stored.get(key, 0))
@@ -0,0 +1,79 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from bookings.mail_sink import SMTPSink
+from bookings.models import OutboundEmail
+from bookings.outbox import deliver_batch
+from core.benchmarking import scratch_database
+
+
+class Command(BaseCommand):
+    help = 'Measure outbox delivery throughput against a local SMTP sink'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000)
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 50, 200])
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(port=0)
+        sink.start()
+        email_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=sink.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+
+        results = []
+        try:
+            with scratch_database(), email_settings:
+                for batch_size in options['batch_sizes']:
+                    results.append(self.run(options['messages'], batch_size, sink))
+        finally:
+            sink.shutdown()
+            sink.server_close()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"batch={result['batch_size']:>4}  {result['messages']} messages in "
+                f"{result['seconds']:.2f}s  ->  {result['messages_per_second']:.0f} msg/s"
+            )
+
+    def run(self, messages, batch_size, sink):
+        OutboundEmail.objects.all().delete()
+        html = '<p>' + 'Heritage Hotel booking details. ' * 150 + '</p>'
+        OutboundEmail.objects.bulk_create([
+            OutboundEmail(
+                subject=f'Benchmark booking {number}',
+                body=html,
+                html_body=html,
+                from_email='bench@localhost',
+                recipients=['admin@localhost'],
+            )
+            for number in range(messages)
+        ], batch_size=500)
+
+        received_before = sink.messages
+        started = time.perf_counter()
+        while deliver_batch(batch_size) != (0, 0):
+            pass
+        seconds = time.perf_counter() - started
+
+        delivered = sink.messages - received_before
+        return {
+            'batch_size': batch_size,
+            'messages': delivered,
+            'seconds': round(seconds, 4),
+            'messages_per_second': round(delivered / seconds, 1) if seconds else None,
+            'unsent': OutboundEmail.objects.exclude(status='sent').count(),
+        }
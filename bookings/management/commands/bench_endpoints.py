@@ -0,0 +1,268 @@
+import io
+import json
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bookings.models import RoomBooking
+from core.benchmarking import percentile, scratch_database
+from menu.models import DailySpecial, MenuItem
+
+# URL names that cannot be driven with a plain GET loop
+SKIP = {
+    'booking_events': 'endless event stream',
+}
+# Namespaces left out entirely (HTML admin pages)
+SKIP_NAMESPACES = {'admin'}
+
+
+def sample_kwargs():
+    """Path arguments for URL patterns that need them, keyed by URL name."""
+    booking = RoomBooking.objects.order_by('id').only('id', 'booking_reference').first()
+    item = MenuItem.objects.order_by('id').only('id').first()
+    special = DailySpecial.objects.order_by('id').only('id').first()
+    samples = {}
+    if booking:
+        for name in ('update_booking_status', 'delete_booking'):
+            samples[name] = {'booking_id': booking.id}
+        samples['get_room_booking'] = {'booking_reference': booking.booking_reference}
+    if item:
+        samples['menuitem-detail'] = {'pk': item.id}
+    if special:
+        for name in ('dailyspecial-detail', 'dailyspecial-activate', 'dailyspecial-deactivate'):
+            samples[name] = {'pk': special.id}
+    return samples
+
+
+def sample_query():
+    """Query strings that make an endpoint do its real work."""
+    check_in = timezone.now().date() + timedelta(days=30)
+    return {
+        'search_bookings': {'q': 'Menon'},
+        'export_bookings': {'type': 'ndjson'},
+        'room_availability': {
+            'check_in': check_in.isoformat(),
+            'check_out': (check_in + timedelta(days=3)).isoformat(),
+        },
+    }
+
+
+def iter_patterns(patterns, namespace=None):
+    """Yield ``(url_name, group_names)`` for every named pattern under ``patterns``."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIP_NAMESPACES:
+                continue
+            yield from iter_patterns(pattern.url_patterns, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, set(pattern.pattern.regex.groupindex)
+
+
+def endpoints(samples):
+    """Return ``([(name, path)], [{'endpoint', 'reason'}])`` for every URL in the project."""
+    found, skipped, seen = [], [], set()
+    for name, groups in iter_patterns(get_resolver().url_patterns):
+        if 'format' in groups or name in seen:
+            # DRF's ``.json`` suffix duplicates of router URLs
+            continue
+        seen.add(name)
+        if name in SKIP:
+            skipped.append({'endpoint': name, 'reason': SKIP[name]})
+        elif groups and name not in samples:
+            skipped.append({'endpoint': name, 'reason': 'no sample path arguments'})
+        else:
+            found.append((name, reverse(name, kwargs=samples.get(name))))
+    return found, skipped
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every GET endpoint in core.urls through the test client at several data sizes and '
+        'report p50/p95/p99 latency, query counts and peak memory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                            help='Numbers of bookings to measure at')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--menu-items', type=int, default=200)
+        parser.add_argument('--specials', type=int, default=1000)
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+        parser.add_argument('--compare', help='JSON results of an earlier run to check for regressions')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='p95 ratio over the baseline that counts as a regression')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        # 4xx/5xx responses are part of the report, not log noise
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'repeat': options['repeat'],
+                'started_at': timezone.now().isoformat(),
+            },
+            'results': [],
+            'skipped': [],
+        }
+        # DEBUG would log every query and cap what CaptureQueriesContext sees
+        with scratch_database(), override_settings(ALLOWED_HOSTS=['*'], DEBUG=False):
+            call_command('seed_menu', items=options['menu_items'], specials=options['specials'], stdout=io.StringIO())
+            user = get_user_model().objects.create_user(
+                username='bench', email='bench@example.com', password='bench-pass-123',
+                first_name='Bench', last_name='Admin', is_staff=True,
+            )
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            skipped = {}
+
+            for size in sorted(set(options['sizes'])):
+                existing = RoomBooking.objects.count()
+                if size > existing:
+                    call_command('seed_bookings', size - existing, seed=size, stdout=io.StringIO())
+                found, unreachable = endpoints(sample_kwargs())
+                skipped.update((entry['endpoint'], entry['reason']) for entry in unreachable)
+                for name, path in found:
+                    result = self.measure(client, name, path, sample_query().get(name, {}), options['repeat'])
+                    if result['status'] == 405:
+                        skipped[name] = 'no GET handler'
+                        continue
+                    report['results'].append({'size': size, **result})
+            report['skipped'] = [{'endpoint': name, 'reason': reason} for name, reason in sorted(skipped.items())]
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        else:
+            self.print_table(report)
+        if baseline is not None:
+            self.compare(baseline, report, options['threshold'])
+
+    def measure(self, client, name, path, query, repeat):
+        def get():
+            response = client.get(path, query)
+            # Streaming exports only do their work while being read
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, len(body)
+
+        cache.clear()
+        # Each request empties the query log as it starts; empty it first so
+        # CaptureQueriesContext's starting offset stays valid
+        reset_queries()
+        with CaptureQueriesContext(connection) as cold:
+            started = time.perf_counter()
+            response, size = get()
+            cold_seconds = time.perf_counter() - started
+        # Read from the live query log, so count before it is reset again
+        cold_queries = len(cold)
+
+        latencies = []
+        queries = 0
+        for _ in range(repeat):
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                get()
+                latencies.append(time.perf_counter() - started)
+            queries = max(queries, len(captured))
+
+        # Measured apart from the timings: tracing slows Python down
+        cache.clear()
+        tracemalloc.start()
+        try:
+            get()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'endpoint': name,
+            'path': path,
+            'status': response.status_code,
+            'bytes': size,
+            'cold_ms': round(cold_seconds * 1000, 2),
+            'cold_queries': cold_queries,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'queries': queries,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def print_table(self, report):
+        self.stdout.write(
+            f"{'size':>8}  {'endpoint':<32} {'status':>6} {'cold':>9} {'p50':>9} {'p95':>9} {'p99':>9} "
+            f"{'queries':>9} {'peak KB':>9}"
+        )
+        for result in report['results']:
+            self.stdout.write(
+                f"{result['size']:>8}  {result['endpoint']:<32} {result['status']:>6} "
+                f"{result['cold_ms']:>7.1f}ms {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+                f"{result['p99_ms']:>7.1f}ms {result['cold_queries']:>4}/{result['queries']:<4} "
+                f"{result['peak_memory_kb']:>9.0f}"
+            )
+        for skipped in report['skipped']:
+            self.stdout.write(f"skipped {skipped['endpoint']}: {skipped['reason']}")
+
+    def compare(self, baseline, report, threshold):
+        previous = {(result['size'], result['endpoint']): result for result in baseline.get('results', [])}
+        regressions = []
+        for result in report['results']:
+            before = previous.get((result['size'], result['endpoint']))
+            if before is None:
+                continue
+            if before['p95_ms'] and result['p95_ms'] / before['p95_ms'] > threshold:
+                regressions.append(
+                    f"{result['endpoint']} @ {result['size']}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms"
+                )
+            if result['cold_queries'] > before['cold_queries'] or result['queries'] > before['queries']:
+                regressions.append(
+                    f"{result['endpoint']} @ {result['size']}: queries "
+                    f"{before['cold_queries']}/{before['queries']} -> {result['cold_queries']}/{result['queries']}"
+                )
+
+        commit = baseline.get('meta', {}).get('commit') or 'the baseline'
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {commit}'))
+            return
+        for line in regressions:
+            self.stdout.write(self.style.WARNING(line))
+        raise CommandError(f'{len(regressions)} regressions against {commit}')
@@ -0,0 +1,86 @@
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from bookings.models import RoomBooking
+from bookings.serializers import BookingListSerializer, RoomBookingSerializer
+from core.benchmarking import scratch_database
+
+
+class Command(BaseCommand):
+    help = 'Compare RoomBookingSerializer(many=True) with BookingListSerializer on large lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the best one is reported')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        results = []
+        with scratch_database():
+            for rows in sorted(options['rows']):
+                self.fill(rows)
+                results.append(self.run(rows, options['repeat']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['rows']:>7} rows  model serializer {result['model_serializer_seconds']:.3f}s  "
+                f"list serializer {result['list_serializer_seconds']:.3f}s  ->  {result['speedup']:.1f}x"
+            )
+
+    def fill(self, rows):
+        """Top the table up to ``rows`` bookings."""
+        existing = RoomBooking.objects.count()
+        check_in = date.today() + timedelta(days=30)
+        RoomBooking.objects.bulk_create([
+            RoomBooking(
+                full_name=f'Bench Guest {number}',
+                email=f'guest{number}@example.com',
+                phone='9876500000',
+                special_requests='Late arrival' if number % 3 else None,
+                check_in=check_in + timedelta(days=number % 300),
+                check_out=check_in + timedelta(days=number % 300 + 2),
+                adults=2,
+                children=number % 3,
+                selected_rooms={str(number % 5 + 1): 1},
+                total_price=Decimal('17000.00'),
+                nights=2,
+                booking_reference=f'BENCH{number:09d}',
+            )
+            for number in range(existing, rows)
+        ], batch_size=2000)
+
+    def run(self, rows, repeat):
+        queryset = RoomBooking.objects.order_by('-booking_date', '-id')[:rows]
+        renderer = JSONRenderer()
+
+        def model_serializer():
+            return renderer.render(RoomBookingSerializer(queryset, many=True).data)
+
+        def list_serializer():
+            return renderer.render(BookingListSerializer(BookingListSerializer.values(queryset)).data)
+
+        if model_serializer() != list_serializer():
+            raise AssertionError('BookingListSerializer output differs from RoomBookingSerializer')
+
+        slow = min(self.time(model_serializer) for _ in range(repeat))
+        fast = min(self.time(list_serializer) for _ in range(repeat))
+        return {
+            'rows': rows,
+            'model_serializer_seconds': round(slow, 4),
+            'list_serializer_seconds': round(fast, 4),
+            'speedup': round(slow / fast, 2) if fast else None,
+        }
+
+    @staticmethod
+    def time(func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
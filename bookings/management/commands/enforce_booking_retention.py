@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.models import ArchivedRoomBooking, OutboundEmail, RoomBooking
+from bookings.retention import DEFAULT_CHUNK_SIZE, MODES, enforce_retention, orphaned_emails, retention_candidates
+
+
+class Command(BaseCommand):
+    help = 'Anonymize or purge the guest data of bookings that ended long ago, live and archived'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='anonymize',
+                            help='Strip the personal fields (default) or delete the bookings')
+        parser.add_argument('--older-than-days', type=int, default=settings.BOOKING_RETENTION_DAYS,
+                            help='Act on bookings whose check-out is at least this many days ago')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Bookings handled per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be changed')
+
+    def handle(self, *args, **options):
+        mode = options['mode']
+        cutoff = timezone.now().date() - timedelta(days=options['older_than_days'])
+        verb = 'anonymized' if mode == 'anonymize' else 'purged'
+
+        if options['dry_run']:
+            for model in (RoomBooking, ArchivedRoomBooking):
+                count = retention_candidates(model, cutoff, mode).count()
+                self.stdout.write(
+                    f'{count} {model._meta.verbose_name_plural.lower()} with check-out before {cutoff} '
+                    f'would be {verb}'
+                )
+            emails = (
+                OutboundEmail.objects.filter(booking__in=retention_candidates(RoomBooking, cutoff, mode)).count()
+                + orphaned_emails(cutoff).count()
+            )
+            self.stdout.write(f'{emails} outbound emails would be deleted')
+            return
+
+        total = 0
+        for model, count in enforce_retention(mode, cutoff, options['chunk_size']):
+            if model is OutboundEmail:
+                self.stdout.write(f'Deleted {count} outbound emails')
+                continue
+            total += count
+            self.stdout.write(f'{verb.capitalize()} {count} {model._meta.verbose_name_plural.lower()} ({total} so far)')
+        self.stdout.write(self.style.SUCCESS(f'{verb.capitalize()} {total} bookings with check-out before {cutoff}'))
@@ -0,0 +1,65 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.importer import DEFAULT_BATCH_SIZE, import_bookings
+
+
+def read_json(handle):
+    records = json.load(handle)
+    if isinstance(records, dict):
+        records = records.get('bookings', [])
+    yield from records
+
+
+def read_ndjson(handle):
+    for line in handle:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(handle):
+    # Same layout as the CSV export: selected_rooms is a JSON column
+    for row in csv.DictReader(handle):
+        row['selected_rooms'] = json.loads(row.get('selected_rooms') or '{}')
+        row.pop('id', None)
+        yield {key: value for key, value in row.items() if value != ''}
+
+
+READERS = {
+    'json': read_json,
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class Command(BaseCommand):
+    help = 'Bulk import bookings from a JSON, NDJSON or CSV file without sending emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=READERS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, insert nothing')
+        parser.add_argument('--max-errors', type=int, default=20, help='Row errors to print')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in READERS:
+            raise CommandError(f"Cannot tell the format of {options['path']}; pass --format")
+
+        with open(options['path'], newline='', encoding='utf-8') as handle:
+            result = import_bookings(
+                READERS[file_format](handle),
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+
+        for error in result['errors'][:options['max_errors']]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['created']} bookings, rejected {len(result['errors'])}"
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+                            help='Emails sent per SMTP connection')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new emails instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep between polls when idle (with --loop)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Outbox drained: {total_sent} sent, {total_failed} failed'))
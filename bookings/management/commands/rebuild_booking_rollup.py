@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bookings.rollup import rebuild_rollup, rollup_drift
+from core.versioning import bump_version
+
+
+class Command(BaseCommand):
+    help = 'Compare the daily booking rollup with the bookings and correct any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted days without fixing them')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            drift = rollup_drift()
+            for (day, status), (stored, expected) in sorted(drift.items()):
+                self.stdout.write(f'{day} {status}: stored {self.format(stored)}, expected {self.format(expected)}')
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} rollup rows drifted'))
+            return
+
+        with transaction.atomic():
+            fixed = rebuild_rollup()
+            if fixed:
+                transaction.on_commit(lambda: bump_version('bookings'))
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} rollup rows'))
+
+    def format(self, values):
+        bookings, revenue, adults, children = values
+        return f'{bookings} bookings / {revenue} revenue / {adults} adults / {children} children'
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from bookings.mail_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP server that accepts and discards all mail'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['host'], options['port'])
+        self.stdout.write(
+            f"SMTP sink listening on {options['host']}:{sink.port} "
+            f"(set EMAIL_HOST/EMAIL_PORT accordingly and EMAIL_USE_TLS=False)"
+        )
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server_close()
+            self.stdout.write(f'Received {sink.messages} messages ({sink.bytes} bytes)')
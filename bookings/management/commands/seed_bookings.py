@@ -0,0 +1,126 @@
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.catalog import active_rooms
+from bookings.importer import allocate_references
+from bookings.models import RoomBooking
+from bookings.signals import TRACKED_FIELDS, suspend_booking_signals, sync_bulk_created, sync_bulk_deleted
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Anaya', 'Arjun', 'Asha', 'Deepa', 'Farhan', 'Ishaan', 'Kavya', 'Meera',
+    'Nikhil', 'Priya', 'Rahul', 'Rohan', 'Sana', 'Tara', 'Vikram', 'Zoya', 'Emma', 'Liam',
+    'Olivia', 'Noah', 'Sophie', 'Lucas', 'Hannah', 'Mateo', 'Yuki', 'Chen', 'Amara', 'Omar',
+]
+LAST_NAMES = [
+    'Menon', 'Sharma', 'Iyer', 'Nair', 'Patel', 'Reddy', 'Kapoor', 'Das', 'Khan', 'Singh',
+    'Fernandes', 'Joshi', 'Bose', 'Smith', 'Mueller', 'Rossi', 'Garcia', 'Tanaka', 'Wang', 'Okafor',
+]
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'example.com']
+SPECIAL_REQUESTS = [
+    'Late check-in, around 11 pm', 'Early check-in if possible', 'Airport pickup please',
+    'Ground floor room', 'Extra bed for a child', 'Celebrating an anniversary', 'Vegetarian meals only',
+    'Quiet room away from the lift',
+]
+# Length of stay, mostly short
+NIGHT_WEIGHTS = {1: 25, 2: 30, 3: 20, 4: 10, 5: 6, 7: 6, 10: 2, 14: 1}
+CLEAR_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Insert realistic synthetic bookings for benchmarks and local testing. Occupancy is kept in '
+        'step with the bookings but room limits are not enforced, so large seeds overbook.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Bookings to insert')
+        parser.add_argument('--days-back', type=int, default=365, help='Earliest check-in, in days before today')
+        parser.add_argument('--days-ahead', type=int, default=180, help='Latest check-in, in days after today')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Bookings inserted per transaction')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same guests and stays')
+        parser.add_argument('--clear', action='store_true', help='Delete all live bookings (and the rooms they hold) first')
+
+    def handle(self, *args, **options):
+        rooms = active_rooms()
+        if not rooms:
+            raise CommandError('There are no active room types to book')
+        if options['clear']:
+            self.clear()
+
+        rng = random.Random(options['seed'])
+        today = timezone.now().date()
+        started = time.perf_counter()
+        created = 0
+        while created < options['count']:
+            size = min(options['batch_size'], options['count'] - created)
+            bookings = [
+                self.make_booking(rng, rooms, today, options['days_back'], options['days_ahead'])
+                for _ in range(size)
+            ]
+            for booking, reference in zip(bookings, allocate_references(size)):
+                booking.booking_reference = reference
+            with transaction.atomic():
+                sync_bulk_created(RoomBooking.objects.bulk_create(bookings))
+            created += size
+            self.stdout.write(f'Inserted {created}/{options["count"]} bookings')
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {created} bookings in {seconds:.1f}s ({created / seconds if seconds else 0:.0f}/s)'
+        ))
+
+    def clear(self):
+        # Archived bookings stay, and so do the nights and rollup rows they
+        # account for: only the live bookings' share is taken away
+        with transaction.atomic():
+            bookings = RoomBooking.objects.only(*TRACKED_FIELDS).iterator(chunk_size=CLEAR_CHUNK_SIZE)
+            while chunk := list(itertools.islice(bookings, CLEAR_CHUNK_SIZE)):
+                sync_bulk_deleted(chunk)
+            with suspend_booking_signals():
+                RoomBooking.objects.all().delete()
+
+    def make_booking(self, rng, rooms, today, days_back, days_ahead):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        nights = rng.choices(list(NIGHT_WEIGHTS), weights=list(NIGHT_WEIGHTS.values()))[0]
+        check_in = today + timedelta(days=rng.randint(-days_back, days_ahead))
+        check_out = check_in + timedelta(days=nights)
+
+        selected = {}
+        for room in rng.sample(list(rooms.values()), k=min(len(rooms), rng.choices([1, 2], weights=[85, 15])[0])):
+            selected[str(room.id)] = rng.choices([1, 2, 3], weights=[80, 15, 5])[0]
+        nightly = sum(rooms[int(room_id)].price_per_night * quantity for room_id, quantity in selected.items())
+
+        if check_out <= today:
+            status = rng.choices(['completed', 'cancelled'], weights=[85, 15])[0]
+        else:
+            status = rng.choices(['pending', 'confirmed', 'cancelled'], weights=[30, 60, 10])[0]
+
+        # Booked some time before arrival, never in the future
+        booked_on = check_in - timedelta(days=rng.randint(0, 120))
+        booking_date = timezone.make_aware(datetime.combine(
+            min(booked_on, today), datetime.min.time()
+        )) + timedelta(seconds=rng.randint(0, 86399))
+
+        return RoomBooking(
+            full_name=f'{first} {last}',
+            email=f'{first}.{last}{rng.randint(1, 999)}@{rng.choice(EMAIL_DOMAINS)}'.lower(),
+            phone=f'{rng.choice("6789")}{rng.randint(0, 999999999):09d}',
+            special_requests=rng.choice(SPECIAL_REQUESTS) if rng.random() < 0.25 else None,
+            check_in=check_in,
+            check_out=check_out,
+            adults=rng.randint(1, 3),
+            children=rng.choices([0, 1, 2], weights=[70, 20, 10])[0],
+            selected_rooms=selected,
+            total_price=(nightly * nights).quantize(Decimal('0.01')),
+            nights=nights,
+            booking_date=min(booking_date, timezone.now()),
+            booking_reference='',
+            status=status,
+        )
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_occupancy(apps, schema_editor):
+    RoomBooking = apps.get_model('bookings', 'RoomBooking')
+    RoomNightOccupancy = apps.get_model('bookings', 'RoomNightOccupancy')
+
+    booked = {}
+    bookings = RoomBooking.objects.exclude(status='cancelled').values_list(
+        'check_in', 'check_out', 'selected_rooms'
+    )
+    for check_in, check_out, selected_rooms in bookings.iterator(chunk_size=2000):
+        for room_id, quantity in (selected_rooms or {}).items():
+            try:
+                room_id, quantity = int(room_id), int(quantity)
+            except (TypeError, ValueError):
+                continue
+            for offset in range((check_out - check_in).days):
+                key = (room_id, check_in + timedelta(days=offset))
+                booked[key] = booked.get(key, 0) + quantity
+
+    RoomNightOccupancy.objects.bulk_create(
+        [
+            RoomNightOccupancy(room_type=room_id, date=night, booked=quantity)
+            for (room_id, night), quantity in booked.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNightOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.PositiveIntegerField()),
+                ('date', models.DateField()),
+                ('booked', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Room Night Occupancy',
+                'verbose_name_plural': 'Room Night Occupancy',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomnightoccupancy',
+            constraint=models.UniqueConstraint(fields=('date', 'room_type'), name='unique_room_night'),
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
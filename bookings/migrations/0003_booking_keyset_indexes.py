@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_room_night_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['booking_date', 'id'], name='booking_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['check_in', 'id'], name='booking_check_in_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['check_out', 'id'], name='booking_check_out_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from bookings.search import install_search_index
+
+    install_search_index(schema_editor.connection, rebuild=True)
+
+
+def uninstall(apps, schema_editor):
+    from bookings.search import uninstall_search_index
+
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:22
+
+from django.db import migrations, models
+
+
+# Room data previously hard-coded in RoomBooking.room_details (same as in frontend)
+INITIAL_ROOM_TYPES = [
+    (1, "The President's Chamber — Deluxe", 8500),
+    (2, "The Magistrate's Chamber — Executive", 10500),
+    (3, "The Collector's Chamber — Deluxe", 7500),
+    (4, "The Residency Room — Executive", 9500),
+    (5, "The Plantation Room — Deluxe", 6500),
+]
+
+
+def seed_room_types(apps, schema_editor):
+    RoomType = apps.get_model('bookings', 'RoomType')
+    RoomType.objects.bulk_create([
+        RoomType(id=room_id, name=name, price_per_night=price, total_rooms=5)
+        for room_id, name, price in INITIAL_ROOM_TYPES
+    ])
+    if schema_editor.connection.vendor == 'postgresql':
+        # Explicit ids do not advance the identity sequence
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence('bookings_roomtype', 'id'), "
+                "(SELECT MAX(id) FROM bookings_roomtype))"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150)),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_rooms', models.PositiveIntegerField(default=1)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Room Type',
+                'verbose_name_plural': 'Room Types',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_room_types, migrations.RunPython.noop),
+    ]
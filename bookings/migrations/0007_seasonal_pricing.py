@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_room_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LengthOfStayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_nights', models.PositiveIntegerField(unique=True)),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5)),
+            ],
+            options={
+                'verbose_name': 'Length of Stay Discount',
+                'verbose_name_plural': 'Length of Stay Discounts',
+                'ordering': ['min_nights'],
+            },
+        ),
+        migrations.AddField(
+            model_name='roomtype',
+            name='weekend_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Nightly price for Friday and Saturday nights; defaults to price_per_night', max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='SeasonalRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('weekend_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seasonal_rates', to='bookings.roomtype')),
+            ],
+            options={
+                'verbose_name': 'Seasonal Rate',
+                'verbose_name_plural': 'Seasonal Rates',
+                'ordering': ['start_date', 'id'],
+            },
+        ),
+    ]
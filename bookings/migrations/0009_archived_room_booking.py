@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRoomBooking',
+            fields=[
+                ('full_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('special_requests', models.TextField(blank=True, null=True)),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('adults', models.PositiveIntegerField(default=1)),
+                ('children', models.PositiveIntegerField(default=0)),
+                ('selected_rooms', models.JSONField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('nights', models.PositiveIntegerField()),
+                ('booking_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('booking_reference', models.CharField(blank=True, max_length=20, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Archived Room Booking',
+                'verbose_name_plural': 'Archived Room Bookings',
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['booking_date', 'id'], name='archived_date_id_idx'), models.Index(fields=['check_in', 'id'], name='archived_check_in_id_idx'), models.Index(fields=['check_out', 'id'], name='archived_check_out_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_archived_room_booking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['status', 'booking_date', 'id'], name='booking_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['email'], name='booking_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(condition=models.Q(('status__in', ['completed', 'cancelled'])), fields=['check_out', 'id'], name='booking_archivable_idx'),
+        ),
+    ]
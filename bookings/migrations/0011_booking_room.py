@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('nightly_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='bookings.roombooking')),
+                ('room_type', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='booking_rooms', to='bookings.roomtype')),
+            ],
+            options={
+                'verbose_name': 'Booking Room',
+                'verbose_name_plural': 'Booking Rooms',
+                'indexes': [models.Index(fields=['room_type', 'booking'], name='booking_room_type_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingroom',
+            constraint=models.UniqueConstraint(fields=('booking', 'room_type'), name='unique_booking_room'),
+        ),
+    ]
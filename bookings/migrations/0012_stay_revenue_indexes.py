@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_room'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedroombooking',
+            index=models.Index(fields=['check_in', 'check_out', 'status', 'total_price'], name='archived_stay_revenue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['check_in', 'check_out', 'status', 'total_price'], name='booking_stay_revenue_idx'),
+        ),
+    ]
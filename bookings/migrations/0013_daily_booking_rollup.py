@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_stay_revenue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('bookings', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('adults', models.IntegerField(default=0)),
+                ('children', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Booking Rollup',
+                'verbose_name_plural': 'Daily Booking Rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailybookingrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'status'), name='unique_rollup_day_status'),
+        ),
+    ]
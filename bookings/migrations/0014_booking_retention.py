@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_daily_booking_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedroombooking',
+            name='anonymized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='anonymized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='archivedroombooking',
+            index=models.Index(condition=models.Q(('anonymized_at__isnull', True)), fields=['check_out', 'id'], name='archived_retention_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(condition=models.Q(('anonymized_at__isnull', True)), fields=['check_out', 'id'], name='booking_retention_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    DailyBookingRollup = apps.get_model('bookings', 'DailyBookingRollup')
+
+    # Same totals as bookings.rollup.expected_rollup, over both tiers
+    totals = {}
+    for model_name in ('RoomBooking', 'ArchivedRoomBooking'):
+        rows = (
+            apps.get_model('bookings', model_name).objects
+            .annotate(day=TruncDate('booking_date'))
+            .values('day', 'status')
+            .annotate(bookings=Count('id'), revenue=Sum('total_price'), adults=Sum('adults'), children=Sum('children'))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['day'], row['status'])
+            current = totals.get(key, (0, Decimal('0'), 0, 0))
+            values = (row['bookings'], Decimal(row['revenue'] or 0), row['adults'] or 0, row['children'] or 0)
+            totals[key] = tuple(total + value for total, value in zip(current, values))
+
+    # Rebuilt rather than added to, so it is right whether or not
+    # rebuild_booking_rollup was already run by hand
+    DailyBookingRollup.objects.all().delete()
+    DailyBookingRollup.objects.bulk_create(
+        [
+            DailyBookingRollup(day=day, status=status, bookings=bookings, revenue=revenue,
+                               adults=adults, children=children)
+            for (day, status), (bookings, revenue, adults, children) in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_booking_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,73 @@
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils import timezone
 import json
+import random
+import string
 
 
-class RoomBooking(models.Model):
+def generate_booking_reference():
+    return 'HH' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+
+
+class RoomType(models.Model):
+    """Bookable room category; ``selected_rooms`` keys are RoomType ids."""
+    name = models.CharField(max_length=150)
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    weekend_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        help_text='Nightly price for Friday and Saturday nights; defaults to price_per_night'
+    )
+    total_rooms = models.PositiveIntegerField(default=1)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Room Type'
+        verbose_name_plural = 'Room Types'
+
+    def __str__(self):
+        return self.name
+
+
+class SeasonalRate(models.Model):
+    """Overrides a room type's nightly price between two dates (inclusive)."""
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='seasonal_rates')
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    weekend_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        # Later-starting seasons win where seasons overlap
+        ordering = ['start_date', 'id']
+        verbose_name = 'Seasonal Rate'
+        verbose_name_plural = 'Seasonal Rates'
+
+    def __str__(self):
+        return f"{self.name}: {self.room_type} {self.start_date} – {self.end_date}"
+
+
+class LengthOfStayDiscount(models.Model):
+    """Percentage off the stay once it reaches ``min_nights``; the largest tier applies."""
+    min_nights = models.PositiveIntegerField(unique=True)
+    percent = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        ordering = ['min_nights']
+        verbose_name = 'Length of Stay Discount'
+        verbose_name_plural = 'Length of Stay Discounts'
+
+    def __str__(self):
+        return f"{self.percent}% off {self.min_nights}+ nights"
+
+
+class BaseRoomBooking(models.Model):
+    """Columns shared by live bookings and their archived copies."""
     # Guest Information
     full_name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -33,19 +97,53 @@ class RoomBooking(models.Model):
         ('completed', 'Completed'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Set when the retention job strips the guest's personal data
+    anonymized_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        abstract = True
+
+
+class RoomBooking(BaseRoomBooking):
     class Meta:
         ordering = ['-booking_date']
         verbose_name = 'Room Booking'
         verbose_name_plural = 'Room Bookings'
+        indexes = [
+            # Keyset pagination: one (sort key, id) index per allowed ordering
+            models.Index(fields=['booking_date', 'id'], name='booking_date_id_idx'),
+            models.Index(fields=['check_in', 'id'], name='booking_check_in_id_idx'),
+            models.Index(fields=['check_out', 'id'], name='booking_check_out_id_idx'),
+            # ?status= on the admin list, in its default newest-first order
+            models.Index(fields=['status', 'booking_date', 'id'], name='booking_status_date_idx'),
+            # Occupancy revenue series: GROUP BY (check_in, check_out) read
+            # from the index alone
+            models.Index(
+                fields=['check_in', 'check_out', 'status', 'total_price'], name='booking_stay_revenue_idx',
+            ),
+            # Guest lookups by email (retention, support)
+            models.Index(fields=['email'], name='booking_email_idx'),
+            # archive_bookings candidates; only finished bookings are indexed
+            models.Index(
+                fields=['check_out', 'id'], name='booking_archivable_idx',
+                condition=models.Q(status__in=['completed', 'cancelled']),
+            ),
+            # enforce_booking_retention candidates; anonymized rows drop out
+            models.Index(
+                fields=['check_out', 'id'], name='booking_retention_idx',
+                condition=models.Q(anonymized_at__isnull=True),
+            ),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.booking_reference:
             # Generate a booking reference
-            import random
-            import string
-            self.booking_reference = 'HH' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        super().save(*args, **kwargs)
+            self.booking_reference = generate_booking_reference()
+        # The post_save handlers write occupancy and line items; keep them
+        # in the booking's transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.booking_reference} - {self.full_name}"
@@ -53,27 +151,247 @@ class RoomBooking(models.Model):
     @property
     def room_details(self):
         """Helper property to get formatted room details"""
-        # Room data mapping (same as in frontend)
-        rooms_data = {
-            1: {"name": "The President's Chamber — Deluxe", "price": 8500},
-            2: {"name": "The Magistrate's Chamber — Executive", "price": 10500},
-            3: {"name": "The Collector's Chamber — Deluxe", "price": 7500},
-            4: {"name": "The Residency Room — Executive", "price": 9500},
-            5: {"name": "The Plantation Room — Deluxe", "price": 6500},
-        }
+        from .availability import normalize_rooms
+        from .catalog import get_catalog
         
-        selected = self.selected_rooms
+        rooms_data = get_catalog()
+        selected = normalize_rooms(self.selected_rooms)
         room_list = []
         
         for room_id, quantity in selected.items():
-            room_id = int(room_id)
             if room_id in rooms_data:
                 room_info = rooms_data[room_id]
                 room_list.append({
-                    'name': room_info['name'],
+                    'name': room_info.name,
                     'quantity': quantity,
-                    'price_per_night': room_info['price'],
-                    'total_price': room_info['price'] * quantity
+                    'price_per_night': room_info.price_per_night,
+                    'total_price': room_info.price_per_night * quantity
                 })
         
         return room_list
+
+
+class BookingRoom(models.Model):
+    """
+    One room type on a live booking: ``selected_rooms`` in relational form.
+
+    Written with the booking (see ``bookings.line_items``); ``line_total``
+    is this room type's share of the booking's ``total_price``, so the lines
+    of a booking always add up to its total.
+    """
+    booking = models.ForeignKey(RoomBooking, on_delete=models.CASCADE, related_name='rooms')
+    # Room types can be deleted while old bookings still name them
+    room_type = models.ForeignKey(
+        RoomType, on_delete=models.DO_NOTHING, db_constraint=False, related_name='booking_rooms'
+    )
+    quantity = models.PositiveIntegerField()
+    nightly_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        verbose_name = 'Booking Room'
+        verbose_name_plural = 'Booking Rooms'
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'room_type'], name='unique_booking_room'),
+        ]
+        indexes = [
+            # Per-room-type aggregates: GROUP BY room_type, joined to the booking
+            models.Index(fields=['room_type', 'booking'], name='booking_room_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x room {self.room_type_id} on booking {self.booking_id}"
+
+
+class ArchivedRoomBooking(BaseRoomBooking):
+    """
+    Cold tier for finished bookings, filled by ``python manage.py archive_bookings``.
+
+    Rows keep the id they had in RoomBooking. Derived data (room-night
+    occupancy) is left as it was when a booking is archived; its BookingRoom
+    lines are removed with the live row.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-booking_date']
+        verbose_name = 'Archived Room Booking'
+        verbose_name_plural = 'Archived Room Bookings'
+        indexes = [
+            models.Index(fields=['booking_date', 'id'], name='archived_date_id_idx'),
+            models.Index(fields=['check_in', 'id'], name='archived_check_in_id_idx'),
+            models.Index(fields=['check_out', 'id'], name='archived_check_out_id_idx'),
+            models.Index(
+                fields=['check_in', 'check_out', 'status', 'total_price'], name='archived_stay_revenue_idx',
+            ),
+            models.Index(
+                fields=['check_out', 'id'], name='archived_retention_idx',
+                condition=models.Q(anonymized_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_reference} - {self.full_name} (archived)"
+
+
+class RoomNightOccupancy(models.Model):
+    """
+    Number of rooms of one type that are taken on one night.
+
+    Maintained by the booking signal handlers so that availability for a date
+    range is a single indexed range scan instead of decoding every booking.
+    """
+    room_type = models.PositiveIntegerField()
+    date = models.DateField()
+    booked = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Room Night Occupancy'
+        verbose_name_plural = 'Room Night Occupancy'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'room_type'], name='unique_room_night'),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_type} on {self.date}: {self.booked} booked"
+
+
+class DailyBookingRollup(models.Model):
+    """
+    Bookings, revenue and guests per booking day and status.
+
+    Maintained by the booking signal handlers, like RoomNightOccupancy, so
+    dashboard totals and revenue charts read one row per day and status
+    instead of every booking ever taken. Archiving leaves it untouched.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    adults = models.IntegerField(default=0)
+    children = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily Booking Rollup'
+        verbose_name_plural = 'Daily Booking Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='unique_rollup_day_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.status} bookings on {self.day}: {self.bookings}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional outbox for notification emails.
+
+    Rows are written in the same transaction as the booking and delivered by
+    the ``process_email_outbox`` worker, so the request never waits on SMTP.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+
+    booking = models.ForeignKey(
+        RoomBooking, null=True, blank=True, on_delete=models.SET_NULL, related_name='emails'
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response remembered for a POST sent with an ``Idempotency-Key`` header.
+
+    A retry with the same key and body replays ``response_body`` instead of
+    running the view again; see ``bookings.idempotency``.
+    """
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
+
+
+class BookingEvent(models.Model):
+    """
+    One admin notification, shared by every process.
+
+    Written by ``bookings.events.hub.publish`` after the booking commits and
+    read by each process's event poller and by Last-Event-ID replays; rows
+    older than ``BOOKING_EVENT_TTL`` are pruned as new ones are written.
+    """
+    type = models.CharField(max_length=50)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Booking Event'
+        verbose_name_plural = 'Booking Events'
+
+    def __str__(self):
+        return f"{self.type} #{self.id}"
+
+
+class EventStreamTicket(models.Model):
+    """
+    Single-use, short-lived credential for opening the booking event stream.
+
+    EventSource cannot send an Authorization header, so the dashboard trades
+    its JWT for a ticket and passes that in the query string instead; only a
+    hash is stored and the ticket is deleted when redeemed.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Event Stream Ticket'
+        verbose_name_plural = 'Event Stream Tickets'
+
+    def __str__(self):
+        return f"Ticket for user {self.user_id} until {self.expires_at}"
@@ -0,0 +1,155 @@
+"""
+Email outbox: enqueue inside the booking transaction, deliver from a worker.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _plain_confirmation(booking):
+    """Bare-bones confirmation body for when the HTML template fails to render."""
+    return '\n'.join([
+        f'New booking {booking.booking_reference}',
+        f'Guest: {booking.full_name} <{booking.email}>, {booking.phone}',
+        f'Stay: {booking.check_in} to {booking.check_out}',
+        f'Rooms: {booking.selected_rooms}',
+        f'Total: {booking.total_price}',
+    ])
+
+
+def queue_booking_confirmation_email(booking):
+    """
+    Queue the booking confirmation email to admin
+
+    Called inside the booking's transaction, so a template error must not
+    escape: it is logged and a plain-text email is queued instead.
+    """
+    context = {
+        'booking': booking,
+    }
+    try:
+        html_message = render_to_string('bookings/booking_confirmation_email.html', context)
+        body = strip_tags(html_message)
+    except Exception as e:
+        logger.error(f"Error rendering confirmation email for {booking.booking_reference}: {str(e)}")
+        html_message = ''
+        body = _plain_confirmation(booking)
+
+    return OutboundEmail.objects.create(
+        booking=booking,
+        subject=f'🏛️ New Heritage Hotel Booking - {booking.booking_reference}',
+        body=body,
+        html_body=html_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=[settings.ADMIN_EMAIL],
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped."""
+    delay = settings.EMAIL_OUTBOX_RETRY_BASE * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_RETRY_MAX))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due emails to this worker.
+
+    Claimed rows are pushed ``EMAIL_OUTBOX_LEASE`` seconds into the future so
+    other workers skip them, and reappear on their own if this worker dies
+    mid-batch. On PostgreSQL concurrent workers skip each other's locked rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+        if connections[due.db].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due.order_by('next_attempt_at', 'id')[:batch_size])
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+            )
+    return batch
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'dead'
+        logger.error(f"Giving up on email {email.pk} after {email.attempts} attempts: {error}")
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning(f"Email {email.pk} failed (attempt {email.attempts}), retrying: {error}")
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def deliver_batch(batch_size=None, connection=None):
+    """
+    Send one batch of due emails over a single SMTP connection.
+
+    Returns ``(sent, failed)``.
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    smtp = connection or get_connection(fail_silently=False)
+    sent_ids = []
+    failed = 0
+    try:
+        smtp.open()
+    except Exception as e:
+        for email in batch:
+            _record_failure(email, e)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.recipients,
+                connection=smtp,
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, 'text/html')
+            try:
+                message.send()
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e)
+                # A broken connection fails every later message too; reconnect.
+                try:
+                    smtp.close()
+                    smtp.open()
+                except Exception:
+                    logger.warning("SMTP reconnect failed; the rest of the batch stays leased")
+                    break
+                continue
+            sent_ids.append(email.pk)
+    finally:
+        smtp.close()
+        # One UPDATE for the whole batch keeps the worker off the database
+        # between messages; a crash here means at-least-once redelivery.
+        if sent_ids:
+            OutboundEmail.objects.filter(pk__in=sent_ids).update(
+                status='sent',
+                attempts=F('attempts') + 1,
+                sent_at=timezone.now(),
+                last_error='',
+            )
+
+    return len(sent_ids), failed
@@ -0,0 +1,117 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookingCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(<sort key>, id)``.
+
+    Each page is a ``WHERE (key, id) < (last_key, last_id)`` range read off a
+    composite index, so page 500 costs the same as page 1. Cursors are opaque
+    base64 tokens tied to the ordering they were issued for.
+
+    Works on model querysets and on ``values()`` querysets that include
+    ``id`` and the ordering field.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    ordering_query_param = 'ordering'
+    max_page_size = 100
+    default_ordering = '-booking_date'
+    # Every key here must have a matching (key, id) index on RoomBooking.
+    ordering_fields = ('booking_date', 'check_in', 'check_out')
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or self.max_page_size
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            raise ValidationError({
+                self.ordering_query_param: f"Unsupported ordering. Choose from: {', '.join(self.ordering_fields)}"
+            })
+        return ordering
+
+    def encode_cursor(self, position):
+        payload = json.dumps(position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, request, ordering, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if position['o'] != ordering:
+                raise ValueError('cursor was issued for a different ordering')
+            return field.to_python(position['v']), int(position['id'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.page_size = self.get_page_size(request)
+
+        name = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        field = queryset.model._meta.get_field(name)
+        direction = 'lt' if descending else 'gt'
+
+        position = self.decode_cursor(request, self.ordering, field)
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{name}__{direction}': value}) | Q(**{name: value, f'id__{direction}': pk})
+            )
+
+        queryset = queryset.order_by(self.ordering, '-id' if descending else 'id')
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = page[-1]
+            if isinstance(last, dict):
+                # A values() queryset: every ordering field is a date or datetime
+                value, pk = last[name].isoformat(), last['id']
+            else:
+                value, pk = field.value_to_string(last), last.pk
+            self.next_cursor = self.encode_cursor({'o': self.ordering, 'v': value, 'id': pk})
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('success', True),
+            ('data', data),
+            ('next_cursor', self.next_cursor),
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('page_size', self.page_size),
+            ('ordering', self.ordering),
+        ]))
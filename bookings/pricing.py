@@ -0,0 +1,210 @@
+"""
+Seasonal pricing engine.
+
+For every room type the nightly rate (base, weekend and seasonal overrides)
+is laid out once per catalog version as a prefix-sum array of cents over a
+fixed window of days. Pricing a stay is then two array lookups per room type,
+``prefix[check_out] - prefix[check_in]``, however many nights it has, and a
+batch of quotes never walks individual nights.
+
+The window runs from ``WINDOW_PAST_DAYS`` before today to about three years
+ahead. Nights outside it (stays booked further out, or old bookings being
+re-priced) are priced one by one from the same rates, so every stay can be
+quoted; only those nights cost a loop.
+"""
+import threading
+from array import array
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from core.versioning import get_version
+
+from .availability import normalize_rooms
+from .models import LengthOfStayDiscount, RoomType, SeasonalRate
+
+# Rates are laid out from a little before today to three years ahead;
+# nights outside the window are priced night by night.
+WINDOW_PAST_DAYS = 30
+WINDOW_DAYS = WINDOW_PAST_DAYS + 3 * 366
+
+# Friday and Saturday nights (date.weekday())
+WEEKEND_NIGHTS = (4, 5)
+
+CENT = Decimal('0.01')
+
+
+class PricingError(ValueError):
+    pass
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+class RateCalendar:
+    def __init__(self, origin, room_types, seasons, discounts):
+        self.origin = origin
+        self.active = {room.id: room.is_active for room in room_types}
+        self.inventory = {room.id: room.total_rooms for room in room_types}
+        # [(min_nights, percent)], largest tier first
+        self.discounts = sorted(discounts, reverse=True)
+        self.prefix = {}
+        # Per room type: (weekday cents, weekend cents, seasons latest first),
+        # for nights outside the window
+        self.rates = {}
+
+        weekend = [
+            (origin + timedelta(days=offset)).weekday() in WEEKEND_NIGHTS
+            for offset in range(WINDOW_DAYS)
+        ]
+        seasons_by_room = {}
+        for season in seasons:
+            seasons_by_room.setdefault(season.room_type_id, []).append(season)
+
+        for room in room_types:
+            weekday_cents = to_cents(room.price_per_night)
+            weekend_cents = to_cents(room.weekend_price if room.weekend_price is not None else room.price_per_night)
+            self.rates[room.id] = (weekday_cents, weekend_cents, seasons_by_room.get(room.id, [])[::-1])
+            nightly = array('q', (weekend_cents if is_weekend else weekday_cents for is_weekend in weekend))
+
+            for season in seasons_by_room.get(room.id, []):
+                start = max((season.start_date - origin).days, 0)
+                stop = min((season.end_date - origin).days + 1, WINDOW_DAYS)
+                season_weekday = to_cents(season.price_per_night)
+                season_weekend = to_cents(
+                    season.weekend_price if season.weekend_price is not None else season.price_per_night
+                )
+                for offset in range(start, stop):
+                    nightly[offset] = season_weekend if weekend[offset] else season_weekday
+
+            prefix = array('q', [0]) * (WINDOW_DAYS + 1)
+            running = 0
+            for offset, cents in enumerate(nightly):
+                running += cents
+                prefix[offset + 1] = running
+            self.prefix[room.id] = prefix
+
+    def night_cents(self, room_id, day):
+        """The rate of one night, looked up directly rather than from the window."""
+        weekday_cents, weekend_cents, seasons = self.rates[room_id]
+        is_weekend = day.weekday() in WEEKEND_NIGHTS
+        for season in seasons:
+            if season.start_date <= day <= season.end_date:
+                price = season.weekend_price if is_weekend and season.weekend_price is not None else season.price_per_night
+                return to_cents(price)
+        return weekend_cents if is_weekend else weekday_cents
+
+    def stay_cents(self, room_id, start, stop):
+        """Price of one room for the nights ``[start, stop)``, as day offsets from the origin."""
+        prefix = self.prefix[room_id]
+        inside_start, inside_stop = max(start, 0), min(stop, WINDOW_DAYS)
+        cents = prefix[inside_stop] - prefix[inside_start] if inside_start < inside_stop else 0
+        for offset in (*range(start, min(stop, 0)), *range(max(start, WINDOW_DAYS), stop)):
+            cents += self.night_cents(room_id, self.origin + timedelta(days=offset))
+        return cents
+
+    def discount_for(self, nights):
+        for min_nights, percent in self.discounts:
+            if nights >= min_nights:
+                return percent
+        return Decimal('0')
+
+    def quote(self, check_in, check_out, selected_rooms, include_inactive=False):
+        """Price one stay; raises PricingError if it cannot be priced."""
+        if not check_in or not check_out:
+            raise PricingError('Check-in and check-out must be valid dates (YYYY-MM-DD).')
+        if check_out <= check_in:
+            raise PricingError('Check-out date must be after check-in date.')
+        if (check_out - check_in).days > settings.BOOKING_MAX_NIGHTS:
+            raise PricingError(f'Stays are limited to {settings.BOOKING_MAX_NIGHTS} nights.')
+
+        try:
+            rooms = normalize_rooms(selected_rooms, strict=True)
+        except ValidationError as e:
+            raise PricingError(e.messages[0])
+        if not rooms:
+            raise PricingError('At least one room must be selected.')
+
+        start = (check_in - self.origin).days
+        stop = (check_out - self.origin).days
+        lines = []
+        subtotal = 0
+        for room_id, quantity in sorted(rooms.items()):
+            if room_id not in self.prefix or not (include_inactive or self.active[room_id]):
+                raise PricingError(f'Unknown room type: {room_id}.')
+            if quantity > self.inventory[room_id]:
+                raise PricingError(f'Room type {room_id} has only {self.inventory[room_id]} room(s).')
+            stay_cents = self.stay_cents(room_id, start, stop)
+            subtotal += stay_cents * quantity
+            lines.append({
+                'room_id': room_id,
+                'quantity': quantity,
+                'stay_price': from_cents(stay_cents),
+                'subtotal': from_cents(stay_cents * quantity),
+            })
+
+        nights = stop - start
+        percent = self.discount_for(nights)
+        discount = to_cents(from_cents(subtotal) * percent / 100)
+        return {
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': nights,
+            'rooms': lines,
+            'subtotal': from_cents(subtotal),
+            'discount_percent': percent,
+            'discount': from_cents(discount),
+            'total_price': from_cents(subtotal - discount),
+        }
+
+    def quote_many(self, stays):
+        """
+        Price ``[(check_in, check_out, selected_rooms), ...]`` in one pass.
+
+        Returns one quote dict per stay, or ``{'error': message}`` in its place.
+        """
+        results = []
+        for check_in, check_out, selected_rooms in stays:
+            try:
+                results.append(self.quote(check_in, check_out, selected_rooms))
+            except PricingError as e:
+                results.append({'error': str(e)})
+        return results
+
+
+_lock = threading.Lock()
+_calendar = (None, None)
+
+
+def get_rate_calendar(fresh=False):
+    """
+    Return the rate calendar for the current catalog version and day.
+
+    Pass ``fresh`` when the price is written into a booking, so a rate
+    changed by another process a moment ago is never missed.
+    """
+    global _calendar
+    key = (get_version('room_types', fresh=fresh), timezone.now().date())
+    if _calendar[0] != key:
+        with _lock:
+            if _calendar[0] != key:
+                _calendar = (key, RateCalendar(
+                    key[1] - timedelta(days=WINDOW_PAST_DAYS),
+                    list(RoomType.objects.all()),
+                    list(SeasonalRate.objects.all()),
+                    list(LengthOfStayDiscount.objects.values_list('min_nights', 'percent')),
+                ))
+    return _calendar[1]
+
+
+def invalidate_rate_calendar():
+    global _calendar
+    _calendar = (None, None)
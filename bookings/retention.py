@@ -0,0 +1,145 @@
+"""
+Retention of guest personal data.
+
+Bookings whose stay ended more than ``BOOKING_RETENTION_DAYS`` ago, live or
+archived, are either anonymized (name, email, phone and special requests
+replaced, ``anonymized_at`` set; figures, dates and rooms kept) or purged
+outright. Work is done in ranges of the ``(check_out, id)`` index holding
+at most ``chunk_size`` candidates, one short transaction per range, and
+anonymization never reads the rows. A stopped run picks up where it left
+off: anonymized rows drop out of the candidates and purged ones are gone.
+
+Purging removes a booking from the daily rollup and room-night occupancy
+as if it had been deleted; anonymized bookings still count everywhere.
+
+The notification emails in the outbox repeat the guest's name, email and
+phone, so in either mode a chunk also deletes the emails of its bookings.
+Emails no longer linked to a booking (archived or deleted ones) are deleted
+once they are older than the cutoff, in a last chunked pass.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.versioning import bump_version
+
+from .models import ArchivedRoomBooking, OutboundEmail, RoomBooking
+from .signals import TRACKED_FIELDS, suspend_booking_signals, sync_bulk_deleted
+
+MODES = ('anonymize', 'purge')
+
+DEFAULT_CHUNK_SIZE = 1000
+
+ANONYMIZED_FIELDS = {
+    'full_name': 'Anonymized guest',
+    'email': 'anonymized@example.invalid',
+    'phone': '',
+    'special_requests': None,
+}
+
+
+def default_cutoff():
+    return timezone.now().date() - timedelta(days=settings.BOOKING_RETENTION_DAYS)
+
+
+def retention_candidates(model, cutoff, mode):
+    """Bookings of ``model`` that ended before ``cutoff`` and still need ``mode``."""
+    bookings = model.objects.filter(check_out__lt=cutoff)
+    if mode == 'anonymize':
+        bookings = bookings.filter(anonymized_at__isnull=True)
+    return bookings
+
+
+def _after(position):
+    """Candidates past ``position``, a ``(check_out, id)`` key, or all of them for None."""
+    if position is None:
+        return Q()
+    check_out, pk = position
+    return Q(check_out__gt=check_out) | Q(check_out=check_out, id__gt=pk)
+
+
+def _through(position):
+    """Candidates up to and including ``position``."""
+    check_out, pk = position
+    return Q(check_out__lt=check_out) | Q(check_out=check_out, id__lte=pk)
+
+
+def _next_bound(candidates, position, chunk_size):
+    """Key of the ``chunk_size``-th candidate past ``position``, or None if fewer are left."""
+    keys = candidates.filter(_after(position)).order_by('check_out', 'id').values_list('check_out', 'id')
+    bound = list(keys[chunk_size - 1:chunk_size])
+    return bound[0] if bound else None
+
+
+def retention_chunk(model, cutoff, mode, position=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply ``mode`` to the next key range of candidates past ``position``.
+
+    Chunks are ranges of the ``(check_out, id)`` index. Returns
+    ``(bound, count)``; ``bound`` is None once the range reached the last
+    candidate.
+    """
+    with transaction.atomic():
+        candidates = retention_candidates(model, cutoff, mode)
+        bound = _next_bound(candidates, position, chunk_size)
+        chunk = candidates.filter(_after(position))
+        if bound is not None:
+            chunk = chunk.filter(_through(bound))
+
+        if model is RoomBooking:
+            # The emails repeat the guest's details; delete them while they
+            # are still linked (a purge would only unlink them)
+            OutboundEmail.objects.filter(booking__in=chunk).delete()
+
+        if mode == 'anonymize':
+            count = chunk.update(**ANONYMIZED_FIELDS, anonymized_at=timezone.now())
+            if count:
+                transaction.on_commit(lambda: bump_version('bookings'))
+            return bound, count
+
+        bookings = list(chunk.select_for_update().only('id', *TRACKED_FIELDS).order_by('check_out', 'id'))
+        if bookings:
+            with suspend_booking_signals():
+                model.objects.filter(id__in=[booking.id for booking in bookings]).delete()
+            sync_bulk_deleted(bookings)
+        return bound, len(bookings)
+
+
+def orphaned_emails(cutoff):
+    """Outbox emails of bookings that are gone from the live table, created before ``cutoff``."""
+    return OutboundEmail.objects.filter(booking__isnull=True, created_at__date__lt=cutoff)
+
+
+def orphaned_email_chunk(cutoff, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Delete up to ``chunk_size`` orphaned emails; returns how many went."""
+    with transaction.atomic():
+        ids = list(orphaned_emails(cutoff).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if ids:
+            OutboundEmail.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+
+def enforce_retention(mode, cutoff=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply ``mode`` to every candidate, live tier first, then delete old
+    orphaned emails; yields ``(model, count)`` per chunk.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+    cutoff = cutoff or default_cutoff()
+    for model in (RoomBooking, ArchivedRoomBooking):
+        position = None
+        while True:
+            position, count = retention_chunk(model, cutoff, mode, position, chunk_size)
+            if count:
+                yield model, count
+            if position is None:
+                break
+    while True:
+        count = orphaned_email_chunk(cutoff, chunk_size)
+        if not count:
+            break
+        yield OutboundEmail, count
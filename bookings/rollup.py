@@ -0,0 +1,222 @@
+"""
+Daily booking rollup.
+
+One DailyBookingRollup row per local booking day and status holds the
+number of bookings, their revenue and guest counts. The booking signal
+handlers (and the bulk helpers next to them) add and take away each
+booking's contribution as it is created, changed or deleted, so dashboard
+totals and revenue charts cost one row per day shown rather than one per
+booking. Archiving moves rows between tables without touching the rollup,
+so it covers the full history; ``rollup_drift`` / ``rebuild_rollup``
+compare it against both tables and reconcile any drift, with booking writes
+held off while they read (see ``lock_for_reconcile``).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .analytics import period_start
+from .availability import BATCH_SIZE
+from .models import ArchivedRoomBooking, DailyBookingRollup, RoomBooking
+from .pricing import CENT
+
+GROUPINGS = ('day', 'week', 'month')
+
+# Per key: bookings, revenue, adults, children
+_MEASURES = ('bookings', 'revenue', 'adults', 'children')
+
+
+def booking_day(booking_date):
+    """The local calendar day a booking was taken on."""
+    if booking_date is None:
+        return None
+    if timezone.is_aware(booking_date):
+        return timezone.localdate(booking_date)
+    return booking_date.date()
+
+
+def contribution(state):
+    """Return the ``{(day, status): (bookings, revenue, adults, children)}`` one booking adds."""
+    if not state or not state.get('booking_date'):
+        return {}
+    return {
+        (booking_day(state['booking_date']), state['status']): (
+            1, Decimal(state['total_price'] or 0), state['adults'] or 0, state['children'] or 0,
+        ),
+    }
+
+
+def add_contribution(deltas, state, sign=1):
+    """Add ``sign`` times the contribution of ``state`` to ``deltas`` in place."""
+    for key, values in contribution(state).items():
+        current = deltas.get(key, (0, Decimal('0'), 0, 0))
+        deltas[key] = tuple(total + sign * value for total, value in zip(current, values))
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add ``{(day, status): (bookings, revenue, adults, children)}`` to the rollup.
+
+    Rows gaining bookings are inserted first if missing (the others already
+    count the bookings they are losing), then each changed row is bumped
+    with ``UPDATE ... SET bookings = bookings + n, ...``.
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+
+    new_keys = [key for key, values in deltas.items() if values[0] > 0]
+    if new_keys:
+        DailyBookingRollup.objects.bulk_create(
+            [DailyBookingRollup(day=day, status=status) for day, status in new_keys],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    # Sorted so concurrent writers take row locks in the same order
+    for (day, status), values in sorted(deltas.items()):
+        DailyBookingRollup.objects.filter(day=day, status=status).update(**{
+            measure: F(measure) + value for measure, value in zip(_MEASURES, values)
+        })
+
+
+def expected_rollup():
+    """The rollup recomputed from live and archived bookings, as ``{(day, status): values}``."""
+    expected = defaultdict(lambda: (0, Decimal('0'), 0, 0))
+    for model in (RoomBooking, ArchivedRoomBooking):
+        rows = (
+            model.objects.annotate(day=TruncDate('booking_date'))
+            .values('day', 'status')
+            .annotate(
+                bookings=Count('id'), revenue=Sum('total_price'), adults=Sum('adults'), children=Sum('children'),
+            )
+            .order_by()
+        )
+        for row in rows:
+            key = (row['day'], row['status'])
+            values = (row['bookings'], Decimal(row['revenue'] or 0), row['adults'] or 0, row['children'] or 0)
+            expected[key] = tuple(total + value for total, value in zip(expected[key], values))
+    return dict(expected)
+
+
+def stored_rollup():
+    return {
+        (row[0], row[1]): tuple(row[2:])
+        for row in DailyBookingRollup.objects.values_list('day', 'status', *_MEASURES)
+    }
+
+
+def lock_for_reconcile():
+    """
+    Hold off booking and rollup writes until the transaction ends.
+
+    ``expected_rollup`` and ``stored_rollup`` are separate queries: a
+    booking committed between them would look like drift and be "corrected"
+    away. On PostgreSQL the three tables are locked in SHARE ROW EXCLUSIVE
+    mode, which blocks inserts, updates, deletes and other reconciles but
+    not reads; writers wait for the reconcile instead. SQLite needs nothing:
+    a transaction reads one snapshot and writers are serialized anyway.
+    """
+    connection = transaction.get_connection()
+    if connection.vendor != 'postgresql':
+        return
+    # Same order as booking writes take them: bookings first, rollup last
+    tables = ', '.join(
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (RoomBooking, ArchivedRoomBooking, DailyBookingRollup)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def rollup_drift():
+    """Return ``{(day, status): (stored, expected)}`` for every row that is off."""
+    with transaction.atomic():
+        lock_for_reconcile()
+        expected = expected_rollup()
+        stored = stored_rollup()
+    zero = (0, Decimal('0'), 0, 0)
+    drift = {}
+    for key in expected.keys() | stored.keys():
+        have, want = stored.get(key, zero), expected.get(key, zero)
+        if have != want:
+            drift[key] = (have, want)
+    return drift
+
+
+def rebuild_rollup():
+    """
+    Correct every drifted row in place; returns how many were fixed.
+
+    Runs in one transaction holding the ``lock_for_reconcile`` locks, so no
+    booking lands between measuring the drift and correcting it and readers
+    never see a half-fixed rollup.
+    """
+    with transaction.atomic():
+        drift = rollup_drift()
+        if not drift:
+            return 0
+        apply_rollup_deltas({
+            key: tuple(want - have for have, want in zip(stored, expected))
+            for key, (stored, expected) in drift.items()
+        })
+        DailyBookingRollup.objects.filter(bookings=0, revenue=0, adults=0, children=0).delete()
+        return len(drift)
+
+
+def revenue_series(start, end, statuses, group='day'):
+    """
+    Bookings and revenue per day, week or month for bookings taken in
+    ``[start, end]`` with one of ``statuses``, plus totals for the window.
+    """
+    rows = (
+        DailyBookingRollup.objects.filter(day__gte=start, day__lte=end, status__in=statuses)
+        .values('day').annotate(bookings=Sum('bookings'), revenue=Sum('revenue')).order_by('day')
+    )
+    periods = {}
+    for row in rows:
+        key = period_start(row['day'], group)
+        period = periods.setdefault(key, [0, Decimal('0')])
+        period[0] += row['bookings']
+        period[1] += row['revenue']
+
+    # Every period in the window, empty ones included, so charts need no gap filling
+    series = []
+    day = period_start(start, group)
+    while day <= end:
+        series.append({'period_start': day, **_figures(*periods.get(day, (0, 0)))})
+        day = _next_period(day, group)
+
+    return {
+        'start': start,
+        'end': end,
+        'group': group,
+        'statuses': list(statuses),
+        'periods': series,
+        'totals': _figures(
+            sum(bookings for bookings, _ in periods.values()),
+            sum((revenue for _, revenue in periods.values()), Decimal('0')),
+        ),
+    }
+
+
+def _figures(bookings, revenue):
+    revenue = Decimal(revenue).quantize(CENT)
+    return {
+        'bookings': bookings,
+        'revenue': str(revenue),
+        'average_booking_value': str((revenue / bookings).quantize(CENT)) if bookings else None,
+    }
+
+
+def _next_period(day, group):
+    if group == 'week':
+        return day + timedelta(days=7)
+    if group == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
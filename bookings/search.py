@@ -0,0 +1,141 @@
+"""
+Indexed guest search over ``full_name``, ``email`` and ``booking_reference``.
+
+PostgreSQL uses ``pg_trgm`` GIN indexes on ``UPPER(column::text)``, which is
+exactly the expression Django emits for ``icontains``, so the three-way OR
+becomes a bitmap OR of index scans. SQLite keeps an FTS5 external-content
+table in sync with triggers and answers prefix queries from it.
+
+SQLite drops triggers when Django rebuilds a table during a migration, so
+``install_search_index`` is idempotent and re-run after every ``migrate``.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+from .models import RoomBooking
+
+SEARCH_FIELDS = ('full_name', 'email', 'booking_reference')
+
+TABLE = RoomBooking._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        full_name, email, booking_reference,
+        content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, full_name, email, booking_reference)
+        VALUES (new.id, new.full_name, new.email, new.booking_reference);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, email, booking_reference)
+        VALUES ('delete', old.id, old.full_name, old.email, old.booking_reference);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF full_name, email, booking_reference ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, full_name, email, booking_reference)
+        VALUES ('delete', old.id, old.full_name, old.email, old.booking_reference);
+        INSERT INTO {FTS_TABLE}(rowid, full_name, email, booking_reference)
+        VALUES (new.id, new.full_name, new.email, new.booking_reference);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_INSTALL = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_{field}_trgm '
+    f'ON {TABLE} USING gin ((UPPER({field}::text)) gin_trgm_ops)'
+    for field in SEARCH_FIELDS
+]
+
+POSTGRES_UNINSTALL = [f'DROP INDEX IF EXISTS {TABLE}_{field}_trgm' for field in SEARCH_FIELDS]
+
+
+def install_search_index(connection, rebuild=False):
+    """Create the search index for ``connection``'s backend if it is missing."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for statement in SQLITE_INSTALL:
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+
+
+def uninstall_search_index(connection):
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}
+    with connection.cursor() as cursor:
+        for statement in statements.get(connection.vendor, []):
+            cursor.execute(statement)
+
+
+def fts_match_query(term):
+    """Turn free text into an FTS5 query where every word is a prefix match."""
+    words = re.findall(r'\w+', term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_bookings(queryset, term, ranked=False):
+    """
+    Filter ``queryset`` to bookings matching ``term``.
+
+    With ``ranked=True`` the rows are annotated with ``search_rank`` (higher is
+    better) and ordered by it.
+    """
+    vendor = connections[queryset.db].vendor
+
+    # The FTS table only indexes live bookings; the archive falls back to LIKE
+    if vendor == 'sqlite' and queryset.model is RoomBooking:
+        match = fts_match_query(term)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        )
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id',
+                [match],
+            )).order_by('-search_rank', '-id')
+        return queryset
+
+    term = term.strip()
+    if not term:
+        return queryset.none()
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': term})
+    queryset = queryset.filter(condition)
+
+    if ranked and vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        queryset = queryset.annotate(search_rank=Greatest(
+            *(TrigramWordSimilarity(term, field) for field in SEARCH_FIELDS)
+        )).order_by('-search_rank', '-id')
+    elif ranked:
+        queryset = queryset.order_by('-id')
+    return queryset
@@ -1,5 +1,15 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from .availability import normalize_rooms
+from .catalog import get_catalog
 from .models import RoomBooking
+from .pricing import PricingError, get_rate_calendar
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class RoomBookingSerializer(serializers.ModelSerializer):
@@ -12,6 +22,14 @@ class RoomBookingSerializer(serializers.ModelSerializer):
             'booking_date', 'booking_reference'
         ]
         read_only_fields = ['id', 'booking_date', 'booking_reference']
+        extra_kwargs = {
+            # Recomputed from the room catalog in validate()
+            'total_price': {'required': False},
+            'nights': {'required': False},
+        }
+    
+    # Whether validate() replaces client-sent nights and total_price
+    reprice = True
     
     def validate(self, data):
         """Validate booking data"""
@@ -21,9 +39,124 @@ class RoomBookingSerializer(serializers.ModelSerializer):
         if check_in and check_out:
             if check_out <= check_in:
                 raise serializers.ValidationError("Check-out date must be after check-in date.")
+            if (check_out - check_in).days > settings.BOOKING_MAX_NIGHTS:
+                raise serializers.ValidationError(f"Stays are limited to {settings.BOOKING_MAX_NIGHTS} nights.")
+            if check_in > timezone.localdate() + timedelta(days=settings.BOOKING_HORIZON_DAYS):
+                raise serializers.ValidationError(
+                    f"Check-in can be at most {settings.BOOKING_HORIZON_DAYS} days ahead."
+                )
         
         selected_rooms = data.get('selected_rooms', {})
         if not selected_rooms:
             raise serializers.ValidationError("At least one room must be selected.")
         
+        rooms = normalize_rooms(selected_rooms, strict=True)
+        # Stored as checked: {"1": 1.5} or {"1": true} never reach the table
+        data['selected_rooms'] = selected_rooms = {str(room_id): quantity for room_id, quantity in rooms.items()}
+        
+        # Only a price written into the booking needs this instant's catalog;
+        # without repricing (imports) the memoised version is enough
+        catalog = get_catalog(fresh=self.reprice)
+        unknown = [room_id for room_id in rooms if room_id not in catalog]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown room type(s): {', '.join(map(str, unknown))}.")
+        too_many = [room_id for room_id, quantity in rooms.items() if quantity > catalog[room_id].total_rooms]
+        if too_many:
+            raise serializers.ValidationError(
+                f"More rooms requested than exist for room type(s): {', '.join(map(str, too_many))}."
+            )
+        
+        if self.reprice and check_in and check_out:
+            try:
+                quote = get_rate_calendar(fresh=True).quote(check_in, check_out, selected_rooms)
+            except PricingError as e:
+                raise serializers.ValidationError(str(e))
+            initial_data = getattr(self, 'initial_data', None)
+            sent_price = initial_data.get('total_price') if isinstance(initial_data, dict) else None
+            if sent_price is not None and str(sent_price) != str(quote['total_price']):
+                logger.info(f"Client total {sent_price} replaced by server price {quote['total_price']}")
+            data['nights'] = quote['nights']
+            data['total_price'] = quote['total_price']
+        
         return data
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _price(value, cent=Decimal('0.01')):
+    return None if value is None else '{:f}'.format(value.quantize(cent))
+
+
+def _datetime_in(tz):
+    def convert(value):
+        if not value:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+class BookingListSerializer:
+    """
+    Read-only stand-in for ``RoomBookingSerializer(many=True)`` on list pages.
+
+    Rows come from ``queryset.values(*BookingListSerializer.fields)`` and the
+    few non-JSON columns are formatted in place, the way DRF's fields would,
+    without building model instances or going through per-field dispatch.
+    Output must stay identical to RoomBookingSerializer; a parity test in
+    ``bookings.tests`` checks it.
+    """
+    fields = RoomBookingSerializer.Meta.fields
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields)
+
+    def get_converters(self):
+        # Looked up once per list: the current timezone is a context-local read
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [
+            ('check_in', _date),
+            ('check_out', _date),
+            ('total_price', _price),
+            ('booking_date', _datetime_in(tz)),
+        ]
+
+    @property
+    def data(self):
+        converters = self.get_converters()
+        rows = list(self.rows)
+        for row in rows:
+            for name, convert in converters:
+                row[name] = convert(row[name])
+        return rows
+
+
+class RoomBookingImportSerializer(RoomBookingSerializer):
+    """
+    Serializer for bulk imports of historical bookings.
+
+    Unlike the public serializer it accepts status, booking_reference and
+    booking_date, and leaves reference uniqueness to the importer, which
+    checks a whole batch in one query instead of one query per row.
+    """
+    booking_reference = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    booking_date = serializers.DateTimeField(required=False)
+    status = serializers.ChoiceField(choices=RoomBooking.STATUS_CHOICES, default='confirmed')
+
+    # Historical bookings keep the price they were sold at
+    reprice = False
+
+    class Meta(RoomBookingSerializer.Meta):
+        fields = RoomBookingSerializer.Meta.fields + ['status']
+        read_only_fields = ['id']
+        extra_kwargs = {}
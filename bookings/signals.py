@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.versioning import bump_version
+
+from . import availability, line_items, rollup
+from .catalog import invalidate_catalog
+from .events import booking_event_data, hub
+from .models import LengthOfStayDiscount, RoomBooking, RoomType, SeasonalRate
+from .pricing import invalidate_rate_calendar
+
+# Fields whose previous value the post-save handlers need to diff against.
+TRACKED_FIELDS = (
+    'check_in', 'check_out', 'selected_rooms', 'status', 'total_price', 'booking_date', 'adults', 'children',
+)
+# Fields the BookingRoom line items are derived from
+LINE_ITEM_FIELDS = ('check_in', 'check_out', 'selected_rooms', 'total_price')
+
+_suspended = ContextVar('booking_signals_suspended', default=False)
+
+
+@contextmanager
+def suspend_booking_signals():
+    """
+    Turn the per-row RoomBooking handlers into no-ops for the block.
+
+    For set-based writes whose caller brings derived state up to date once
+    for the whole batch (see ``sync_bulk_deleted``).
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def _occupancy(state):
+    if not state:
+        return {}
+    return availability.footprint(
+        state['check_in'], state['check_out'], state['selected_rooms'], state['status']
+    )
+
+
+def _current_state(instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS}
+
+
+@receiver(pre_save, sender=RoomBooking)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._previous_state = None
+    if _suspended.get():
+        return
+    if not instance._state.adding and instance.pk:
+        instance._previous_state = (
+            sender.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=RoomBooking)
+def update_occupancy_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    availability.apply_night_deltas(
+        availability.footprint_delta(_occupancy(_current_state(instance)), _occupancy(previous))
+    )
+
+
+@receiver(post_save, sender=RoomBooking)
+def update_line_items_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    if created:
+        line_items.write_lines([instance], replace=False)
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if previous is None or any(previous[field] != getattr(instance, field) for field in LINE_ITEM_FIELDS):
+        line_items.write_lines([instance])
+
+
+@receiver(post_save, sender=RoomBooking)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    deltas = rollup.add_contribution({}, _current_state(instance))
+    rollup.apply_rollup_deltas(rollup.add_contribution(deltas, previous, sign=-1))
+
+
+@receiver(post_delete, sender=RoomBooking)
+def release_occupancy_on_delete(sender, instance, **kwargs):
+    if _suspended.get():
+        return
+    availability.apply_night_deltas(
+        availability.footprint_delta({}, _occupancy(_current_state(instance)))
+    )
+    rollup.apply_rollup_deltas(rollup.add_contribution({}, _current_state(instance), sign=-1))
+
+
+@receiver(post_save, sender=RoomBooking)
+@receiver(post_delete, sender=RoomBooking)
+def invalidate_booking_caches(sender, **kwargs):
+    if _suspended.get():
+        return
+    # Wait for the commit so a concurrent reader cannot cache the old data
+    # under the new version.
+    transaction.on_commit(lambda: bump_version('bookings'))
+
+
+@receiver(post_save, sender=RoomBooking)
+def publish_booking_events(sender, instance, created, raw=False, **kwargs):
+    if raw or _suspended.get():
+        return
+    if created:
+        data = booking_event_data(instance)
+        transaction.on_commit(lambda: hub.publish('booking.created', data))
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if previous and previous['status'] != instance.status:
+        data = booking_event_data(instance, previous_status=previous['status'])
+        transaction.on_commit(lambda: hub.publish('booking.status_changed', data))
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+@receiver(post_save, sender=SeasonalRate)
+@receiver(post_delete, sender=SeasonalRate)
+@receiver(post_save, sender=LengthOfStayDiscount)
+@receiver(post_delete, sender=LengthOfStayDiscount)
+def invalidate_room_catalog(sender, **kwargs):
+    invalidate_catalog()
+    invalidate_rate_calendar()
+    transaction.on_commit(lambda: bump_version('room_types'))
+
+
+def sync_bulk_created(bookings):
+    """
+    Bring derived state up to date for rows inserted with ``bulk_create``.
+
+    ``bulk_create`` sends no signals, so callers run this inside the same
+    transaction; it does the work of the per-row handlers in set-based form.
+    """
+    night_deltas = {}
+    rollup_deltas = {}
+    for booking in bookings:
+        for key, quantity in _occupancy(_current_state(booking)).items():
+            night_deltas[key] = night_deltas.get(key, 0) + quantity
+        rollup.add_contribution(rollup_deltas, _current_state(booking))
+    availability.apply_night_deltas(night_deltas)
+    rollup.apply_rollup_deltas(rollup_deltas)
+    line_items.write_lines(bookings, replace=False)
+    transaction.on_commit(lambda: bump_version('bookings'))
+
+
+def sync_bulk_status_changed(bookings, previous_statuses):
+    """
+    Bring derived state up to date after a ``queryset.update(status=...)``.
+
+    ``bookings`` carry their new status and ``previous_statuses`` maps their
+    ids to the old one. Occupancy moves in one set of deltas, caches are
+    invalidated once and one ``booking.status_changed`` event goes out per
+    booking, all after commit.
+    """
+    night_deltas = {}
+    rollup_deltas = {}
+    events = []
+    for booking in bookings:
+        previous = dict(_current_state(booking), status=previous_statuses[booking.pk])
+        delta = availability.footprint_delta(_occupancy(_current_state(booking)), _occupancy(previous))
+        for key, change in delta.items():
+            night_deltas[key] = night_deltas.get(key, 0) + change
+        rollup.add_contribution(rollup_deltas, _current_state(booking))
+        rollup.add_contribution(rollup_deltas, previous, sign=-1)
+        events.append(booking_event_data(booking, previous_status=previous['status']))
+    availability.apply_night_deltas({key: change for key, change in night_deltas.items() if change})
+    rollup.apply_rollup_deltas(rollup_deltas)
+
+    def after_commit():
+        bump_version('bookings')
+        for data in events:
+            hub.publish('booking.status_changed', data)
+    transaction.on_commit(after_commit)
+
+
+def sync_bulk_deleted(bookings):
+    """Release the rooms and rollup share of bookings removed by a ``queryset.delete()``."""
+    night_deltas = {}
+    rollup_deltas = {}
+    for booking in bookings:
+        for key, quantity in _occupancy(_current_state(booking)).items():
+            night_deltas[key] = night_deltas.get(key, 0) - quantity
+        rollup.add_contribution(rollup_deltas, _current_state(booking), sign=-1)
+    availability.apply_night_deltas(night_deltas)
+    rollup.apply_rollup_deltas(rollup_deltas)
+    transaction.on_commit(lambda: bump_version('bookings'))
@@ -1,3 +1,1673 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import gzip
+import json
+import tempfile
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.admin import site as admin_site
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.forms.models import model_to_dict
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.metrics import MetricsRegistry, collect, render_prometheus
+from core.middleware import brotli
+from core.query_plans import QueryPlanAssertions, find_full_scans, record_queries
+from core.renderers import FastJSONRenderer
+from core.versioning import get_versions
+
+from .admin import RoomBookingAdminForm
+from .archive import archivable
+from .bulk import bulk_delete, bulk_update_status
+from .availability import RoomUnavailable, footprint, get_availability, reserve_rooms
+from .catalog import get_catalog, invalidate_catalog
+from .models import (
+    ArchivedRoomBooking, BookingEvent, BookingRoom, DailyBookingRollup, EventStreamTicket, IdempotencyKey, LengthOfStayDiscount, OutboundEmail, RoomBooking, RoomNightOccupancy, RoomType, SeasonalRate,
+)
+from .pricing import get_rate_calendar, invalidate_rate_calendar
+from .retention import enforce_retention
+from .rollup import lock_for_reconcile, rollup_drift
+from .events import hub, redeem_stream_ticket
+from .importer import import_bookings
+from .outbox import deliver_batch, queue_booking_confirmation_email
+from .search import search_bookings
+from .serializers import BookingListSerializer, RoomBookingSerializer
+
+
+# Far enough ahead to be bookable, close enough to be inside the rate window
+NEXT_YEAR = date.today().year + 1
+
+
+def make_booking(**overrides):
+    data = {
+        'full_name': 'Asha Menon',
+        'email': 'asha@example.com',
+        'phone': '9876543210',
+        'check_in': date(NEXT_YEAR, 1, 12),
+        'check_out': date(NEXT_YEAR, 1, 15),
+        'selected_rooms': {'1': 1},
+        'total_price': '25500.00',
+        'nights': 3,
+    }
+    data.update(overrides)
+    return RoomBooking.objects.create(**data)
+
+
+def make_admin(email='admin@example.com'):
+    return get_user_model().objects.create_user(
+        username=email.split('@')[0], email=email, password='secret-pass-123',
+        first_name='Admin', last_name='User', is_staff=True,
+    )
+
+
+class RoomAvailabilityTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        RoomType.objects.update(total_rooms=2)
+        invalidate_catalog()
+        self.addCleanup(invalidate_catalog)
+
+    def booking_payload(self, **overrides):
+        payload = {
+            'full_name': 'Ravi Kumar',
+            'email': 'ravi@example.com',
+            'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-01-12',
+            'check_out': f'{NEXT_YEAR}-01-15',
+            'selected_rooms': {'1': 1},
+            'total_price': '25500.00',
+            'nights': 3,
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_occupancy_follows_booking_lifecycle(self):
+        booking = make_booking(selected_rooms={'1': 2, '3': 1})
+        self.assertEqual(RoomNightOccupancy.objects.filter(room_type=1, booked=2).count(), 3)
+        self.assertEqual(get_availability(date(NEXT_YEAR, 1, 14), date(NEXT_YEAR, 1, 16))[1], 0)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertFalse(RoomNightOccupancy.objects.exclude(booked=0).exists())
+
+        booking.status = 'confirmed'
+        booking.check_out = date(NEXT_YEAR, 1, 13)
+        booking.save()
+        self.assertEqual(RoomNightOccupancy.objects.exclude(booked=0).count(), 2)
+
+        booking.delete()
+        self.assertFalse(RoomNightOccupancy.objects.exclude(booked=0).exists())
+
+    def test_availability_endpoint(self):
+        make_booking()
+        response = self.client.get(
+            '/api/room-availability/', {'check_in': f'{NEXT_YEAR}-01-14', 'check_out': f'{NEXT_YEAR}-01-20'}
+        )
+        self.assertEqual(response.status_code, 200)
+        rooms = {room['room_id']: room['available'] for room in response.data['data']['rooms']}
+        self.assertEqual(rooms[1], 1)
+        self.assertEqual(rooms[2], 2)
+
+        response = self.client.get('/api/room-availability/', {'check_in': f'{NEXT_YEAR}-01-14'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            '/api/room-availability/', {'check_in': f'{NEXT_YEAR}-02-30', 'check_out': f'{NEXT_YEAR}-03-02'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_rejects_overbooking(self):
+        make_booking(selected_rooms={'1': 2})
+        response = self.client.post(
+            '/api/room-bookings/', self.booking_payload(check_in=f'{NEXT_YEAR}-01-14'), format='json'
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['unavailable'][0]['available'], 0)
+
+        response = self.client.post(
+            '/api/room-bookings/', self.booking_payload(check_in=f'{NEXT_YEAR}-01-15', check_out=f'{NEXT_YEAR}-01-18'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_post_rejects_malformed_room_selections(self):
+        for selected_rooms in [['1'], '1', {'1': 1.5}, {'1': True}, {'1': '2'}, {'1': 0}, {'one': 1}]:
+            response = self.client.post(
+                '/api/room-bookings/', self.booking_payload(selected_rooms=selected_rooms), format='json'
+            )
+            self.assertEqual(response.status_code, 400, selected_rooms)
+        self.assertFalse(RoomBooking.objects.exists())
+
+        response = self.client.post(
+            '/api/room-bookings/', self.booking_payload(selected_rooms={'01': 1, '1': 1}), format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(RoomBooking.objects.get().selected_rooms, {'1': 2})
+
+    @override_settings(BOOKING_MAX_NIGHTS=30, BOOKING_HORIZON_DAYS=730)
+    def test_post_rejects_overlong_and_far_off_stays(self):
+        today = timezone.localdate()
+        too_long = self.booking_payload(check_in=str(today + timedelta(days=10)), check_out=str(today + timedelta(days=41)))
+        response = self.client.post('/api/room-bookings/', too_long, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('30 nights', str(response.data))
+
+        too_far = self.booking_payload(check_in=str(today + timedelta(days=731)), check_out=str(today + timedelta(days=733)))
+        response = self.client.post('/api/room-bookings/', too_far, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('730 days ahead', str(response.data))
+        self.assertFalse(RoomNightOccupancy.objects.exists())
+
+        response = self.client.post('/api/room-bookings/', self.booking_payload(
+            check_in=str(today + timedelta(days=700)), check_out=str(today + timedelta(days=730))), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_reserve_rooms_rolls_back_when_the_last_room_is_gone(self):
+        check_in, check_out = date(NEXT_YEAR, 1, 12), date(NEXT_YEAR, 1, 15)
+        with transaction.atomic():
+            reserve_rooms(check_in, check_out, {'1': 2})
+            make_booking(selected_rooms={'1': 2})
+        # The locked rows exist for every night of the stay
+        self.assertEqual(RoomNightOccupancy.objects.filter(room_type=1, booked=2).count(), 3)
+
+        with self.assertRaises(RoomUnavailable) as raised:
+            with transaction.atomic():
+                reserve_rooms(check_in, check_out, {'1': 1, '2': 1})
+                make_booking(selected_rooms={'1': 1, '2': 1})
+        self.assertEqual(raised.exception.shortfalls, [{'room_id': 1, 'requested': 1, 'available': 0}])
+        self.assertEqual(RoomBooking.objects.count(), 1)
+        self.assertFalse(RoomNightOccupancy.objects.filter(room_type=2).exclude(booked=0).exists())
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class BookingStatsTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+
+    def test_stats_are_computed_in_two_queries_and_cached_until_a_write(self):
+        make_booking(total_price='1000.00', adults=2, children=1)
+        make_booking(total_price='3000.00', status='confirmed')
+
+        # The booking totals, then tonight's occupancy
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/room-bookings/stats/')
+        stats = response.data['data']
+        self.assertEqual(stats['total_bookings'], 2)
+        self.assertEqual(stats['pending_bookings'], 1)
+        self.assertEqual(stats['confirmed_bookings'], 1)
+        self.assertEqual(Decimal(stats['total_revenue']), Decimal('4000'))
+        self.assertEqual(Decimal(stats['average_booking_value']), Decimal('2000'))
+        self.assertEqual(stats['total_guests'], 4)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/room-bookings/stats/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(status='cancelled')
+        response = self.client.get('/api/room-bookings/stats/')
+        self.assertEqual(response.data['data']['cancelled_bookings'], 1)
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.today = timezone.localdate()
+
+    def rollup(self):
+        return {
+            (row.day, row.status): (row.bookings, row.revenue, row.adults, row.children)
+            for row in DailyBookingRollup.objects.exclude(bookings=0)
+        }
+
+    def test_rollup_follows_every_write_path(self):
+        booking = make_booking(total_price='1000.00', adults=2, children=1)
+        self.assertEqual(self.rollup(), {(self.today, 'pending'): (1, Decimal('1000.00'), 2, 1)})
+
+        booking.status = 'confirmed'
+        booking.total_price = Decimal('1200.00')
+        booking.save()
+        self.assertEqual(self.rollup(), {(self.today, 'confirmed'): (1, Decimal('1200.00'), 2, 1)})
+
+        import_bookings([{
+            'full_name': 'Ravi Kumar', 'email': 'ravi@example.com', 'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-02-01', 'check_out': f'{NEXT_YEAR}-02-03',
+            'selected_rooms': {'1': 1}, 'total_price': '800.00', 'nights': 2, 'status': 'confirmed',
+            'booking_date': (timezone.now() - timedelta(days=40)).isoformat(),
+        }])
+        imported = RoomBooking.objects.get(full_name='Ravi Kumar')
+        earlier = timezone.localdate(imported.booking_date)
+        self.assertEqual(self.rollup()[(earlier, 'confirmed')], (1, Decimal('800.00'), 1, 0))
+
+        bulk_update_status([booking.id, imported.id], 'cancelled')
+        self.assertEqual(self.rollup(), {
+            (self.today, 'cancelled'): (1, Decimal('1200.00'), 2, 1),
+            (earlier, 'cancelled'): (1, Decimal('800.00'), 1, 0),
+        })
+
+        bulk_delete([imported.id])
+        booking.refresh_from_db()
+        booking.delete()
+        self.assertEqual(self.rollup(), {})
+        self.assertEqual(rollup_drift(), {})
+
+    def test_migration_backfills_existing_bookings(self):
+        backfill = import_module('bookings.migrations.0016_backfill_daily_booking_rollup').backfill_rollup
+        make_booking(total_price='1000.00', adults=2, children=1)
+        make_booking(total_price='3000.00', status='confirmed')
+        # As if the bookings predated the rollup table
+        DailyBookingRollup.objects.all().delete()
+
+        backfill(django_apps, None)
+        self.assertEqual(self.rollup(), {
+            (self.today, 'pending'): (1, Decimal('1000.00'), 2, 1),
+            (self.today, 'confirmed'): (1, Decimal('3000.00'), 1, 0),
+        })
+        self.assertEqual(rollup_drift(), {})
+
+    def test_archiving_keeps_history_and_rebuild_fixes_drift(self):
+        make_booking(total_price='1000.00', status='completed',
+                     check_in=self.today - timedelta(days=30), check_out=self.today - timedelta(days=28))
+        make_booking(total_price='500.00', status='confirmed')
+        call_command('archive_bookings', '--older-than-days', '0', stdout=io.StringIO())
+        self.assertEqual(ArchivedRoomBooking.objects.count(), 1)
+        self.assertEqual(rollup_drift(), {})
+
+        # Raw SQL edits bypass the signals
+        RoomBooking.objects.update(total_price=Decimal('700.00'))
+        DailyBookingRollup.objects.filter(status='completed').delete()
+        out = io.StringIO()
+        call_command('rebuild_booking_rollup', '--dry-run', stdout=out)
+        self.assertIn('2 rollup rows drifted', out.getvalue())
+        self.assertEqual(len(rollup_drift()), 2)
+
+        call_command('rebuild_booking_rollup', stdout=io.StringIO())
+        self.assertEqual(rollup_drift(), {})
+        self.assertEqual(self.rollup(), {
+            (self.today, 'completed'): (1, Decimal('1000.00'), 1, 0),
+            (self.today, 'confirmed'): (1, Decimal('700.00'), 1, 0),
+        })
+
+        stats = self.client.get('/api/room-bookings/stats/').data['data']
+        self.assertEqual(stats['total_bookings'], 2)
+        self.assertEqual(Decimal(stats['total_revenue']), Decimal('1700'))
+
+    def test_reconcile_holds_off_booking_writes_on_postgresql(self):
+        connection = transaction.get_connection()
+        with mock.patch.object(connection, 'vendor', 'postgresql'), mock.patch.object(connection, 'cursor') as cursor:
+            lock_for_reconcile()
+        sql = cursor.return_value.__enter__.return_value.execute.call_args[0][0]
+        self.assertEqual(sql, 'LOCK TABLE "bookings_roombooking", "bookings_archivedroombooking", '
+                              '"bookings_dailybookingrollup" IN SHARE ROW EXCLUSIVE MODE')
+
+    def test_revenue_series_reads_the_rollup(self):
+        make_booking(total_price='1000.00', status='confirmed')
+        make_booking(total_price='500.00', status='cancelled')
+        DailyBookingRollup.objects.create(
+            day=self.today - timedelta(days=2), status='completed', bookings=2, revenue=Decimal('300.00'),
+        )
+        start = self.today - timedelta(days=3)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/room-bookings/stats/revenue/', {
+                'start': start.isoformat(), 'end': self.today.isoformat(),
+            })
+        data = response.data['data']
+        self.assertEqual([(p['bookings'], p['revenue']) for p in data['periods']], [
+            (0, '0.00'), (2, '300.00'), (0, '0.00'), (1, '1000.00'),
+        ])
+        self.assertEqual(data['totals'], {'bookings': 3, 'revenue': '1300.00', 'average_booking_value': '433.33'})
+
+        response = self.client.get('/api/room-bookings/stats/revenue/', {
+            'start': start.isoformat(), 'end': self.today.isoformat(), 'group': 'month', 'status': 'cancelled',
+        })
+        self.assertEqual(response.data['data']['totals']['revenue'], '500.00')
+
+        for params in [{'group': 'year'}, {'status': 'lost'}, {'start': '2030-01-02', 'end': '2030-01-01'},
+                       {'start': '2030-02-30'}, {'end': 'yesterday'}]:
+            response = self.client.get('/api/room-bookings/stats/revenue/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class BookingCalendarTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        cache.clear()
+        invalidate_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.start = date(NEXT_YEAR, 3, 1)
+
+    def test_grid_counts_and_cells(self):
+        # Nights Feb 27 .. Mar 1: only Mar 1 is inside the window
+        early = make_booking(check_in=date(NEXT_YEAR, 2, 27), check_out=date(NEXT_YEAR, 3, 2),
+                             selected_rooms={'1': 2}, status='confirmed')
+        both = make_booking(check_in=date(NEXT_YEAR, 3, 1), check_out=date(NEXT_YEAR, 3, 3),
+                            selected_rooms={'1': 1, '5': 1})
+        make_booking(check_in=date(NEXT_YEAR, 3, 2), check_out=date(NEXT_YEAR, 3, 3), status='cancelled')
+        make_booking(check_in=date(NEXT_YEAR, 3, 4), check_out=date(NEXT_YEAR, 3, 6))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/room-bookings/calendar/', {'start': self.start.isoformat(), 'days': 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual((data['start'], data['end'], data['days']), (self.start, date(NEXT_YEAR, 3, 4), 3))
+        self.assertEqual(data['bookings']['id'], [early.id, both.id])
+        self.assertEqual(data['bookings']['booking_reference'], [early.booking_reference, both.booking_reference])
+        self.assertEqual(data['bookings']['status'], ['confirmed', 'pending'])
+
+        rows = {row['id']: row for row in data['room_types']}
+        self.assertEqual(sorted(rows), sorted(RoomType.objects.values_list('id', flat=True)))
+        self.assertEqual(rows[1]['booked'], [3, 1, 0])
+        self.assertEqual(rows[1]['cells'], [[early.id, both.id], [both.id], []])
+        self.assertEqual(rows[5]['booked'], [1, 1, 0])
+        self.assertEqual(rows[2]['cells'], [[], [], []])
+
+        # Cached per window until a booking changes
+        with self.assertNumQueries(0):
+            self.client.get('/api/room-bookings/calendar/', {'start': self.start.isoformat(), 'days': 3})
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(check_in=date(NEXT_YEAR, 3, 3), check_out=date(NEXT_YEAR, 3, 4), selected_rooms={'2': 1})
+        response = self.client.get('/api/room-bookings/calendar/', {'start': self.start.isoformat(), 'days': 3})
+        rows = {row['id']: row for row in response.data['data']['room_types']}
+        self.assertEqual(rows[2]['booked'], [0, 0, 1])
+
+    def test_window_is_validated_and_admin_only(self):
+        for days in ['0', '91', 'many']:
+            response = self.client.get('/api/room-bookings/calendar/', {'days': days})
+            self.assertEqual(response.status_code, 400, days)
+        for start in ['2030-02-30', 'today']:
+            response = self.client.get('/api/room-bookings/calendar/', {'start': start})
+            self.assertEqual(response.status_code, 400, start)
+        response = self.client.get('/api/room-bookings/calendar/')
+        self.assertEqual(response.data['data']['days'], 30)
+        self.assertEqual(APIClient().get('/api/room-bookings/calendar/').status_code, 401)
+
+
+class OccupancyAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.today = timezone.now().date()
+        # 5 room types x 5 rooms
+        self.capacity = sum(RoomType.objects.values_list('total_rooms', flat=True))
+
+    def test_nightly_occupancy_revenue_and_revpar(self):
+        start = self.today - timedelta(days=3)
+        # Two rooms for nights -3..-1, 300.00 a night
+        make_booking(check_in=start, check_out=self.today, selected_rooms={'1': 2},
+                     total_price='900.00', status='confirmed')
+        # One room for nights -1..+1, 100.00 a night, read from the archive
+        archived = make_booking(check_in=self.today - timedelta(days=1), check_out=self.today + timedelta(days=2),
+                                total_price='300.00', status='completed')
+        call_command('archive_bookings', '--older-than-days', '-10', stdout=io.StringIO())
+        self.assertEqual(list(ArchivedRoomBooking.objects.values_list('pk', flat=True)), [archived.pk])
+        make_booking(check_in=start, check_out=self.today, total_price='500.00', status='cancelled')
+
+        response = self.client.get('/api/room-bookings/stats/occupancy/', {
+            'start': start.isoformat(), 'end': (self.today + timedelta(days=2)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        nights = [(p['rooms_sold'], p['revenue']) for p in data['periods']]
+        self.assertEqual(nights, [
+            (2, '300.00'), (2, '300.00'), (3, '400.00'), (1, '100.00'), (1, '100.00'), (0, '0.00'),
+        ])
+        third = data['periods'][2]
+        self.assertEqual(third['occupancy_rate'], round(3 / self.capacity * 100, 1))
+        self.assertEqual(third['adr'], '133.33')
+        self.assertEqual(Decimal(third['revpar']), (Decimal('400') / self.capacity).quantize(Decimal('0.01')))
+        self.assertEqual(data['totals']['revenue'], '1200.00')
+        self.assertEqual(data['totals']['rooms_sold'], 9)
+
+        response = self.client.get('/api/room-bookings/stats/occupancy/', {
+            'start': start.isoformat(), 'end': (self.today + timedelta(days=2)).isoformat(), 'group': 'month',
+        })
+        periods = response.data['data']['periods']
+        self.assertEqual(sum(p['nights'] for p in periods), 6)
+        self.assertEqual(sum(Decimal(p['revenue']) for p in periods), Decimal('1200.00'))
+
+        stats = self.client.get('/api/room-bookings/stats/').data['data']
+        self.assertEqual(stats['occupancy_rate'], round(1 / self.capacity * 100, 1))
+
+    def test_window_validation(self):
+        url = '/api/room-bookings/stats/occupancy/'
+        self.assertEqual(self.client.get(url, {'group': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2030-01-02', 'end': '2030-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2000-01-01', 'end': '2030-01-01'}).status_code, 400)
+        response = self.client.get(url, {'start': '2030-02-30'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Invalid date for start; expected YYYY-MM-DD.')
+        self.assertEqual(self.client.get(url, {'end': 'soon'}).status_code, 400)
+        self.assertEqual(len(self.client.get(url).data['data']['periods']), 30)
+
+
+class BookingListPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.bookings = [
+            make_booking(check_in=date(NEXT_YEAR, 2, day), check_out=date(NEXT_YEAR, 2, day + 1), nights=1)
+            for day in range(1, 8)
+        ]
+
+    def collect(self, params):
+        ids, url, pages = [], '/api/room-bookings/', 0
+        while url:
+            response = self.client.get(url, params if not pages else None)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['data'])
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        ids, pages = self.collect({'limit': 3, 'ordering': 'check_in'})
+        self.assertEqual(ids, [booking.id for booking in self.bookings])
+        self.assertEqual(pages, 3)
+
+        ids, _ = self.collect({'limit': 2, 'ordering': '-check_in'})
+        self.assertEqual(ids, [booking.id for booking in reversed(self.bookings)])
+
+    def test_ties_on_sort_key_are_broken_by_id(self):
+        RoomBooking.objects.update(booking_date=self.bookings[0].booking_date)
+        ids, _ = self.collect({'limit': 2})
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), len(self.bookings))
+
+    def test_rejects_unknown_ordering_and_bad_cursor(self):
+        response = self.client.get('/api/room-bookings/', {'ordering': 'email'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/room-bookings/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_serializer_matches_model_serializer(self):
+        RoomBooking.objects.filter(pk=self.bookings[0].pk).update(
+            special_requests='Late arrival', total_price=Decimal('12345.6'), children=2,
+            booking_date=timezone.now().replace(microsecond=123456),
+        )
+        RoomBooking.objects.filter(pk=self.bookings[1].pk).update(
+            booking_date=timezone.now().replace(microsecond=0), selected_rooms={'2': 1, '4': 3},
+        )
+        queryset = RoomBooking.objects.order_by('id')
+        fast = BookingListSerializer(BookingListSerializer.values(queryset)).data
+        slow = RoomBookingSerializer(queryset, many=True).data
+        self.assertEqual(fast, slow)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+
+        with timezone.override('Asia/Kolkata'):
+            fast = BookingListSerializer(BookingListSerializer.values(queryset)).data
+            slow = RoomBookingSerializer(queryset, many=True).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+
+
+class BookingSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+
+    def test_index_tracks_inserts_updates_and_deletes(self):
+        asha = make_booking(full_name='Asha Menon', email='asha@example.com')
+        make_booking(full_name='Ravi Kumar', email='ravi.kumar@example.org')
+
+        found = search_bookings(RoomBooking.objects.all(), 'men')
+        self.assertEqual([booking.id for booking in found], [asha.id])
+        found = search_bookings(RoomBooking.objects.all(), asha.booking_reference[:5])
+        self.assertEqual([booking.id for booking in found], [asha.id])
+
+        asha.full_name = 'Asha Pillai'
+        asha.save()
+        self.assertFalse(search_bookings(RoomBooking.objects.all(), 'menon').exists())
+        self.assertTrue(search_bookings(RoomBooking.objects.all(), 'pill').exists())
+
+        asha.delete()
+        self.assertFalse(search_bookings(RoomBooking.objects.all(), 'asha').exists())
+
+    def test_search_endpoint_ranks_best_match_first(self):
+        make_booking(full_name='Kumar Das', email='das@example.com')
+        best = make_booking(full_name='Ravi Kumar', email='kumar@example.com')
+        response = self.client.get('/api/room-bookings/search/', {'q': 'kumar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 2)
+        self.assertEqual(response.data['data'][0]['id'], best.id)
+
+        response = self.client.get('/api/room-bookings/', {'search': 'das'})
+        self.assertEqual(len(response.data['data']), 1)
+
+
+class EmailOutboxTests(TestCase):
+    def test_booking_post_queues_email_and_worker_delivers_it(self):
+        response = APIClient().post('/api/room-bookings/', {
+            'full_name': 'Ravi Kumar',
+            'email': 'ravi@example.com',
+            'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-03-01',
+            'check_out': f'{NEXT_YEAR}-03-03',
+            'selected_rooms': {'2': 1},
+            'total_price': '21000.00',
+            'nights': 2,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+
+        queued = OutboundEmail.objects.get()
+        self.assertIn(response.data['booking_reference'], queued.subject)
+
+        self.assertEqual(deliver_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'sent')
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    def test_template_errors_fall_back_to_plain_text_and_keep_the_booking(self):
+        with mock.patch('bookings.outbox.render_to_string', side_effect=TypeError('bad context')):
+            response = APIClient().post('/api/room-bookings/', {
+                'full_name': 'Ravi Kumar',
+                'email': 'ravi@example.com',
+                'phone': '9876500000',
+                'check_in': f'{NEXT_YEAR}-03-01',
+                'check_out': f'{NEXT_YEAR}-03-03',
+                'selected_rooms': {'2': 1},
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.html_body, '')
+        self.assertIn(response.data['booking_reference'], queued.body)
+        self.assertIn('Ravi Kumar', queued.body)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_dead_letter(self):
+        queued = queue_booking_confirmation_email(make_booking())
+
+        class BrokenConnection(LocmemEmailBackend):
+            def send_messages(self, messages):
+                raise ConnectionError('SMTP down')
+
+        self.assertEqual(deliver_batch(connection=BrokenConnection()), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        deliver_batch(connection=BrokenConnection())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'dead')
+        self.assertEqual(queued.last_error, 'SMTP down')
+
+
+class BulkBookingActionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.pending = make_booking(selected_rooms={'1': 2})
+        self.confirmed = make_booking(status='confirmed', selected_rooms={'2': 1})
+        self.cancelled = make_booking(status='cancelled', selected_rooms={'3': 1})
+
+    def booked(self, room_id):
+        return sorted(RoomNightOccupancy.objects.filter(room_type=room_id).values_list('booked', flat=True))
+
+    def test_bulk_status_update_reports_per_id_and_invalidates_once(self):
+        ids = [self.pending.id, self.confirmed.id, self.cancelled.id, 999999]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(
+                '/api/room-bookings/bulk/status/', {'ids': ids, 'status': 'cancelled'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['updated'], 2)
+        self.assertEqual([r['result'] for r in response.data['data']['results']],
+                         ['updated', 'updated', 'unchanged', 'not_found'])
+        self.assertEqual(response.data['data']['results'][0]['previous_status'], 'pending')
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(set(RoomBooking.objects.values_list('status', flat=True)), {'cancelled'})
+        self.assertFalse(RoomNightOccupancy.objects.exclude(booked=0).exists())
+        events = [event for event in hub.since() if event['data']['booking_id'] in ids]
+        self.assertEqual(
+            [(e['type'], e['data']['previous_status']) for e in events[-2:]],
+            [('booking.status_changed', 'pending'), ('booking.status_changed', 'confirmed')],
+        )
+
+        # Reinstating a booking takes its rooms back
+        self.client.post('/api/room-bookings/bulk/status/', {'ids': [self.cancelled.id], 'status': 'confirmed'},
+                         format='json')
+        self.assertEqual(self.booked(3), [1, 1, 1])
+
+    def test_reinstating_bookings_checks_their_rooms_are_still_free(self):
+        RoomType.objects.filter(pk=3).update(total_rooms=1)
+        invalidate_catalog()
+        self.addCleanup(invalidate_catalog)
+        second = make_booking(status='cancelled', selected_rooms={'3': 1})
+
+        response = self.client.post(
+            '/api/room-bookings/bulk/status/', {'ids': [self.cancelled.id, second.id], 'status': 'confirmed'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        first, taken = response.data['data']['results']
+        self.assertEqual(first['result'], 'updated')
+        self.assertEqual(taken['result'], 'unavailable')
+        self.assertEqual(taken['unavailable'], [{'room_id': 3, 'requested': 1, 'available': 0}])
+        self.assertEqual(self.booked(3), [1, 1, 1])
+
+        response = self.client.put(f'/api/room-bookings/{second.id}/status/', {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['unavailable'][0]['room_id'], 3)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'cancelled')
+        self.assertEqual(self.booked(3), [1, 1, 1])
+
+        # Cancelling the first frees the rooms for the second
+        self.client.put(f'/api/room-bookings/{self.cancelled.id}/status/', {'status': 'cancelled'}, format='json')
+        response = self.client.put(f'/api/room-bookings/{second.id}/status/', {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.booked(3), [1, 1, 1])
+
+    def test_bulk_delete_releases_rooms(self):
+        queue_booking_confirmation_email(self.pending)
+        ids = [self.pending.id, self.cancelled.id, 999999]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post('/api/room-bookings/bulk/delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['result'] for r in response.data['data']['results']],
+                         ['deleted', 'deleted', 'not_found'])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(list(RoomBooking.objects.values_list('id', flat=True)), [self.confirmed.id])
+        self.assertEqual(self.booked(1), [0, 0, 0])
+        self.assertEqual(self.booked(2), [1, 1, 1])
+        self.assertIsNone(OutboundEmail.objects.get().booking)
+
+    def test_bulk_requests_are_validated(self):
+        response = self.client.post('/api/room-bookings/bulk/status/', {'ids': [1], 'status': 'lost'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/room-bookings/bulk/delete/', {'ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # A bare list instead of an object
+        response = self.client.post('/api/room-bookings/bulk/status/', [1, 2], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/room-bookings/bulk/delete/', [1, 2], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = APIClient().post('/api/room-bookings/bulk/delete/', {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class BookingArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        long_ago = date.today() - timedelta(days=800)
+        self.old = [
+            make_booking(full_name=f'Old Guest {number}', status=booking_status,
+                         check_in=long_ago, check_out=long_ago + timedelta(days=2))
+            for number, booking_status in enumerate(['completed', 'cancelled', 'completed'])
+        ]
+        # Old but never closed, and recent: both stay live
+        self.stale_pending = make_booking(check_in=long_ago, check_out=long_ago + timedelta(days=2))
+        self.recent = make_booking(status='completed')
+
+    def test_command_moves_old_finished_bookings_in_chunks(self):
+        occupancy = list(RoomNightOccupancy.objects.order_by('id').values_list('room_type', 'date', 'booked'))
+
+        call_command('archive_bookings', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(ArchivedRoomBooking.objects.count(), 0)
+
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_bookings', '--chunk-size', '2', stdout=out)
+        self.assertIn('Archived 3 bookings', out.getvalue())
+
+        self.assertEqual(
+            sorted(ArchivedRoomBooking.objects.values_list('id', flat=True)),
+            [booking.id for booking in self.old],
+        )
+        self.assertEqual(
+            sorted(RoomBooking.objects.values_list('id', flat=True)),
+            [self.stale_pending.id, self.recent.id],
+        )
+        archived = ArchivedRoomBooking.objects.get(pk=self.old[0].pk)
+        self.assertEqual(
+            (archived.booking_reference, archived.selected_rooms, archived.total_price),
+            (self.old[0].booking_reference, self.old[0].selected_rooms, Decimal(self.old[0].total_price)),
+        )
+        # Archiving is a move, not a cancellation
+        self.assertEqual(
+            list(RoomNightOccupancy.objects.order_by('id').values_list('room_type', 'date', 'booked')), occupancy
+        )
+
+    def test_archive_is_only_read_on_request(self):
+        call_command('archive_bookings', stdout=io.StringIO())
+
+        live = self.client.get('/api/room-bookings/', {'limit': 50})
+        self.assertEqual(len(live.data['data']), 2)
+        archived = self.client.get('/api/room-bookings/', {'archive': 'true', 'limit': 2})
+        self.assertEqual(len(archived.data['data']), 2)
+        self.assertIsNotNone(archived.data['next'])
+
+        response = self.client.get('/api/room-bookings/search/', {'q': 'Old Guest'})
+        self.assertEqual(response.data['data'], [])
+        response = self.client.get('/api/room-bookings/search/', {'q': 'Old Guest', 'archive': '1'})
+        self.assertEqual(len(response.data['data']), 3)
+
+        response = APIClient().get(f'/api/room-bookings/{self.old[1].booking_reference}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['id'], self.old[1].id)
+
+
+class SeedBookingsTests(TestCase):
+    def seed(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_bookings', *args, stdout=io.StringIO())
+        return list(RoomBooking.objects.order_by('id').values_list('full_name', 'check_in', 'status'))
+
+    def test_seeded_bookings_are_consistent_and_repeatable(self):
+        rows = self.seed('300', '--batch-size', '120', '--seed', '7')
+        self.assertEqual(len(rows), 300)
+        self.assertEqual(len(set(RoomBooking.objects.values_list('booking_reference', flat=True))), 300)
+        today = date.today()
+        for booking in RoomBooking.objects.all():
+            self.assertEqual(booking.nights, (booking.check_out - booking.check_in).days)
+            self.assertLessEqual(booking.booking_date, timezone.now())
+            if booking.check_out <= today:
+                self.assertIn(booking.status, ('completed', 'cancelled'))
+
+        # bulk_create skips the signals; occupancy must still match the bookings
+        held = Counter()
+        for booking in RoomBooking.objects.all():
+            held.update(footprint(booking.check_in, booking.check_out, booking.selected_rooms, booking.status))
+        stored = {
+            (room_type, night): booked
+            for room_type, night, booked in RoomNightOccupancy.objects.values_list('room_type', 'date', 'booked')
+            if booked
+        }
+        self.assertEqual(stored, dict(held))
+        self.assertEqual(
+            BookingRoom.objects.aggregate(total=Sum('line_total'))['total'],
+            RoomBooking.objects.aggregate(total=Sum('total_price'))['total'],
+        )
+
+        self.assertEqual(self.seed('300', '--seed', '7', '--clear'), rows)
+        self.assertFalse(RoomNightOccupancy.objects.filter(booked__lt=0).exists())
+
+    def test_clear_keeps_what_archived_bookings_hold(self):
+        long_ago = date.today() - timedelta(days=800)
+        make_booking(status='completed', check_in=long_ago, check_out=long_ago + timedelta(days=2))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_bookings', stdout=io.StringIO())
+        archived_nights = list(RoomNightOccupancy.objects.filter(booked__gt=0).values_list('room_type', 'date', 'booked'))
+        self.assertEqual(len(archived_nights), 2)
+
+        self.seed('50', '--seed', '3')
+        self.assertEqual(self.seed('0', '--clear'), [])
+        self.assertEqual(
+            list(RoomNightOccupancy.objects.filter(booked__gt=0).values_list('room_type', 'date', 'booked')),
+            archived_nights,
+        )
+        self.assertFalse(RoomNightOccupancy.objects.filter(booked__lt=0).exists())
+        self.assertEqual(rollup_drift(), {})
+
+
+class RoomBookingAdminTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+
+    def form(self, booking, **changes):
+        # The change form as the admin builds it, selected_rooms read-only
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        form_class = admin_site._registry[RoomBooking].get_form(request, booking)
+        self.assertTrue(issubclass(form_class, RoomBookingAdminForm))
+        data = {**model_to_dict(booking), **changes}
+        return form_class(data, instance=booking)
+
+    def test_admin_edits_go_through_the_room_reservation(self):
+        def day(number):
+            return date(NEXT_YEAR, 1, number)
+
+        make_booking(status='confirmed', selected_rooms={'1': 4}, check_in=day(12), check_out=day(15))
+        cancelled = make_booking(status='cancelled', selected_rooms={'1': 2}, check_in=day(12), check_out=day(13))
+        last_room = make_booking(status='confirmed', selected_rooms={'1': 1}, check_in=day(14), check_out=day(16))
+
+        form = self.form(cancelled, status='confirmed')
+        self.assertFalse(form.is_valid())
+        self.assertIn('1 free', str(form.errors))
+
+        # The nights a booking already holds are not counted against it
+        self.assertTrue(self.form(last_room, check_out=day(17)).is_valid())
+        self.assertFalse(self.form(cancelled, status='confirmed', check_in=day(14), check_out=day(15)).is_valid())
+        form = self.form(cancelled, status='confirmed', check_in=day(16), check_out=day(17))
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(RoomNightOccupancy.objects.get(room_type=1, date=day(16)).booked, 2)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.put(f'/api/room-bookings/{cancelled.id}/status/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RoomNightOccupancy.objects.get(room_type=1, date=day(16)).booked, 0)
+
+
+class BookingRoomTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog()
+        invalidate_rate_calendar()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+
+    def lines(self, booking):
+        return {
+            line.room_type_id: (line.quantity, line.line_total)
+            for line in BookingRoom.objects.filter(booking=booking)
+        }
+
+    def test_line_items_follow_the_booking(self):
+        booking = make_booking(selected_rooms={'1': 1, '5': 2}, total_price='40000.01')
+        lines = self.lines(booking)
+        self.assertEqual({room: quantity for room, (quantity, _) in lines.items()}, {1: 1, 5: 2})
+        self.assertEqual(sum(total for _, total in lines.values()), Decimal('40000.01'))
+
+        booking.selected_rooms = {'5': 1}
+        booking.total_price = Decimal('19500.00')
+        booking.save()
+        self.assertEqual(self.lines(booking), {5: (1, Decimal('19500.00'))})
+        line = BookingRoom.objects.get(booking=booking)
+        self.assertEqual(line.nightly_rate, Decimal('6500.00'))
+
+        booking.status = 'confirmed'
+        with self.assertNumQueries(7):
+            # SAVEPOINT/RELEASE, the previous state, the UPDATE and moving the
+            # booking to another rollup row (created if missing): lines are
+            # not rewritten for a status change
+            booking.save()
+
+        bulk_delete([booking.id])
+        self.assertFalse(BookingRoom.objects.exists())
+
+    def test_backfill_and_room_type_stats(self):
+        make_booking(selected_rooms={'1': 2}, total_price='51000.00')
+        make_booking(selected_rooms={'1': 1, '5': 1}, total_price='45000.00')
+        make_booking(selected_rooms={'1': 1}, total_price='25500.00', status='cancelled')
+        BookingRoom.objects.all().delete()
+
+        call_command('backfill_booking_rooms', '--chunk-size', '2', stdout=io.StringIO())
+        self.assertEqual(BookingRoom.objects.count(), 4)
+        call_command('backfill_booking_rooms', '--rebuild', stdout=io.StringIO())
+        self.assertEqual(BookingRoom.objects.count(), 4)
+
+        response = self.client.get('/api/room-bookings/stats/room-types/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['room_type']: row for row in response.data['data']}
+        self.assertEqual(set(rows), {1, 5})
+        self.assertEqual(rows[1]['bookings'], 2)
+        self.assertEqual(rows[1]['rooms_sold'], 3)
+        self.assertEqual(rows[1]['nights_sold'], 9)
+        self.assertEqual(
+            Decimal(rows[1]['revenue']) + Decimal(rows[5]['revenue']), Decimal('96000.00')
+        )
+        self.assertEqual(rows[1]['name'], RoomType.objects.get(pk=1).name)
+
+        response = self.client.get('/api/room-bookings/stats/room-types/', {'status': 'cancelled'})
+        self.assertEqual(
+            [(row['room_type'], row['revenue']) for row in response.data['data']], [(1, '25500.00')]
+        )
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {
+            'full_name': 'Ravi Kumar',
+            'email': 'ravi@example.com',
+            'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-03-01',
+            'check_out': f'{NEXT_YEAR}-03-03',
+            'selected_rooms': {'2': 1},
+            'nights': 2,
+        }
+
+    def post(self, payload, key='retry-me'):
+        return self.client.post('/api/room-bookings/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post(self.payload)
+        self.assertEqual(first.status_code, 201)
+
+        retry = self.post(self.payload)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(RoomBooking.objects.count(), 1)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+        # Without a key, or with a fresh one, the request runs again
+        self.assertEqual(self.post(self.payload, key='another').status_code, 201)
+        self.assertEqual(RoomBooking.objects.count(), 2)
+
+    def test_key_reused_for_a_different_body_is_rejected(self):
+        self.post(self.payload)
+        response = self.post(dict(self.payload, nights=3, check_out=f'{NEXT_YEAR}-03-04'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(RoomBooking.objects.count(), 1)
+
+    def test_duplicate_in_flight_gets_409_until_the_lease_runs_out(self):
+        self.post(self.payload)
+        IdempotencyKey.objects.update(status='processing', locked_until=timezone.now() + timedelta(seconds=30))
+        response = self.post(self.payload)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # An abandoned request's key is taken over by the next retry
+        IdempotencyKey.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.post(self.payload).status_code, 201)
+        self.assertEqual(RoomBooking.objects.count(), 2)
+
+    def test_expired_keys_are_purged(self):
+        self.post(self.payload)
+        self.post(self.payload, key='kept')
+        IdempotencyKey.objects.filter(key='retry-me').update(expires_at=timezone.now())
+
+        call_command('purge_idempotency_keys', stdout=io.StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['kept'])
+
+
+class BookingExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.first = make_booking(full_name='Asha Menon', check_in=date(NEXT_YEAR, 4, 1), check_out=date(NEXT_YEAR, 4, 3))
+        self.second = make_booking(full_name='Ravi Kumar', check_in=date(NEXT_YEAR, 4, 5), check_out=date(NEXT_YEAR, 4, 6))
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/api/room-bookings/export/', {'type': 'csv', 'ordering': 'check_in'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([row['booking_reference'] for row in rows],
+                         [self.first.booking_reference, self.second.booking_reference])
+        self.assertEqual(json.loads(rows[0]['selected_rooms']), {'1': 1})
+
+        response = self.client.get('/api/room-bookings/export/', {'search': 'ravi'})
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(self.read(response))))), 1)
+
+    def test_ndjson_export(self):
+        response = self.client.get('/api/room-bookings/export/', {'type': 'ndjson', 'status': 'pending'})
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual({line['id'] for line in lines}, {self.first.id, self.second.id})
+        self.assertEqual(lines[0]['total_price'], '25500.00')
+
+        response = self.client.get('/api/room-bookings/export/', {'type': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_filter_dates_are_rejected(self):
+        params = {'check_in_from': f'{NEXT_YEAR}-02-30', 'check_in_to': 'soon'}
+        for url in ['/api/room-bookings/export/', '/api/room-bookings/', '/api/room-bookings/stats/room-types/']:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('check_in_from, check_in_to', response.data['message'])
+
+    def test_csv_export_escapes_formula_cells(self):
+        make_booking(full_name='=HYPERLINK("http://evil.example")', special_requests='@SUM(A1)', phone='+919876543210')
+        rows = list(csv.DictReader(io.StringIO(self.read(self.client.get('/api/room-bookings/export/')))))
+        row = next(row for row in rows if row['full_name'].startswith("'"))
+        self.assertEqual(row['full_name'], '\'=HYPERLINK("http://evil.example")')
+        self.assertEqual(row['special_requests'], "'@SUM(A1)")
+        self.assertEqual(row['phone'], "'+919876543210")
+
+    async def test_export_streams_in_chunks_under_asgi(self):
+        token = await sync_to_async(lambda: str(AccessToken.for_user(make_admin('asgi@example.com'))))()
+        with mock.patch('bookings.export.CHUNK_SIZE', 1):
+            response = await self.async_client.get(
+                '/api/room-bookings/export/', {'type': 'ndjson'}, headers={'Authorization': f'Bearer {token}'})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+
+
+class BookingImportTests(TestCase):
+    def record(self, **overrides):
+        record = {
+            'full_name': 'Legacy Guest',
+            'email': 'legacy@example.com',
+            'phone': '9876511111',
+            'check_in': f'{NEXT_YEAR}-12-01',
+            'check_out': f'{NEXT_YEAR}-12-04',
+            'selected_rooms': {'4': 1},
+            'total_price': '28500.00',
+            'nights': 3,
+            'status': 'completed',
+        }
+        record.update(overrides)
+        return record
+
+    def test_import_creates_valid_rows_and_reports_bad_ones(self):
+        existing = make_booking()
+        records = [
+            self.record(),
+            self.record(check_out=f'{NEXT_YEAR}-11-30'),
+            self.record(booking_reference='OTA123'),
+            self.record(booking_reference=existing.booking_reference),
+            self.record(booking_reference='OTA123'),
+        ]
+        result = import_bookings(records, batch_size=2)
+
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['row'] for error in result['errors']], [1, 3, 4])
+        imported = RoomBooking.objects.exclude(pk=existing.pk)
+        self.assertEqual(len({booking.booking_reference for booking in imported}), 2)
+        self.assertTrue(imported.filter(booking_reference='OTA123', status='completed').exists())
+        self.assertEqual(RoomNightOccupancy.objects.filter(room_type=4, booked=2).count(), 3)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_dry_run_reports_duplicates_across_batches(self):
+        records = [self.record(booking_reference='OTA1'), self.record(), self.record(booking_reference='OTA1')]
+        dry = import_bookings(records, batch_size=2, dry_run=True)
+        self.assertEqual([error['row'] for error in dry['errors']], [2])
+        self.assertFalse(RoomBooking.objects.exists())
+        self.assertEqual(import_bookings(records, batch_size=2), dry)
+
+    def test_validation_skips_fresh_catalog_and_rate_reads(self):
+        with mock.patch('bookings.serializers.get_catalog', wraps=get_catalog) as catalog, \
+                mock.patch('bookings.serializers.get_rate_calendar') as rate_calendar:
+            self.assertEqual(import_bookings([self.record(), self.record()], dry_run=True)['errors'], [])
+        self.assertEqual({call.kwargs['fresh'] for call in catalog.call_args_list}, {False})
+        rate_calendar.assert_not_called()
+
+        self.assertIn('More rooms requested', str(import_bookings([self.record(selected_rooms={'4': 6})])['errors']))
+
+    def test_import_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(make_admin())
+        response = client.post('/api/room-bookings/import/', [self.record(), self.record()], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+
+
+class BookingEventTests(TestCase):
+    def setUp(self):
+        self.admin = make_admin()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_create_and_status_change_publish_after_commit(self):
+        start = hub.last_id
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = make_booking()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'confirmed'
+            booking.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.full_name = 'Asha M.'
+            booking.save()
+
+        events = hub.since(start)
+        self.assertEqual([event['type'] for event in events], ['booking.created', 'booking.status_changed'])
+        self.assertEqual(events[1]['data']['previous_status'], 'pending')
+
+        response = self.client.get('/api/recent-bookings/', {'last_event_id': events[0]['id']})
+        self.assertEqual([event['id'] for event in response.data['data']], [events[1]['id']])
+
+    def test_recent_bookings_reads_real_fields(self):
+        booking = make_booking()
+        response = self.client.get('/api/recent-bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'][0]['booking_id'], booking.id)
+        self.assertIn('Asha Menon', response.data['data'][0]['message'])
+
+    @override_settings(BOOKING_EVENT_POLL_INTERVAL=0.05)
+    async def test_event_stream_resumes_from_last_event_id(self):
+        missed = await sync_to_async(hub.publish)('booking.created', {'booking_id': 1})
+        ticket = (await sync_to_async(self.client.post)('/api/booking-events/ticket/')).data['data']['ticket']
+
+        response = await self.async_client.get(
+            '/api/booking-events/', {'ticket': ticket}, headers={'Last-Event-ID': str(missed['id'] - 1)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertIn(f"id: {missed['id']}".encode(), await anext(chunks))
+
+        live = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        await sync_to_async(hub.publish)('booking.status_changed', {'booking_id': 1})
+        self.assertIn(b'event: booking.status_changed', await asyncio.wait_for(live, 5))
+        await chunks.aclose()
+
+        # Tickets are single-use and JWTs are not accepted in the query string
+        response = await self.async_client.get('/api/booking-events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+        token = str(AccessToken.for_user(self.admin))
+        response = await self.async_client.get('/api/booking-events/', {'token': token})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(BOOKING_EVENT_POLL_INTERVAL=0.05)
+    async def test_event_stream_ends_after_its_maximum_age(self):
+        published = await sync_to_async(hub.publish)('booking.created', {'booking_id': 1})
+        ticket = (await sync_to_async(self.client.post)('/api/booking-events/ticket/')).data['data']['ticket']
+        with mock.patch('bookings.views.EVENT_STREAM_MAX_AGE', 0.2):
+            response = await self.async_client.get('/api/booking-events/', {'ticket': ticket})
+            chunks = [chunk async for chunk in response.streaming_content]
+        # The client learns where to resume from even when nothing happened
+        self.assertEqual(chunks[1], f"id: {published['id']}\n\n".encode())
+        self.assertEqual(len(hub._subscribers), 0)
+
+    @override_settings(BOOKING_EVENT_POLL_INTERVAL=0.05)
+    async def test_stream_receives_events_written_by_other_processes(self):
+        queue = await hub.subscribe()
+        try:
+            # Another worker or a management command only shares the table
+            row = await BookingEvent.objects.acreate(type='booking.created', data={'booking_id': 7})
+            event = await asyncio.wait_for(queue.get(), 5)
+            self.assertEqual((event['id'], event['data']), (row.id, {'booking_id': 7}))
+        finally:
+            hub.unsubscribe(queue)
+
+    def test_stream_tickets_expire(self):
+        ticket = self.client.post('/api/booking-events/ticket/').data['data']['ticket']
+        EventStreamTicket.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(redeem_stream_ticket(ticket))
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.booking = make_booking()
+
+    def test_matching_etag_short_circuits_with_304(self):
+        url = f'/api/room-bookings/{self.booking.booking_reference}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertNotEqual(self.client.get('/api/room-bookings/', {'limit': 5})['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = 'confirmed'
+            self.booking.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_writes_from_another_process_invalidate_etags(self):
+        url = f'/api/room-bookings/{self.booking.booking_reference}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Another worker or a management command only shares the version store
+        caches['versions'].set('version:bookings', ('from-elsewhere', 0), timeout=None)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_errors_carry_no_validators(self):
+        response = APIClient().get('/api/room-bookings/')
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('ETag', response)
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.long_ago = date.today() - timedelta(days=5 * 365)
+        self.live = make_booking(check_in=self.long_ago, check_out=self.long_ago + timedelta(days=2),
+                                 status='confirmed', special_requests='Allergic to nuts')
+        archived = make_booking(check_in=self.long_ago, check_out=self.long_ago + timedelta(days=3),
+                                full_name='Ravi Kumar', email='ravi@example.com', status='completed')
+        self.recent = make_booking(full_name='Meera Nair', email='meera@example.com', phone='9000000000')
+        for booking in (self.live, archived, self.recent):
+            queue_booking_confirmation_email(booking)
+        # Sent when the old bookings were taken
+        OutboundEmail.objects.exclude(booking=self.recent).update(
+            created_at=timezone.now() - timedelta(days=5 * 365 + 10)
+        )
+        call_command('archive_bookings', stdout=io.StringIO())
+        self.archived = ArchivedRoomBooking.objects.get(pk=archived.pk)
+
+    def assertNoGuestDataLeft(self):
+        for value in ('asha@example.com', 'Asha Menon', '9876543210', 'ravi@example.com', 'Ravi Kumar'):
+            for model in (RoomBooking, ArchivedRoomBooking):
+                self.assertFalse(model.objects.filter(Q(email=value) | Q(full_name=value) | Q(phone=value)).exists())
+            for email in OutboundEmail.objects.all():
+                self.assertNotIn(value, ' '.join([email.subject, email.body, email.html_body, str(email.recipients)]))
+        # Bookings inside the retention period keep their emails
+        self.assertIn('Meera Nair', OutboundEmail.objects.get(booking=self.recent).body)
+
+    def test_anonymize_in_chunks_and_resume(self):
+        out = io.StringIO()
+        call_command('enforce_booking_retention', '--dry-run', stdout=out)
+        self.assertIn('1 room bookings with check-out before', out.getvalue())
+        self.assertIn('1 archived room bookings', out.getvalue())
+        self.assertIn('2 outbound emails would be deleted', out.getvalue())
+        self.assertEqual(RoomBooking.objects.filter(anonymized_at__isnull=False).count(), 0)
+
+        # Stop after the first chunk, then run again
+        self.assertEqual(next(enforce_retention('anonymize', chunk_size=1)), (RoomBooking, 1))
+        self.assertFalse(ArchivedRoomBooking.objects.filter(anonymized_at__isnull=False).exists())
+        call_command('enforce_booking_retention', '--chunk-size', '1', stdout=io.StringIO())
+
+        for booking in (RoomBooking.objects.get(pk=self.live.pk), ArchivedRoomBooking.objects.get(pk=self.archived.pk)):
+            self.assertEqual((booking.full_name, booking.email, booking.phone, booking.special_requests),
+                             ('Anonymized guest', 'anonymized@example.invalid', '', None))
+            self.assertIsNotNone(booking.anonymized_at)
+        self.assertEqual(RoomBooking.objects.get(pk=self.live.pk).total_price, Decimal('25500.00'))
+        recent = RoomBooking.objects.get(pk=self.recent.pk)
+        self.assertEqual((recent.full_name, recent.anonymized_at), ('Meera Nair', None))
+        self.assertEqual(rollup_drift(), {})
+
+        self.assertNoGuestDataLeft()
+
+        out = io.StringIO()
+        call_command('enforce_booking_retention', stdout=out)
+        self.assertIn('Anonymized 0 bookings', out.getvalue())
+
+    def test_purge_deletes_both_tiers_and_derived_state(self):
+        call_command('enforce_booking_retention', '--mode', 'purge', '--chunk-size', '1', stdout=io.StringIO())
+
+        self.assertEqual(list(RoomBooking.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertFalse(ArchivedRoomBooking.objects.exists())
+        self.assertFalse(BookingRoom.objects.filter(booking=self.live.pk).exists())
+        self.assertFalse(
+            RoomNightOccupancy.objects.filter(date__lt=date.today(), booked__gt=0).exists()
+        )
+        self.assertEqual(rollup_drift(), {})
+        self.assertNoGuestDataLeft()
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+
+class QueryPlanTests(QueryPlanAssertions, TestCase):
+    # Tables that grow with the business; catalog tables are a handful of rows
+    WATCHED = ['bookings_roombooking', 'bookings_roomnightoccupancy', 'bookings_archivedroombooking']
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        self.booking = make_booking(status='confirmed')
+        make_booking(full_name='Ravi Kumar')
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+
+    def test_admin_list_and_export_use_indexes(self):
+        for params in [
+            {},
+            {'status': 'confirmed'},
+            {'ordering': 'check_in', 'check_in_from': f'{NEXT_YEAR}-01-01', 'limit': 1},
+            {'ordering': '-check_out', 'status': 'pending'},
+            {'archive': 'true'},
+        ]:
+            with self.assertNoFullScans(self.WATCHED):
+                self.get('/api/room-bookings/', params)
+        with self.assertNoFullScans(self.WATCHED):
+            self.get('/api/room-bookings/export/', {'type': 'ndjson', 'status': 'confirmed'})
+
+    def test_lookups_use_indexes(self):
+        for url, params in [
+            ('/api/room-bookings/search/', {'q': 'ravi'}),
+            (f'/api/room-bookings/{self.booking.booking_reference}/', None),
+            ('/api/room-availability/', {'check_in': f'{NEXT_YEAR}-01-12', 'check_out': f'{NEXT_YEAR}-01-14'}),
+            ('/api/recent-bookings/', None),
+            # Dashboard totals and revenue charts read the daily rollup
+            ('/api/room-bookings/stats/', None),
+            ('/api/room-bookings/stats/revenue/', {'group': 'month'}),
+            ('/api/room-bookings/calendar/', {'start': f'{NEXT_YEAR}-01-01', 'days': 90}),
+        ]:
+            with self.assertNoFullScans(self.WATCHED):
+                self.get(url, params)
+        with self.assertNoFullScans(self.WATCHED):
+            list(archivable(date.today()).order_by('id').values_list('id', flat=True)[:100])
+            list(RoomBooking.objects.filter(email='ravi@example.com').values_list('id', flat=True))
+        # The retention walk, one booking per chunk
+        with self.assertNoFullScans(self.WATCHED):
+            list(enforce_retention('anonymize', cutoff=date(NEXT_YEAR + 1, 1, 1), chunk_size=1))
+            list(enforce_retention('purge', cutoff=date(NEXT_YEAR + 1, 1, 1), chunk_size=1))
+        self.assertFalse(RoomBooking.objects.exists())
+
+    def test_harness_catches_a_full_scan(self):
+        with record_queries() as queries:
+            list(RoomBooking.objects.filter(phone='9876543210'))
+        self.assertEqual(len(find_full_scans(queries, self.WATCHED)), 1)
+
+
+class ResponseEncodingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_admin())
+        for _ in range(10):
+            make_booking(special_requests='Quiet room, late check-in \u2028 please')
+
+    def test_fast_renderer_matches_drf_renderer(self):
+        data = {
+            'bookings': BookingListSerializer(BookingListSerializer.values(RoomBooking.objects.all())).data,
+            'price': Decimal('10.50'),
+            'when': timezone.now(),
+            'day': date(NEXT_YEAR, 1, 1),
+            'by_room': {1: 'Deluxe'},
+            'label': gettext_lazy('Pending'),
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch('core.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertIn(b'\\u2028', expected)
+
+    def test_large_lists_are_gzipped_and_small_bodies_are_not(self):
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(body['data']), 10)
+
+        # The weakened validator still revalidates
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/room-bookings/', {'limit': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1)
+    def test_responses_carrying_credentials_are_never_compressed(self):
+        response = self.client.post('/api/booking-events/ticket/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.get('/api/auth/status/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+        # A session cookie is sent by the browser on cross-site requests too
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'session'
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_is_preferred_when_accepted(self):
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))['data']), 10)
+
+        response = self.client.get('/api/room-bookings/', HTTP_ACCEPT_ENCODING='br;q=0.5, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        response = self.client.get('/api/room-bookings/export/', {'type': 'ndjson'},
+                                   HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        rows = brotli.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(rows), 10)
+
+
+@override_settings(METRICS_TOKEN='scrape-token', METRICS_DIR='')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.metrics.registry', MetricsRegistry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        make_booking()
+
+    def scrape(self, **headers):
+        return APIClient().get('/metrics', **headers)
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.force_authenticate(make_admin())
+        self.client.get('/api/room-bookings/')
+        self.client.get('/api/room-bookings/')
+        self.client.get('/api/no-such-endpoint/')
+        self.client.generic('BREW', '/api/room-bookings/')
+
+        response = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        labels = 'endpoint="room_bookings",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'http_response_size_bytes_count{{{labels}}} 2', text)
+        self.assertIn(f'response_render_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'db_query_duration_seconds_total{{{labels}}}', text)
+        self.assertIn('endpoint="unmatched",method="GET",status="404"', text)
+        self.assertIn('endpoint="room_bookings",method="other"', text)
+        self.assertNotIn('BREW', text)
+
+        # Every list request hit the database at least once
+        series = collect()[1]
+        _, counts, total = series[('http_request_db_queries', (('endpoint', 'room_bookings'), ('method', 'GET')))]
+        self.assertEqual(counts[0], 0)
+        self.assertGreaterEqual(total, 2)
+
+    def test_scrape_requires_token_or_staff(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        staff = AccessToken.for_user(make_admin())
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION=f'Bearer {staff}').status_code, 200)
+        guest = get_user_model().objects.create_user(
+            username='guest', email='guest@example.com', password='secret-pass-123',
+            first_name='Guest', last_name='User',
+        )
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(guest)}').status_code, 401)
+        # A token outliving its user must not turn into a 500
+        guest.is_active = False
+        guest.save()
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(guest)}').status_code, 401)
+        staff_user = get_user_model().objects.get(username='admin')
+        staff_user.delete()
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION=f'Bearer {staff}').status_code, 401)
+
+    def test_worker_files_are_summed(self):
+        labels = (('endpoint', 'room_bookings'), ('method', 'GET'))
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other_worker = MetricsRegistry()
+            other_worker.inc('http_requests_total', labels + (('status', '200'),), 3)
+            other_worker.observe('http_request_duration_seconds', labels, 0.2, (0.1, 0.5))
+            with mock.patch('os.getpid', return_value=999999):
+                other_worker.flush(directory)
+
+            self.registry.inc('http_requests_total', labels + (('status', '200'),), 2)
+            self.registry.observe('http_request_duration_seconds', labels, 0.05, (0.1, 0.5))
+            text = render_prometheus(*collect())
+
+        self.assertIn('http_requests_total{endpoint="room_bookings",method="GET",status="200"} 5', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="room_bookings",method="GET",le="0.1"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="room_bookings",method="GET",le="0.5"} 2', text)
+        self.assertIn('http_request_duration_seconds_count{endpoint="room_bookings",method="GET"} 2', text)
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class RoomCatalogTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        invalidate_catalog()
+        self.addCleanup(invalidate_catalog)
+
+    def test_catalog_is_loaded_once_and_reloaded_after_a_change(self):
+        get_catalog()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_catalog()[2].price_per_night, Decimal('10500'))
+            self.assertEqual(get_catalog()[1].total_rooms, 5)
+
+        room = RoomType.objects.get(pk=2)
+        room.price_per_night = Decimal('12000')
+        room.save()
+        self.assertEqual(get_catalog()[2].price_per_night, Decimal('12000'))
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_catalog_follows_changes_made_by_another_process(self):
+        self.assertEqual(get_catalog()[2].price_per_night, Decimal('10500'))
+        # Another worker edits the room type; only the database and the
+        # version store are shared
+        RoomType.objects.filter(pk=2).update(price_per_night=Decimal('12000'))
+        caches['versions'].set('version:room_types', ('from-elsewhere', 0), timeout=None)
+        self.assertEqual(get_catalog()[2].price_per_night, Decimal('12000'))
+
+    def test_booking_price_is_computed_server_side(self):
+        response = APIClient().post('/api/room-bookings/', {
+            'full_name': 'Ravi Kumar',
+            'email': 'ravi@example.com',
+            'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-05-01',
+            'check_out': f'{NEXT_YEAR}-05-04',
+            'selected_rooms': {'2': 1, '5': 2},
+            'total_price': '1.00',
+            'nights': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['nights'], 3)
+        self.assertEqual(Decimal(response.data['data']['total_price']), Decimal('70500'))
+        self.assertEqual(make_booking().room_details[0]['price_per_night'], Decimal('8500'))
+
+    def test_unknown_room_type_is_rejected(self):
+        response = APIClient().post('/api/room-bookings/', {
+            'full_name': 'Ravi Kumar',
+            'email': 'ravi@example.com',
+            'phone': '9876500000',
+            'check_in': f'{NEXT_YEAR}-05-01',
+            'check_out': f'{NEXT_YEAR}-05-02',
+            'selected_rooms': {'99': 1},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class PricingEngineTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('bookings', 'room_types')
+        invalidate_catalog()
+        invalidate_rate_calendar()
+        self.addCleanup(invalidate_catalog)
+        self.addCleanup(invalidate_rate_calendar)
+        self.today = timezone.now().date()
+        # A Monday comfortably inside the rate window
+        self.monday = self.today + timedelta(days=7 - self.today.weekday() + 14)
+
+    def test_weekend_seasonal_and_length_of_stay_rates(self):
+        room = RoomType.objects.get(pk=5)
+        room.weekend_price = Decimal('8000')
+        room.save()
+        SeasonalRate.objects.create(
+            room_type=room, name='Onam', price_per_night=Decimal('9000'),
+            start_date=self.monday + timedelta(days=7), end_date=self.monday + timedelta(days=7),
+        )
+        LengthOfStayDiscount.objects.create(min_nights=7, percent=Decimal('10'))
+
+        calendar = get_rate_calendar()
+        weekday = calendar.quote(self.monday, self.monday + timedelta(days=4), {'5': 2})
+        self.assertEqual(weekday['total_price'], Decimal('52000.00'))
+
+        # Mon-Sun: 4 weekdays, Fri + Sat at weekend rate, Sunday night at weekday rate
+        week = calendar.quote(self.monday, self.monday + timedelta(days=8), {'5': 1})
+        self.assertEqual(week['subtotal'], Decimal(5 * 6500 + 2 * 8000 + 9000))
+        self.assertEqual(week['discount_percent'], Decimal('10'))
+        self.assertEqual(week['total_price'], Decimal('51750.00'))
+
+    def test_batch_quote_endpoint(self):
+        check_in = self.monday.isoformat()
+        check_out = (self.monday + timedelta(days=2)).isoformat()
+        response = APIClient().post('/api/room-quotes/', {'quotes': [
+            {'check_in': check_in, 'check_out': check_out, 'selected_rooms': {'1': 1, '3': 2}},
+            {'check_in': check_out, 'check_out': check_in, 'selected_rooms': {'1': 1}},
+            {'check_in': check_in, 'check_out': check_out, 'selected_rooms': {'42': 1}},
+            {'check_in': '2030-02-30', 'check_out': '2030-03-02', 'selected_rooms': {'1': 1}},
+            {'check_in': check_in, 'check_out': check_out, 'selected_rooms': {'1': 10 ** 30}},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        first, reversed_dates, unknown, impossible, too_many = response.data['data']
+        self.assertEqual(first['total_price'], Decimal('47000.00'))
+        self.assertEqual(first['nights'], 2)
+        self.assertIn('error', reversed_dates)
+        self.assertIn('error', unknown)
+        self.assertIn('valid dates', impossible['error'])
+        self.assertIn('only 5 room(s)', too_many['error'])
+
+        response = APIClient().post('/api/room-bookings/', {
+            'full_name': 'Ravi Kumar', 'email': 'ravi@example.com', 'phone': '9876500000',
+            'check_in': check_in, 'check_out': check_out, 'selected_rooms': {'1': 10 ** 30},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stays_outside_the_rate_window_are_priced_night_by_night(self):
+        room = RoomType.objects.get(pk=5)
+        room.weekend_price = Decimal('8000')
+        room.save()
+        far = self.monday + timedelta(weeks=5 * 52)
+        SeasonalRate.objects.create(
+            room_type=room, name='Onam', price_per_night=Decimal('9000'), start_date=far, end_date=far,
+        )
+        calendar = get_rate_calendar()
+
+        # Mon-Mon five years out: the Monday season, 4 weekdays, Fri + Sat, Sunday
+        week = calendar.quote(far, far + timedelta(days=7), {'5': 1})
+        self.assertEqual(week['subtotal'], Decimal(9000 + 4 * 6500 + 2 * 8000))
+        # Straddling the edge of the window gives the same as pricing each night
+        edge = self.today + timedelta(days=3 * 366 - 3)
+        nightly = sum(
+            calendar.quote(edge + timedelta(days=night), edge + timedelta(days=night + 1), {'5': 1})['subtotal']
+            for night in range(10)
+        )
+        self.assertEqual(calendar.quote(edge, edge + timedelta(days=10), {'5': 1})['subtotal'], nightly)
+        past = self.today - timedelta(days=400)
+        self.assertEqual(calendar.quote(past, past + timedelta(days=1), {'5': 1})['nights'], 1)
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_calendar_follows_rates_changed_by_another_process(self):
+        stay = (self.monday, self.monday + timedelta(days=1), {'5': 1})
+        self.assertEqual(get_rate_calendar().quote(*stay)['total_price'], Decimal('6500.00'))
+        RoomType.objects.filter(pk=5).update(price_per_night=Decimal('7000'))
+        caches['versions'].set('version:room_types', ('from-elsewhere', 0), timeout=None)
+        self.assertEqual(get_rate_calendar().quote(*stay)['total_price'], Decimal('7000.00'))
+
+    def test_calendar_is_built_once_per_catalog_version(self):
+        get_rate_calendar()
+        with self.assertNumQueries(0):
+            get_rate_calendar().quote_many([
+                (self.monday, self.monday + timedelta(days=nights), {'1': 1}) for nights in range(1, 50)
+            ])
@@ -4,9 +4,22 @@ from . import views
 urlpatterns = [
     path('room-bookings/', views.room_bookings_view, name='room_bookings'),
     path('room-bookings/create/', views.room_bookings_view, name='create_room_booking'),  # Backward compatibility
+    path('room-bookings/export/', views.export_bookings_view, name='export_bookings'),
+    path('room-bookings/calendar/', views.booking_calendar_view, name='booking_calendar'),
+    path('room-bookings/import/', views.import_bookings_view, name='import_bookings'),
+    path('room-bookings/search/', views.search_bookings_view, name='search_bookings'),
+    path('room-bookings/bulk/status/', views.bulk_update_booking_status, name='bulk_update_booking_status'),
+    path('room-bookings/bulk/delete/', views.bulk_delete_bookings, name='bulk_delete_bookings'),
     path('room-bookings/stats/', views.get_booking_stats, name='get_booking_stats'),
+    path('room-bookings/stats/occupancy/', views.occupancy_stats, name='occupancy_stats'),
+    path('room-bookings/stats/revenue/', views.revenue_stats, name='revenue_stats'),
+    path('room-bookings/stats/room-types/', views.room_type_stats, name='room_type_stats'),
     path('room-bookings/<int:booking_id>/status/', views.update_booking_status, name='update_booking_status'),
     path('room-bookings/<int:booking_id>/', views.delete_booking, name='delete_booking'),
     path('room-bookings/<str:booking_reference>/', views.get_room_booking, name='get_room_booking'),
+    path('room-quotes/', views.room_quotes_view, name='room_quotes'),
+    path('room-availability/', views.room_availability_view, name='room_availability'),
     path('recent-bookings/', views.get_recent_bookings, name='get_recent_bookings'),
+    path('booking-events/', views.booking_events_stream, name='booking_events'),
+    path('booking-events/ticket/', views.booking_events_ticket, name='booking_events_ticket'),
 ]
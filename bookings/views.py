@@ -1,24 +1,117 @@
 from django.shortcuts import render
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
-from django.db.models import Count, Sum, Avg
+from django.core.cache import cache
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Sum, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
+from decimal import Decimal
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from .models import RoomBooking
-from .serializers import RoomBookingSerializer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from core.conditional import conditional_get
+from core.versioning import get_version, versioned_key
+from .models import ArchivedRoomBooking, DailyBookingRollup, RoomBooking
+from .analytics import GROUPINGS, MAX_WINDOW_DAYS, occupancy_rate_on, occupancy_series
+from .availability import OCCUPYING_STATUSES, RoomUnavailable, get_availability, reserve_change, reserve_rooms
+from .bulk import VALID_STATUSES, bulk_delete, bulk_update_status, parse_ids
+from .calendar_grid import DEFAULT_CALENDAR_DAYS, MAX_CALENDAR_DAYS, booking_calendar
+from .catalog import active_rooms, get_catalog
+from .events import format_sse, hub, issue_stream_ticket, parse_event_id, redeem_stream_ticket
+from .export import EXPORT_FORMATS, STREAMERS, stream_body
+from .idempotency import idempotent
+from .importer import import_bookings
+from .line_items import room_type_totals
+from .outbox import queue_booking_confirmation_email
+from .pagination import BookingCursorPagination
+from .pricing import get_rate_calendar
+from . import rollup
+from .search import search_bookings
+from .serializers import BookingListSerializer, RoomBookingSerializer
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+EVENT_STREAM_KEEPALIVE = 15  # Seconds between comment pings on an idle stream
+EVENT_STREAM_RETRY_MS = 3000  # Reconnect delay suggested to EventSource clients
+# Seconds before a stream ends on its own. Django 4.2 never cancels a
+# streaming response when the client goes away, so this bounds how long an
+# abandoned stream keeps its subscription
+EVENT_STREAM_MAX_AGE = 300
+MAX_QUOTES_PER_REQUEST = 200
+
+
+def _parse_date_param(value):
+    """
+    ``parse_date`` for request values: None when the value is missing,
+    malformed or an impossible date such as 2030-02-30, instead of raising
+    """
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _invalid_date_response(params, *names):
+    """
+    A 400 response naming the ``names`` in ``params`` that were sent but are
+    not valid dates, or None when every one of them is missing or valid
+    """
+    invalid = [name for name in names if params.get(name) and _parse_date_param(params[name]) is None]
+    if not invalid:
+        return None
+    return Response({
+        'success': False,
+        'message': f"Invalid date for {', '.join(invalid)}; expected YYYY-MM-DD."
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def booking_tier(params):
+    """
+    Live bookings by default, the archive table with ?archive=true
+    """
+    if params.get('archive', '').lower() in ('1', 'true', 'yes'):
+        return ArchivedRoomBooking.objects.all()
+    return RoomBooking.objects.all()
+
+
+def filter_bookings(bookings, params):
+    """
+    Apply the list filters shared by the booking list and export endpoints
+
+    Callers reject invalid check-in dates first (``_invalid_date_response``);
+    here they would just be left out.
+    """
+    search = params.get('search')
+    booking_status = params.get('status')
+    check_in_from = _parse_date_param(params.get('check_in_from'))
+    check_in_to = _parse_date_param(params.get('check_in_to'))
+    
+    if search:
+        bookings = search_bookings(bookings, search)
+    if booking_status:
+        bookings = bookings.filter(status=booking_status)
+    if check_in_from:
+        bookings = bookings.filter(check_in__gte=check_in_from)
+    if check_in_to:
+        bookings = bookings.filter(check_in__lte=check_in_to)
+    
+    return bookings
+
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
+@conditional_get('bookings')
+@idempotent('room-bookings')
 def room_bookings_view(request):
     """
     Handle both GET (list bookings) and POST (create booking) requests
@@ -32,41 +125,23 @@ def room_bookings_view(request):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         # Handle listing bookings with optional filters
+        invalid = _invalid_date_response(request.GET, 'check_in_from', 'check_in_to')
+        if invalid:
+            return invalid
         try:
-            bookings = RoomBooking.objects.all()
-            
-            # Apply filters
-            limit = request.GET.get('limit')
-            ordering = request.GET.get('ordering', '-booking_date')
-            search = request.GET.get('search')
-            
-            if search:
-                bookings = bookings.filter(
-                    full_name__icontains=search
-                ) | bookings.filter(
-                    email__icontains=search
-                ) | bookings.filter(
-                    booking_reference__icontains=search
-                )
+            bookings = filter_bookings(booking_tier(request.GET), request.GET)
             
-            # Apply ordering
-            if ordering:
-                bookings = bookings.order_by(ordering)
+            # Ordering, ?limit= and ?cursor= are handled by the keyset paginator
+            paginator = BookingCursorPagination()
+            page = paginator.paginate_queryset(BookingListSerializer.values(bookings), request)
+            return paginator.get_paginated_response(BookingListSerializer(page).data)
             
-            # Apply limit
-            if limit:
-                try:
-                    limit = int(limit)
-                    bookings = bookings[:limit]
-                except ValueError:
-                    pass
-            
-            serializer = RoomBookingSerializer(bookings, many=True)
+        except APIException as e:
             return Response({
-                'success': True,
-                'data': serializer.data
-            }, status=status.HTTP_200_OK)
-            
+                'success': False,
+                'message': 'Invalid pagination parameters',
+                'errors': e.detail
+            }, status=e.status_code)
         except Exception as e:
             logger.error(f"Error fetching bookings: {str(e)}")
             return Response({
@@ -81,18 +156,20 @@ def room_bookings_view(request):
         
         if serializer.is_valid():
             try:
-                # Save the booking
-                booking = serializer.save()
+                # Lock the stay's room-nights, save the booking and queue the
+                # admin notification together; concurrent bookings only wait
+                # on each other when they share a room type and night. The
+                # outbox worker delivers the email after the response is sent
+                with transaction.atomic():
+                    reserve_rooms(
+                        serializer.validated_data['check_in'],
+                        serializer.validated_data['check_out'],
+                        serializer.validated_data['selected_rooms'],
+                    )
+                    booking = serializer.save()
+                    queue_booking_confirmation_email(booking)
                 logger.info(f"New booking created: {booking.booking_reference}")
                 
-                # Send email notification to admin
-                try:
-                    send_booking_confirmation_email(booking)
-                    logger.info(f"Email sent for booking: {booking.booking_reference}")
-                except Exception as e:
-                    logger.error(f"Failed to send email for booking {booking.booking_reference}: {str(e)}")
-                    # Don't fail the booking if email fails
-                
                 return Response({
                     'success': True,
                     'message': 'Booking created successfully!',
@@ -100,6 +177,12 @@ def room_bookings_view(request):
                     'data': RoomBookingSerializer(booking).data
                 }, status=status.HTTP_201_CREATED)
                 
+            except RoomUnavailable as e:
+                return Response({
+                    'success': False,
+                    'message': str(e),
+                    'unavailable': e.shortfalls
+                }, status=status.HTTP_409_CONFLICT)
             except Exception as e:
                 logger.error(f"Error creating booking: {str(e)}")
                 return Response({
@@ -116,122 +199,269 @@ def room_bookings_view(request):
 
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_bookings_view(request):
+    """
+    Stream bookings as CSV or NDJSON (?type=csv|ndjson), honouring the list filters
+    """
+    export_format = request.GET.get('type', 'csv')
+    if export_format not in STREAMERS:
+        return Response({
+            'success': False,
+            'message': f"Unsupported export type. Choose from: {', '.join(STREAMERS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        ordering = BookingCursorPagination().get_ordering(request)
+    except APIException as e:
+        return Response({
+            'success': False,
+            'message': 'Invalid ordering',
+            'errors': e.detail
+        }, status=e.status_code)
+    
+    invalid = _invalid_date_response(request.GET, 'check_in_from', 'check_in_to')
+    if invalid:
+        return invalid
+    
+    bookings = filter_bookings(booking_tier(request.GET), request.GET)
+    bookings = bookings.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+    
+    filename = f"bookings-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response = StreamingHttpResponse(
+        stream_body(request, STREAMERS[export_format](bookings)),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_bookings_view(request):
+    """
+    Bulk import bookings without sending notification emails
+    """
+    records = request.data.get('bookings') if isinstance(request.data, dict) else request.data
+    if not isinstance(records, list) or not records:
+        return Response({
+            'success': False,
+            'message': 'Expected a non-empty list of bookings.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        result = import_bookings(records)
+    except Exception as e:
+        logger.error(f"Error importing bookings: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to import bookings'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    logger.info(f"Imported {result['created']} bookings ({len(result['errors'])} rejected)")
+    return Response({
+        'success': not result['errors'],
+        'created': result['created'],
+        'rejected': len(result['errors']),
+        'errors': result['errors']
+    }, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('bookings')
+def search_bookings_view(request):
+    """
+    Ranked guest search by name, email or booking reference prefix
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({
+            'success': False,
+            'message': 'Search query (q) is required.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    
+    bookings = search_bookings(booking_tier(request.GET), query, ranked=True)
+    return Response({
+        'success': True,
+        'data': BookingListSerializer(BookingListSerializer.values(bookings)[:limit]).data
+    })
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get('bookings')
 def get_room_booking(request, booking_reference):
     """
     Get a specific booking by reference
     """
     try:
-        booking = RoomBooking.objects.get(booking_reference=booking_reference)
+        booking = (
+            RoomBooking.objects.filter(booking_reference=booking_reference).first()
+            # Old bookings may have been moved to the archive table
+            or ArchivedRoomBooking.objects.get(booking_reference=booking_reference)
+        )
         serializer = RoomBookingSerializer(booking)
         return Response({
             'success': True,
             'data': serializer.data
         })
-    except RoomBooking.DoesNotExist:
+    except ArchivedRoomBooking.DoesNotExist:
         return Response({
             'success': False,
             'message': 'Booking not found.'
         }, status=status.HTTP_404_NOT_FOUND)
 
 
-def send_booking_confirmation_email(booking):
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_get('bookings', 'room_types')
+def room_availability_view(request):
     """
-    Send booking confirmation email to admin
+    Get the number of free rooms per room type for a stay
     """
-    try:
-        # Prepare email context
-        context = {
-            'booking': booking,
+    check_in = _parse_date_param(request.GET.get('check_in'))
+    check_out = _parse_date_param(request.GET.get('check_out'))
+    
+    if not check_in or not check_out:
+        return Response({
+            'success': False,
+            'message': 'check_in and check_out are required (YYYY-MM-DD).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if check_out <= check_in:
+        return Response({
+            'success': False,
+            'message': 'Check-out date must be after check-in date.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    free = get_availability(check_in, check_out)
+    rooms = [
+        {
+            'room_id': room.id,
+            'name': room.name,
+            'price_per_night': room.price_per_night,
+            'total_rooms': room.total_rooms,
+            'available': free[room.id],
         }
-        
-        # Render HTML email
-        html_message = render_to_string('bookings/booking_confirmation_email.html', context)
-        
-        # Create plain text version
-        plain_message = strip_tags(html_message)
-        
-        # Email subject
-        subject = f'🏛️ New Heritage Hotel Booking - {booking.booking_reference}'
-        
-        # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.ADMIN_EMAIL],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send booking confirmation email: {str(e)}")
-        raise e
+        for room in active_rooms().values()
+    ]
+    
+    return Response({
+        'success': True,
+        'data': {
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': (check_out - check_in).days,
+            'rooms': rooms
+        }
+    })
+
+
+def _stats_time_bucket(request):
+    # "This month" and "last 7 days" drift without writes; expire ETags with the cache
+    return [int(time.time() // settings.BOOKING_STATS_CACHE_TIMEOUT)]
+
+
+def _compute_booking_stats():
+    """
+    Compute dashboard statistics from the daily booking rollup, one
+    conditional-aggregation query over a row per day and status
+    """
+    today = timezone.localdate()
+    current_month = today.replace(day=1)
+    week_ago = today - timedelta(days=6)
+    
+    totals = DailyBookingRollup.objects.aggregate(
+        total_bookings=Sum('bookings'),
+        pending_bookings=Sum('bookings', filter=Q(status='pending')),
+        confirmed_bookings=Sum('bookings', filter=Q(status='confirmed')),
+        cancelled_bookings=Sum('bookings', filter=Q(status='cancelled')),
+        completed_bookings=Sum('bookings', filter=Q(status='completed')),
+        total_revenue=Sum('revenue'),
+        monthly_revenue=Sum('revenue', filter=Q(day__gte=current_month)),
+        total_adults=Sum('adults'),
+        total_children=Sum('children'),
+        recent_bookings_count=Sum('bookings', filter=Q(day__gte=week_ago)),
+    )
+    total_bookings = totals['total_bookings'] or 0
+    total_revenue = totals['total_revenue'] or Decimal('0')
+    
+    # Rooms taken tonight out of the current inventory
+    occupancy_rate = occupancy_rate_on(timezone.now().date())
+    
+    return {
+        'total_bookings': total_bookings,
+        'pending_bookings': totals['pending_bookings'] or 0,
+        'confirmed_bookings': totals['confirmed_bookings'] or 0,
+        'cancelled_bookings': totals['cancelled_bookings'] or 0,
+        'completed_bookings': totals['completed_bookings'] or 0,
+        'total_revenue': str(total_revenue),
+        'monthly_revenue': str(totals['monthly_revenue'] or 0),
+        'average_booking_value': str(round(total_revenue / total_bookings, 2) if total_bookings else 0),
+        'occupancy_rate': round(occupancy_rate, 1),
+        'total_guests': (totals['total_adults'] or 0) + (totals['total_children'] or 0),
+        'recent_bookings_count': totals['recent_bookings_count'] or 0
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def room_quotes_view(request):
+    """
+    Price many stays in one call
+    
+    Body: {"quotes": [{"check_in": "YYYY-MM-DD", "check_out": "YYYY-MM-DD",
+    "selected_rooms": {"<room id>": <quantity>}}, ...]}
+    """
+    stays = request.data.get('quotes') if isinstance(request.data, dict) else request.data
+    if not isinstance(stays, list) or not stays:
+        return Response({
+            'success': False,
+            'message': 'Expected a non-empty list of quotes.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(stays) > MAX_QUOTES_PER_REQUEST:
+        return Response({
+            'success': False,
+            'message': f'At most {MAX_QUOTES_PER_REQUEST} quotes per request.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    parsed = []
+    for stay in stays:
+        stay = stay if isinstance(stay, dict) else {}
+        selected_rooms = stay.get('selected_rooms')
+        parsed.append((
+            _parse_date_param(str(stay.get('check_in') or '')),
+            _parse_date_param(str(stay.get('check_out') or '')),
+            selected_rooms if isinstance(selected_rooms, dict) else {},
+        ))
+    
+    return Response({
+        'success': True,
+        'data': get_rate_calendar().quote_many(parsed)
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get('bookings', vary_on=_stats_time_bucket)
 def get_booking_stats(request):
     """
     Get booking statistics for the dashboard
     """
     try:
-        # Get all bookings
-        all_bookings = RoomBooking.objects.all()
-        
-        # Count bookings by status
-        pending_count = all_bookings.filter(status='pending').count()
-        confirmed_count = all_bookings.filter(status='confirmed').count()
-        cancelled_count = all_bookings.filter(status='cancelled').count()
-        completed_count = all_bookings.filter(status='completed').count()
-        
-        # Calculate total revenue
-        total_revenue = all_bookings.aggregate(
-            total=Sum('total_price')
-        )['total'] or 0
-        
-        # Calculate monthly revenue (current month)
-        current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_revenue = all_bookings.filter(
-            booking_date__gte=current_month
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
-        # Calculate average booking value
-        avg_booking_value = all_bookings.aggregate(
-            avg=Avg('total_price')
-        )['avg'] or 0
-        
-        # Calculate total guests
-        total_guests = all_bookings.aggregate(
-            total_adults=Sum('adults'),
-            total_children=Sum('children')
-        )
-        total_guests = (total_guests['total_adults'] or 0) + (total_guests['total_children'] or 0)
-        
-        # Recent bookings count (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_bookings_count = all_bookings.filter(booking_date__gte=week_ago).count()
-        
-        # Calculate occupancy rate (simplified - assuming 100 total rooms)
-        total_rooms = 100
-        occupied_rooms = confirmed_count + completed_count
-        occupancy_rate = (occupied_rooms / total_rooms) * 100 if total_rooms > 0 else 0
-        
-        stats = {
-            'total_bookings': all_bookings.count(),
-            'pending_bookings': pending_count,
-            'confirmed_bookings': confirmed_count,
-            'cancelled_bookings': cancelled_count,
-            'completed_bookings': completed_count,
-            'total_revenue': str(total_revenue),
-            'monthly_revenue': str(monthly_revenue),
-            'average_booking_value': str(round(avg_booking_value, 2)),
-            'occupancy_rate': round(occupancy_rate, 1),
-            'total_guests': total_guests,
-            'recent_bookings_count': recent_bookings_count
-        }
+        cache_key = versioned_key('bookings', 'stats')
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = _compute_booking_stats()
+            cache.set(cache_key, stats, settings.BOOKING_STATS_CACHE_TIMEOUT)
         
         return Response({
             'success': True,
@@ -246,6 +476,214 @@ def get_booking_stats(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _today(request):
+    return [timezone.now().date()]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('bookings', 'room_types', vary_on=_today)
+def occupancy_stats(request):
+    """
+    Occupancy, ADR and RevPAR per night, week or month
+
+    Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive, default the last 30
+    nights) and ?group=night|week|month (default night).
+    """
+    invalid = _invalid_date_response(request.GET, 'start', 'end')
+    if invalid:
+        return invalid
+    today = timezone.now().date()
+    start = _parse_date_param(request.GET.get('start')) or today - timedelta(days=29)
+    end = _parse_date_param(request.GET.get('end')) or max(today, start)
+    group = request.GET.get('group', 'night')
+
+    if group not in GROUPINGS:
+        return Response({
+            'success': False,
+            'message': f"group must be one of: {', '.join(GROUPINGS)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if end < start or (end - start).days >= MAX_WINDOW_DAYS:
+        return Response({
+            'success': False,
+            'message': f'end must be on or after start, at most {MAX_WINDOW_DAYS} nights later.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        cache_key = versioned_key('bookings', 'occupancy', get_version('room_types'), start, end, group)
+        data = cache.get(cache_key)
+        if data is None:
+            data = occupancy_series(start, end, group)
+            cache.set(cache_key, data, settings.BOOKING_STATS_CACHE_TIMEOUT)
+
+        return Response({
+            'success': True,
+            'data': data
+        })
+
+    except Exception as e:
+        logger.error(f"Error fetching occupancy stats: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch occupancy statistics'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('bookings', vary_on=_today)
+def revenue_stats(request):
+    """
+    Bookings taken and their revenue per day, week or month
+
+    Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (booking dates, inclusive,
+    default the last 30 days), ?group=day|week|month (default day) and
+    ?status= (repeatable or comma-separated; default every status but
+    cancelled). Reads the daily rollup, so the cost follows the days shown.
+    """
+    invalid = _invalid_date_response(request.GET, 'start', 'end')
+    if invalid:
+        return invalid
+    today = timezone.localdate()
+    start = _parse_date_param(request.GET.get('start')) or today - timedelta(days=29)
+    end = _parse_date_param(request.GET.get('end')) or max(today, start)
+    group = request.GET.get('group', 'day')
+    statuses = [
+        value.strip() for param in request.GET.getlist('status') for value in param.split(',') if value.strip()
+    ] or list(OCCUPYING_STATUSES)
+
+    if group not in rollup.GROUPINGS:
+        return Response({
+            'success': False,
+            'message': f"group must be one of: {', '.join(rollup.GROUPINGS)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if end < start or (end - start).days >= MAX_WINDOW_DAYS:
+        return Response({
+            'success': False,
+            'message': f'end must be on or after start, at most {MAX_WINDOW_DAYS} days later.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    invalid = [value for value in statuses if value not in VALID_STATUSES]
+    if invalid:
+        return Response({
+            'success': False,
+            'message': f"status must be one of: {', '.join(VALID_STATUSES)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        statuses = sorted(set(statuses))
+        cache_key = versioned_key('bookings', 'revenue', start, end, group, *statuses)
+        data = cache.get(cache_key)
+        if data is None:
+            data = rollup.revenue_series(start, end, statuses, group)
+            cache.set(cache_key, data, settings.BOOKING_STATS_CACHE_TIMEOUT)
+
+        return Response({
+            'success': True,
+            'data': data
+        })
+
+    except Exception as e:
+        logger.error(f"Error fetching revenue stats: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch revenue statistics'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('bookings', 'room_types', vary_on=_today)
+def booking_calendar_view(request):
+    """
+    Room type x night grid of the bookings holding rooms in a window
+
+    Query: ?start=YYYY-MM-DD (default today) and ?days= (default
+    DEFAULT_CALENDAR_DAYS, at most MAX_CALENDAR_DAYS). ``end`` in the
+    response is the check-out day of the last night. Booking fields come as
+    one list per column; each room type has a rooms-taken count and the
+    booking ids staying in it for every night.
+    """
+    invalid = _invalid_date_response(request.GET, 'start')
+    if invalid:
+        return invalid
+    start = _parse_date_param(request.GET.get('start')) or timezone.now().date()
+    try:
+        days = int(request.GET.get('days') or DEFAULT_CALENDAR_DAYS)
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_CALENDAR_DAYS:
+        return Response({
+            'success': False,
+            'message': f'days must be a whole number between 1 and {MAX_CALENDAR_DAYS}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        cache_key = versioned_key('bookings', 'calendar', get_version('room_types'), start, days)
+        data = cache.get(cache_key)
+        if data is None:
+            data = booking_calendar(start, days)
+            cache.set(cache_key, data, settings.BOOKING_STATS_CACHE_TIMEOUT)
+
+        return Response({
+            'success': True,
+            'data': data
+        })
+
+    except Exception as e:
+        logger.error(f"Error fetching booking calendar: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch booking calendar'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get('bookings')
+def room_type_stats(request):
+    """
+    Bookings, rooms, nights sold and revenue per room type
+
+    Takes the booking list filters (?status=, ?check_in_from=, ?check_in_to=,
+    ?search=); without ?status= cancelled bookings are left out.
+    """
+    invalid = _invalid_date_response(request.GET, 'check_in_from', 'check_in_to')
+    if invalid:
+        return invalid
+    try:
+        bookings = filter_bookings(RoomBooking.objects.all(), request.GET)
+        if not request.GET.get('status'):
+            bookings = bookings.filter(status__in=OCCUPYING_STATUSES)
+
+        catalog = get_catalog()
+        data = []
+        for row in room_type_totals(bookings):
+            room = catalog.get(row['room_type'])
+            nights_sold = row['nights_sold'] or 0
+            revenue = (row['revenue'] or Decimal('0')).quantize(Decimal('0.01'))
+            data.append({
+                'room_type': row['room_type'],
+                'name': room.name if room else None,
+                'bookings': row['bookings'],
+                'rooms_sold': row['rooms_sold'],
+                'nights_sold': nights_sold,
+                'revenue': str(revenue),
+                'average_nightly_rate': str((revenue / nights_sold).quantize(Decimal('0.01'))) if nights_sold else None,
+            })
+
+        return Response({
+            'success': True,
+            'data': data
+        })
+
+    except Exception as e:
+        logger.error(f"Error fetching room type stats: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to fetch room type statistics'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def update_booking_status(request, booking_id):
@@ -253,12 +691,16 @@ def update_booking_status(request, booking_id):
     Update booking status
     """
     try:
-        booking = RoomBooking.objects.get(id=booking_id)
         new_status = request.data.get('status')
         
         if new_status in ['pending', 'confirmed', 'cancelled', 'completed']:
-            booking.status = new_status
-            booking.save()
+            with transaction.atomic():
+                booking = RoomBooking.objects.select_for_update().get(id=booking_id)
+                # A cancelled booking only gets its rooms back if they are still free
+                stay = (booking.check_in, booking.check_out, booking.selected_rooms)
+                reserve_change((*stay, booking.status), (*stay, new_status))
+                booking.status = new_status
+                booking.save()
             
             return Response({
                 'success': True,
@@ -271,6 +713,12 @@ def update_booking_status(request, booking_id):
                 'message': 'Invalid status'
             }, status=status.HTTP_400_BAD_REQUEST)
             
+    except RoomUnavailable as e:
+        return Response({
+            'success': False,
+            'message': str(e),
+            'unavailable': e.shortfalls
+        }, status=status.HTTP_409_CONFLICT)
     except RoomBooking.DoesNotExist:
         return Response({
             'success': False,
@@ -312,34 +760,127 @@ def delete_booking(request, booking_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_update_booking_status(request):
+    """
+    Update the status of several bookings at once
+    
+    Body: {"ids": [1, 2, 3], "status": "confirmed"}. Returns one result per id.
+    """
+    if not isinstance(request.data, dict):
+        return Response({
+            'success': False,
+            'message': 'Expected a JSON object with ids and status.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    new_status = request.data.get('status')
+    if new_status not in VALID_STATUSES:
+        return Response({
+            'success': False,
+            'message': 'Invalid status'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        ids = parse_ids(request.data.get('ids'))
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        results = bulk_update_status(ids, new_status)
+        updated = sum(1 for result in results if result['result'] == 'updated')
+        return Response({
+            'success': True,
+            'message': f'{updated} booking(s) updated',
+            'data': {'updated': updated, 'results': results}
+        })
+    except Exception as e:
+        logger.error(f"Error bulk updating booking status: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to update booking status'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_delete_bookings(request):
+    """
+    Delete several bookings at once
+    
+    Body: {"ids": [1, 2, 3]}. Returns one result per id.
+    """
+    if not isinstance(request.data, dict):
+        return Response({
+            'success': False,
+            'message': 'Expected a JSON object with ids.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        ids = parse_ids(request.data.get('ids'))
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        results = bulk_delete(ids)
+        deleted = sum(1 for result in results if result['result'] == 'deleted')
+        return Response({
+            'success': True,
+            'message': f'{deleted} booking(s) deleted',
+            'data': {'deleted': deleted, 'results': results}
+        })
+    except Exception as e:
+        logger.error(f"Error bulk deleting bookings: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to delete bookings'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_recent_bookings(request):
     """
     Get recent bookings for notifications
+    
+    With ?last_event_id= the answer is the stored booking events after that
+    id; prefer the /api/booking-events/ stream.
     """
     try:
+        last_event_id = parse_event_id(request.GET.get('last_event_id'))
+        if last_event_id is not None:
+            return Response({
+                'success': True,
+                'data': hub.since(last_event_id),
+                'last_event_id': hub.last_id
+            })
+        
         # Get bookings from last 24 hours
         yesterday = timezone.now() - timedelta(days=1)
         recent_bookings = RoomBooking.objects.filter(
-            created_at__gte=yesterday
-        ).order_by('-created_at')[:10]
+            booking_date__gte=yesterday
+        ).order_by('-booking_date')[:10]
         
         notifications = []
         for booking in recent_bookings:
+            rooms = ', '.join(room['name'] for room in booking.room_details) or 'a room'
             notifications.append({
                 'id': booking.id,
                 'type': 'new_booking',
                 'title': f'New Booking: {booking.booking_reference}',
-                'message': f'{booking.guest_name} booked {booking.room_type} for {booking.check_in_date}',
-                'timestamp': booking.created_at.isoformat(),
+                'message': f'{booking.full_name} booked {rooms} for {booking.check_in}',
+                'timestamp': booking.booking_date.isoformat(),
                 'read': False,
                 'booking_id': booking.id
             })
         
         return Response({
             'success': True,
-            'data': notifications
+            'data': notifications,
+            'last_event_id': hub.last_id
         })
         
     except Exception as e:
@@ -348,3 +889,112 @@ def get_recent_bookings(request):
             'success': False,
             'message': 'Failed to fetch recent bookings'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _authenticate_event_stream(request):
+    """
+    Resolve the user for the event stream from a JWT in the Authorization
+    header, a ?ticket= from /api/booking-events/ticket/ (EventSource cannot
+    set headers) or the session
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    if raw_token:
+        try:
+            return authenticator.get_user(authenticator.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed):
+            return None
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return redeem_stream_ticket(ticket)
+    return request.user if request.user.is_authenticated else None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def booking_events_ticket(request):
+    """
+    Issue a single-use ticket for opening /api/booking-events/?ticket=
+    
+    Tickets expire after EVENT_STREAM_TICKET_TTL seconds, so unlike a JWT in
+    the query string one that ends up in an access log is worthless.
+    """
+    try:
+        return Response({
+            'success': True,
+            'data': {
+                'ticket': issue_stream_ticket(request.user),
+                'expires_in': settings.EVENT_STREAM_TICKET_TTL
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error issuing event stream ticket: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Failed to issue event stream ticket'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def _booking_event_stream(last_event_id):
+    queue = await hub.subscribe()
+    try:
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + EVENT_STREAM_MAX_AGE
+        yield f'retry: {EVENT_STREAM_RETRY_MS}\n\n'
+        replayed = set()
+        if last_event_id is not None:
+            # Replay what the client missed while it was disconnected
+            for event in await sync_to_async(hub.since)(last_event_id):
+                replayed.add(event['id'])
+                yield format_sse(event)
+        if not replayed:
+            # An id-only message sets the client's Last-Event-ID without
+            # firing an event, so the next connection resumes from here
+            yield f'id: {await sync_to_async(lambda: hub.last_id)()}\n\n'
+        
+        while True:
+            remaining = closes_at - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), min(EVENT_STREAM_KEEPALIVE, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            # Ids commit out of order, so skip exactly what was replayed
+            if event['id'] in replayed:
+                replayed.discard(event['id'])
+                continue
+            yield format_sse(event)
+    finally:
+        hub.unsubscribe(queue)
+
+
+async def booking_events_stream(request):
+    """
+    Server-Sent Events stream of booking notifications for the admin dashboard
+    
+    Serve through core.asgi so an open stream does not pin a worker thread.
+    Reconnecting clients resume via the Last-Event-ID header (or ?last_event_id=).
+    The stream ends after EVENT_STREAM_MAX_AGE seconds; tickets are single-use,
+    so the dashboard then fetches a new one and reopens the stream with
+    ?last_event_id= set to the EventSource's lastEventId.
+    """
+    user = await sync_to_async(_authenticate_event_stream)(request)
+    if user is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    last_event_id = parse_event_id(
+        request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    )
+    response = StreamingHttpResponse(
+        _booking_event_stream(last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -52,4 +52,8 @@ fi
 
 # Run migrations
 echo "=== Running migrations ==="
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Shared resource versions (CACHES['versions'])
+echo "=== Creating cache tables ==="
+python manage.py createcachetable
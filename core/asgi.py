@@ -3,6 +3,13 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production serves the project through this module (``gunicorn
+core.asgi:application -k uvicorn.workers.UvicornWorker``, see render.yaml) so
+the ``/api/booking-events/`` Server-Sent Events stream works: under ASGI each
+open stream is a coroutine waiting on the booking event hub rather than a
+blocked worker thread. Events go through the database, so any number of
+workers can serve the stream.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,32 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+"""
+import math
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """
+    Run the block against a freshly migrated throwaway database.
+
+    Uses the same machinery as the test runner, so benchmarks never touch
+    real bookings.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
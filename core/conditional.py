@@ -0,0 +1,60 @@
+"""
+Conditional GET support driven by ``core.versioning`` counters.
+
+A view decorated with ``conditional_get('bookings')`` gets a strong ETag built
+from the resource versions, the requesting user and the full path, so a
+matching ``If-None-Match`` is answered with 304 before the view runs a
+single query (the versions themselves are re-read from the shared store at
+most every ``VERSION_CHECK_INTERVAL`` seconds).
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .versioning import get_versions
+
+
+def compute_etag(request, versions, extra=()):
+    user = getattr(request, 'user', None)
+    parts = [f'{resource}={version}' for resource, (version, _) in versions.items()]
+    parts.append(str(user.pk) if user is not None and user.is_authenticated else 'anonymous')
+    parts.append(request.get_full_path())
+    parts.extend(str(part) for part in extra)
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def conditional_get(*resources, vary_on=None):
+    """
+    Add ETag / Last-Modified validators to successful GETs and answer
+    matching conditional requests with 304.
+
+    ``vary_on(request)`` may return extra values the response depends on that
+    are not covered by the resource versions (e.g. today's date).
+    Apply it inside ``@api_view`` so authentication has already run.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            extra = vary_on(request) if vary_on else ()
+            versions = get_versions(*resources)
+            etag = compute_etag(request, versions, extra)
+            last_modified = max(modified for _, modified in versions.values())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+            return response
+        return wrapper
+    return decorator
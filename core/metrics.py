@@ -0,0 +1,295 @@
+"""
+Per-endpoint request metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and labels it with its URL name; a
+database execute wrapper (installed on each new connection) counts the SQL
+queries and time spent inside the request, and ``FastJSONRenderer`` reports
+how long rendering took. Numbers are aggregated in-process under a lock.
+
+With several gunicorn workers set ``METRICS_DIR`` to a directory shared by
+the workers (cleared on deploy): each process writes its totals to
+``<pid>.json`` at most every ``METRICS_FLUSH_INTERVAL`` seconds and
+``/metrics`` sums every file, so counters keep counting across workers and
+worker restarts.
+"""
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Any other method is labelled "other", so clients cannot mint new series
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Time from the request reaching Django to the response leaving it.'),
+    'http_response_size_bytes': ('histogram', 'Size of non-streaming response bodies.'),
+    'http_request_db_queries': ('histogram', 'SQL queries run per request.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent waiting on SQL queries.'),
+    'response_render_duration_seconds': ('histogram', 'Time spent encoding API responses.'),
+}
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'render_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = None
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper: charge the query to the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def record_render_time(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.render_seconds = (stats.render_seconds or 0.0) + seconds
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One slot per bucket plus +Inf, then sum
+                histogram = self._histograms[key] = [list(buckets), [0] * (len(buckets) + 1), 0.0]
+            histogram[1][bisect_left(buckets, value)] += 1
+            histogram[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, list(labels), bounds, list(counts), total]
+                    for (name, labels), (bounds, counts, total) in self._histograms.items()
+                ],
+            }
+
+    def flush(self, directory):
+        """Write this process's totals to ``<directory>/<pid>.json`` atomically."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(handle.name, directory / f'{os.getpid()}.json')
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self, directory, interval):
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush(directory)
+
+
+registry = MetricsRegistry()
+
+
+def merge(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, bounds, counts, total in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key not in histograms:
+                histograms[key] = [bounds, [0] * len(counts), 0.0]
+            merged = histograms[key]
+            merged[1] = [a + b for a, b in zip(merged[1], counts)]
+            merged[2] += total
+    return counters, histograms
+
+
+def collect():
+    """Return the merged metrics of every worker (or just this process)."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return merge([registry.snapshot()])
+    registry.flush(directory)
+    snapshots = []
+    for path in Path(directory).glob('*.json'):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # A worker is replacing its file right now; it is in the next scrape
+            continue
+    return merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(counters, histograms):
+    lines = []
+    for name, (kind, description) in HELP.items():
+        series = counters if kind == 'counter' else histograms
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in keys:
+            labels = key[1]
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(series[key])}')
+                continue
+            bounds, counts, total = series[key]
+            cumulative = 0
+            for bound, count in zip([*bounds, '+Inf'], counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Unrouted paths (404s, scanners) share one label
+        return 'unmatched'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, seconds):
+        endpoint = endpoint_name(request)
+        method = request.method if request.method in METHODS else 'other'
+        labels = (('endpoint', endpoint), ('method', method))
+        registry.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+        registry.observe('http_request_duration_seconds', labels, seconds, LATENCY_BUCKETS)
+        registry.observe('http_request_db_queries', labels, stats.queries, QUERY_COUNT_BUCKETS)
+        registry.inc('db_query_duration_seconds_total', labels, stats.db_seconds)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content), SIZE_BUCKETS)
+        if stats.render_seconds is not None:
+            registry.observe('response_render_duration_seconds', labels, stats.render_seconds, LATENCY_BUCKETS)
+        if settings.METRICS_DIR:
+            registry.maybe_flush(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+
+def _authorized(request):
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    if header.startswith('Bearer '):
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import TokenError
+
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, TokenError):
+            # Bad token, or a deleted or inactive user
+            return False
+        return bool(result and result[0].is_staff)
+    return False
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: METRICS_TOKEN bearer token or a staff user."""
+    if not _authorized(request):
+        response = HttpResponse('Authentication required\n', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(
+        render_prometheus(*collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+connection_created.connect(install_query_recorder)
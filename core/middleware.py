@@ -0,0 +1,127 @@
+"""
+Response compression for the API.
+
+Django's GZipMiddleware extended with brotli (when the optional ``brotli``
+package is installed), Accept-Encoding q-value negotiation, a size threshold
+(``COMPRESSION_MIN_SIZE``) and a content-type allow list, so event streams
+and binary media are passed through untouched.
+
+BREACH: compressing a secret next to attacker-chosen text in the same body
+lets the response length reveal the secret. So nothing is compressed that
+carries credentials or that a cross-site page could make the browser fetch
+with them: paths under ``COMPRESSION_EXCLUDE_PATHS`` (the auth endpoints
+that return JWTs, stream tickets, the Django admin), responses that set
+cookies, and requests that arrive with a session cookie. The rest of the
+API is authenticated by a bearer token that browsers never attach on their
+own, so compressing it reveals nothing an attacker could not read anyway.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Brotli quality for responses compressed on the fly (0-11); 5 is about as
+# fast as gzip -6 and noticeably smaller.
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def accepted_encodings(header):
+    """Parse an Accept-Encoding header into ``{coding: q}``."""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    """Return 'br', 'gzip' or None for an Accept-Encoding header."""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    # On equal q-values the first (smaller output) candidate wins
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type == 'text/event-stream':
+        # Buffering in the compressor would hold events back
+        return False
+    return content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES or content_type.endswith('+json')
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def carries_secrets(request, response):
+    """True for exchanges BREACH could extract a token or session from."""
+    return (
+        request.path.startswith(tuple(settings.COMPRESSION_EXCLUDE_PATHS))
+        or bool(response.cookies)
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response):
+            return response
+        if carries_secrets(request, response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None or (response.streaming and response.is_async):
+            return response
+
+        if response.streaming:
+            response.streaming_content = _brotli_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed representation only weakly matches the original ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,115 @@
+"""
+EXPLAIN-based guard against full table scans.
+
+Tests record the SQL an endpoint runs with ``record_queries()`` and pass it to
+``find_full_scans()``, which asks the database for each query's plan and
+reports the ones that read a watched table in full, whether sequentially or
+by walking an entire index. On PostgreSQL the plans are taken with
+``enable_seqscan`` off, so a sequential scan only shows up when no index can
+serve the query at all, whatever the table size.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+
+# SQLite: "SCAN t" / "SCAN t USING [COVERING] INDEX i" walk the whole table or
+# index; "SEARCH t USING ..." is an index lookup or range.
+SQLITE_SCAN = re.compile(r'^SCAN (\S+)(?: AS \S+)?(?P<index> USING (?:COVERING )?INDEX)?')
+# PostgreSQL: index scans without an "Index Cond:" walk the whole index
+POSTGRES_NODE = re.compile(
+    r'(?:->\s*)?(?:(?P<seq>Seq Scan)|(?P<index>Index (?:Only )?Scan(?: Backward)? using \S+)) on (\S+)'
+)
+
+
+@contextmanager
+def record_queries(using=connection):
+    """Collect ``(sql, params)`` for every SELECT run inside the block."""
+    queries = []
+
+    def wrapper(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with using.execute_wrapper(wrapper):
+        yield queries
+
+
+def explain(sql, params, using=connection):
+    """Return the plan of one query as a list of text lines."""
+    with using.cursor() as cursor:
+        if using.vendor == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN {sql}', params)
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_top_n(sql):
+    """An unfiltered ``ORDER BY ... LIMIT n``: walking an index in order is fine."""
+    return ' LIMIT ' in sql and ' WHERE ' not in sql
+
+
+def full_scans(plan, tables, vendor, top_n=False):
+    """
+    Return the watched tables ``plan`` reads in full.
+
+    Walking a whole index in order only counts when ``top_n`` is false.
+    """
+    scanned = []
+    for number, line in enumerate(plan):
+        if vendor == 'postgresql':
+            match = POSTGRES_NODE.search(line)
+            if not match or match.group(3) not in tables:
+                continue
+            if match.group('index'):
+                # The node's own detail lines run until the next "->" node
+                details = []
+                for detail in plan[number + 1:]:
+                    if '->' in detail:
+                        break
+                    details.append(detail)
+                if top_n or any('Index Cond:' in detail for detail in details):
+                    continue
+            scanned.append(match.group(3))
+        else:
+            match = SQLITE_SCAN.search(line.strip())
+            if not match or match.group(1) not in tables:
+                continue
+            if match.group('index') and top_n:
+                continue
+            scanned.append(match.group(1))
+    return scanned
+
+
+def find_full_scans(queries, tables, using=connection):
+    """
+    Return ``[(sql, plan)]`` for the recorded queries that fully scan one of
+    ``tables``.
+    """
+    offenders = []
+    for sql, params in queries:
+        plan = explain(sql, params, using)
+        if full_scans(plan, tables, using.vendor, top_n=is_top_n(sql)):
+            offenders.append((sql, plan))
+    return offenders
+
+
+class QueryPlanAssertions:
+    """TestCase mixin: ``with self.assertNoFullScans(tables): ...``."""
+
+    @contextmanager
+    def assertNoFullScans(self, tables):
+        with record_queries() as queries:
+            yield queries
+        self.assertTrue(queries, 'No queries were recorded')
+        offenders = find_full_scans(queries, set(tables))
+        if offenders:
+            self.fail('Full table scans:\n' + '\n'.join(
+                f'{sql}\n    ' + '\n    '.join(plan) for sql, plan in offenders
+            ))
@@ -0,0 +1,48 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+orjson encodes dicts, lists, dates and datetimes in C; anything else it does
+not know (Decimal, lazy translation strings, querysets, ...) goes through
+DRF's own encoder, so the bytes match ``rest_framework.renderers.JSONRenderer``.
+Without orjson, or when pretty-printing is asked for, the stdlib path is used.
+"""
+import time
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.metrics import record_render_time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# DRF's fallbacks for types orjson does not encode itself
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return self._render(data, accepted_media_type, renderer_context)
+        finally:
+            record_render_time(time.perf_counter() - started)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=self.options)
+        # Same strict-JavaScript-subset escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
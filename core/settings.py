@@ -55,6 +55,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -68,8 +69,10 @@ CORS_ALLOW_METHODS = [
 
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,6 +133,34 @@ if config('USE_SQLITE', default=False, cast=bool):
     }
 
 
+# Cache configuration
+# The default cache may be per process: everything in it is keyed on the
+# resource versions in the ``versions`` cache, which every worker and
+# management command must share (the database by default, created by
+# ``manage.py createcachetable``; Redis or Memcached also work).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='heritage-hotel'),
+    },
+    'versions': {
+        'BACKEND': config('VERSION_CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('VERSION_CACHE_LOCATION', default='cache_versions'),
+    },
+}
+# Seconds a process trusts the resource versions it last read; another
+# process's write shows up in its responses and 304s within this bound.
+VERSION_CHECK_INTERVAL = config('VERSION_CHECK_INTERVAL', default=1.0, cast=float)
+
+# Upper bound on how long dashboard statistics are served from cache, since
+# "this month" and "last 7 days" move even when no booking is written.
+BOOKING_STATS_CACHE_TIMEOUT = config('BOOKING_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Longest stay, and how far ahead check-in may be, that a booking accepts
+BOOKING_MAX_NIGHTS = config('BOOKING_MAX_NIGHTS', default=30, cast=int)
+BOOKING_HORIZON_DAYS = config('BOOKING_HORIZON_DAYS', default=2 * 365, cast=int)
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -200,26 +231,64 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed when orjson is installed; the browsable API only in development
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.FastJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     ],
 }
 
+# Responses smaller than this (in bytes) are not worth compressing
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+# Never compressed, as a BREACH mitigation: these return tokens or tickets
+# (see core.middleware)
+COMPRESSION_EXCLUDE_PATHS = ['/api/auth/', '/api/booking-events/ticket/', '/admin/']
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 # Email configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'  # For Gmail
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')  # For Gmail
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='your-email@gmail.com')  # Your email
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='your-app-password')  # Your app password
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Heritage Hotel <your-email@gmail.com>')
 ADMIN_EMAIL = config('ADMIN_EMAIL', default='admin@heritagehotel.com')  # Admin email to receive bookings
 
+# Email outbox worker (python manage.py process_email_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)  # Then marked dead
+EMAIL_OUTBOX_RETRY_BASE = 60  # Seconds before the first retry, doubled on each attempt
+EMAIL_OUTBOX_RETRY_MAX = 3600
+EMAIL_OUTBOX_LEASE = 300  # Seconds a claimed batch is hidden from other workers
+
+# Completed / cancelled bookings move to the archive table this long after
+# check-out (python manage.py archive_bookings)
+BOOKING_ARCHIVE_AFTER_DAYS = config('BOOKING_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Guest names, emails, phones and requests are anonymized (or the bookings
+# purged) this long after check-out (python manage.py enforce_booking_retention)
+BOOKING_RETENTION_DAYS = config('BOOKING_RETENTION_DAYS', default=3 * 365, cast=int)
+
+# Admin notifications (/api/booking-events/) go through the BookingEvent table
+BOOKING_EVENT_POLL_INTERVAL = 1.0  # Seconds between a process's reads of new events
+BOOKING_EVENT_TTL = 86400  # Seconds events are kept for Last-Event-ID replays
+EVENT_STREAM_TICKET_TTL = 30  # Seconds a stream ticket stays redeemable
+
+# Idempotency-Key handling for public POSTs (python manage.py purge_idempotency_keys)
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)  # Seconds a key is replayed
+IDEMPOTENCY_KEY_LEASE = 60  # Seconds before an unfinished request's key can be taken over
+
+# Prometheus metrics at /metrics: scraped with "Authorization: Bearer <METRICS_TOKEN>"
+# or by a staff user. With several gunicorn workers point METRICS_DIR at a
+# directory they share (and empty it on deploy) so /metrics sums all workers.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = 5  # Seconds between a worker's writes to METRICS_DIR
+
 # Custom User Model
 AUTH_USER_MODEL = 'authentication.CustomUser'
 
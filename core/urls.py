@@ -4,11 +4,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
     path('api/menu/', include('menu.urls')),
     path('api/', include('bookings.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files during development
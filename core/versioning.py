@@ -0,0 +1,89 @@
+"""
+Per-resource version tokens kept in the shared ``versions`` cache.
+
+Writes bump the token of the resource they touch; readers build cache keys
+and ETags from the current token, so stale entries are simply never read
+again. The ``versions`` cache must be shared by every process (the default
+is the database): a write in one worker or management command then moves
+the token for all of them. Data cached against a token may still live in a
+per-process cache.
+
+Each process re-reads a token at most every ``VERSION_CHECK_INTERVAL``
+seconds and sees its own bumps at once, so another process's write is
+picked up within that interval.
+"""
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'version:{}'
+
+# resource -> (monotonic time read, (version, last_modified))
+_seen = {}
+
+
+def _store():
+    return caches['versions']
+
+
+def _new_version():
+    # A fresh random token rather than an increment: concurrent bumps from
+    # different processes can never land on the same value, and a token
+    # lost to eviction is never reused.
+    return (secrets.token_hex(8), int(time.time()))
+
+
+def get_versions(*resources, fresh=False):
+    """
+    Return ``{resource: (version, last_modified)}``, reading the store at most once.
+
+    ``fresh`` skips this process's recent reads, for callers that must not
+    act on data up to ``VERSION_CHECK_INTERVAL`` seconds old.
+    """
+    now = time.monotonic()
+    versions = {}
+    keys = {}
+    for resource in resources:
+        seen = None if fresh else _seen.get(resource)
+        if seen is not None and now - seen[0] < settings.VERSION_CHECK_INTERVAL:
+            versions[resource] = seen[1]
+        else:
+            keys[VERSION_KEY.format(resource)] = resource
+
+    if keys:
+        found = _store().get_many(keys)
+        # Unknown after a flush or eviction: the safe answer is a new
+        # version, modified "just now"
+        missing = {key: _new_version() for key in keys if key not in found}
+        if missing:
+            _store().set_many(missing, timeout=None)
+            found.update(missing)
+        for key, value in found.items():
+            versions[keys[key]] = value
+            _seen[keys[key]] = (now, value)
+    return versions
+
+
+def get_version(resource, fresh=False):
+    """Return the current version token of ``resource``."""
+    return get_versions(resource, fresh=fresh)[resource][0]
+
+
+def get_last_modified(resource):
+    """Return the Unix time ``resource`` was last written (as far as we know)."""
+    return get_versions(resource)[resource][1]
+
+
+def bump_version(resource):
+    """Invalidate everything cached against ``resource``, in every process."""
+    version = _new_version()
+    _store().set(VERSION_KEY.format(resource), version, timeout=None)
+    _seen[resource] = (time.monotonic(), version)
+    return version[0]
+
+
+def versioned_key(resource, *parts):
+    """Build a cache key that changes whenever ``resource`` is written to."""
+    return ':'.join([resource, str(get_version(resource)), *map(str, parts)])
@@ -0,0 +1,64 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.versioning import bump_version
+from menu.models import DailySpecial, MenuItem
+
+STYLES = ['Kerala', 'Chettinad', 'Malabar', 'Goan', 'Hyderabadi', 'Tandoori', 'Coastal', 'Mughlai', 'Homestyle']
+DISHES = [
+    'Fish Curry', 'Prawn Moilee', 'Chicken Stew', 'Appam', 'Biryani', 'Paneer Tikka', 'Dal Makhani',
+    'Mutton Roast', 'Vegetable Korma', 'Dosa', 'Idiyappam', 'Payasam', 'Kulfi', 'Lassi', 'Thali',
+]
+SIDES = ['steamed rice', 'Malabar parotta', 'coconut chutney', 'raita', 'pickled mango', 'garlic naan']
+
+
+class Command(BaseCommand):
+    help = 'Insert synthetic menu items and daily specials for benchmarks and local testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=200, help='Menu items to insert')
+        parser.add_argument('--specials', type=int, default=1000, help='Daily specials to insert')
+        parser.add_argument('--days-back', type=int, default=365, help='Oldest special, in days before today')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--clear', action='store_true', help='Delete all menu items and specials first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = timezone.now().date()
+
+        with transaction.atomic():
+            if options['clear']:
+                MenuItem.objects.all().delete()
+                DailySpecial.objects.all().delete()
+            MenuItem.objects.bulk_create(
+                [MenuItem(**self.dish(rng)) for _ in range(options['items'])],
+                batch_size=options['batch_size'],
+            )
+            specials = []
+            for number in range(options['specials']):
+                day = today - timedelta(days=rng.randint(0, options['days_back']))
+                # A few of today's specials are live, as on a normal day
+                specials.append(DailySpecial(
+                    **self.dish(rng), date=day, is_active=day == today and number % 3 == 0,
+                ))
+            DailySpecial.objects.bulk_create(specials, batch_size=options['batch_size'])
+            # bulk_create sends no post_save, so invalidate the menu caches here
+            transaction.on_commit(lambda: bump_version('menu'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['items']} menu items and {options['specials']} daily specials"
+        ))
+
+    def dish(self, rng):
+        name = f'{rng.choice(STYLES)} {rng.choice(DISHES)}'
+        return {
+            'name': name,
+            'description': f'{name} served with {rng.choice(SIDES)} and {rng.choice(SIDES)}.',
+            'price': Decimal(rng.randrange(120, 1500, 10)).quantize(Decimal('0.01')),
+        }
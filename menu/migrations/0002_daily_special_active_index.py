@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyspecial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date'], name='dailyspecial_active_date_idx'),
+        ),
+    ]
@@ -24,6 +24,10 @@ class DailySpecial(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # ActiveDailySpecialsListView: today's active specials only
+            models.Index(fields=['date'], name='dailyspecial_active_date_idx', condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         status = "Active" if self.is_active else "Inactive"
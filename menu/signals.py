@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.versioning import bump_version
+from .models import DailySpecial, MenuItem
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=DailySpecial)
+@receiver(post_delete, sender=DailySpecial)
+def invalidate_menu_caches(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version('menu'))
@@ -1,3 +1,78 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.query_plans import QueryPlanAssertions
+from core.versioning import get_versions
+
+from .models import DailySpecial, MenuItem
+
+
+@override_settings(VERSION_CHECK_INTERVAL=60)
+class MenuConditionalGetTests(TestCase):
+    def setUp(self):
+        # Query counts below leave out reads of the shared version store
+        get_versions('menu')
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='chef', email='chef@example.com', password='secret-pass-123',
+            first_name='Head', last_name='Chef', is_staff=True,
+        ))
+        self.item = MenuItem.objects.create(name='Prawn Mango Curry', description='Coastal', price='640.00')
+
+    def test_menu_list_revalidates_until_an_item_changes(self):
+        response = self.client.get('/api/menu/items/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/menu/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.price = '680.00'
+            self.item.save()
+        self.assertEqual(self.client.get('/api/menu/items/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_active_specials_etag_tracks_daily_special_writes(self):
+        response = self.client.get('/api/menu/daily-specials/active/')
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            DailySpecial.objects.create(
+                name='Niagra Chicken', description='Smoky', price='520.00',
+                date=timezone.now().date(), is_active=True,
+            )
+        response = self.client.get('/api/menu/daily-specials/active/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_seed_menu_invalidates_cached_lists(self):
+        etag = self.client.get('/api/menu/items/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_menu', '--items', '5', '--specials', '20', stdout=io.StringIO())
+        self.assertEqual(MenuItem.objects.count(), 6)
+        self.assertEqual(DailySpecial.objects.count(), 20)
+        response = self.client.get('/api/menu/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class MenuQueryPlanTests(QueryPlanAssertions, TestCase):
+    def test_active_specials_use_the_partial_index(self):
+        today = timezone.now().date()
+        DailySpecial.objects.create(name='Niagra Chicken', description='Smoky', price='520.00',
+                                    date=today, is_active=True)
+        DailySpecial.objects.create(name='Old Special', description='Gone', price='300.00', date=today)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='chef', email='chef@example.com', password='secret-pass-123',
+            first_name='Head', last_name='Chef', is_staff=True,
+        ))
+        with self.assertNoFullScans(['menu_dailyspecial']):
+            response = client.get('/api/menu/daily-specials/active/')
+        self.assertEqual([special['name'] for special in response.data['results']], ['Niagra Chicken'])
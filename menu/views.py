@@ -1,16 +1,27 @@
 # _file: dining_project/menu/views.py_
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
+from core.conditional import conditional_get
 from .models import MenuItem, DailySpecial
 from .serializers import MenuItemSerializer, DailySpecialSerializer
 
+
+def _today(request):
+    return [timezone.now().date()]
+
+
+@method_decorator(conditional_get('menu'), name='list')
+@method_decorator(conditional_get('menu'), name='retrieve')
 class MenuItemViewSet(viewsets.ModelViewSet):
     queryset = MenuItem.objects.all().order_by('name')
     serializer_class = MenuItemSerializer
 
+@method_decorator(conditional_get('menu'), name='list')
+@method_decorator(conditional_get('menu'), name='retrieve')
 class DailySpecialViewSet(viewsets.ModelViewSet):
     queryset = DailySpecial.objects.all().order_by('-created_at')
     serializer_class = DailySpecialSerializer
@@ -29,6 +40,7 @@ class DailySpecialViewSet(viewsets.ModelViewSet):
         daily_special.save()
         return Response({'status': 'daily special deactivated'}, status=status.HTTP_200_OK)
 
+@method_decorator(conditional_get('menu', vary_on=_today), name='get')
 class ActiveDailySpecialsListView(ListAPIView):
     serializer_class = DailySpecialSerializer
 